@@ -0,0 +1,97 @@
+"""
+Run the benchmark suite and compare against the stored baseline.
+
+    python -m benchmarks [--filter NAME] [--output results.json] [--update-baseline]
+
+Exits with a non-zero status if any benchmark is slower than the baseline by more than
+the tolerance. Baseline timings are machine specific so refresh the baseline with
+--update-baseline when benchmarking on different hardware.
+"""
+import os
+import sys
+
+import click
+
+from benchmarks import harness
+from benchmarks import suite  # noqa: F401 pylint: disable=unused-import
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def _format_time(seconds: float) -> str:
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f}us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds:.3f}s'
+
+
+def _report(name, timing):
+    click.echo(f'{name:<36}{_format_time(timing["best"]):>12}  ({timing["number"]} calls x {len(timing["rounds"])})')
+
+
+@click.command()
+@click.option('--filter', '-k', 'patterns', multiple=True, help='Only run benchmarks containing this text')
+@click.option('--repeat', '-r', type=click.IntRange(min=1), default=harness.DEFAULT_REPEAT,
+              help='Number of timed rounds per benchmark')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write JSON results to file')
+@click.option('--baseline', type=click.Path(dir_okay=False), default=DEFAULT_BASELINE,
+              help='JSON results to compare against')
+@click.option('--tolerance', type=click.FloatRange(min=0), default=harness.DEFAULT_TOLERANCE,
+              help='Allowed slowdown relative to the baseline (0.25 is 25%)')
+@click.option('--update-baseline', is_flag=True, help='Store results as the new baseline')
+@click.option('--list', 'list_only', is_flag=True, help='List benchmarks without running them')
+def main(patterns, repeat, output, baseline, tolerance, update_baseline, list_only):
+    names = [
+        name
+        for name in harness.BENCHMARKS
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+    if list_only:
+        click.echo('\n'.join(names))
+        return
+
+    results = harness.run(names, repeat=repeat, report=_report)
+
+    if output:
+        harness.save(output, results)
+
+    if update_baseline:
+        if os.path.exists(baseline):
+            # keep timings of benchmarks which were filtered out of this run
+            results['benchmarks'] = {**harness.load(baseline)['benchmarks'], **results['benchmarks']}
+        harness.save(baseline, results)
+        click.echo(f'Updated baseline {baseline}')
+        return
+
+    if not os.path.exists(baseline):
+        click.echo(f'No baseline found at {baseline}')
+        return
+
+    stored = harness.load(baseline)
+    stored['benchmarks'] = {
+        name: timing
+        for name, timing in stored['benchmarks'].items()
+        if name in names
+    }
+    comparisons = harness.compare(results, stored, tolerance)
+
+    click.echo()
+    click.echo(f'{"Benchmark":<36}{"Baseline":>12}{"Current":>12}{"Ratio":>8}  Status')
+    for comparison in comparisons:
+        ratio = f'{comparison.ratio:.2f}' if comparison.ratio is not None else '-'
+        click.echo(
+            f'{comparison.name:<36}{_format_time(comparison.baseline):>12}'
+            f'{_format_time(comparison.current):>12}{ratio:>8}  {comparison.status}'
+        )
+
+    if any(comparison.status == 'regression' for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,162 @@
+"""
+Timing harness and baseline comparison for the benchmark suite.
+
+Every benchmark is registered as a context manager which performs any setup, yields the
+function to time and cleans up afterwards. Each function is run enough times per round
+to take a measurable amount of time and the per call time of every round is recorded.
+"""
+import json
+import platform
+import statistics
+import sys
+import timeit
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+
+RESULTS_VERSION = 1
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+
+# benchmark name -> context manager factory yielding the function to time
+BENCHMARKS: Dict[str, Callable[[], ContextManager[Callable]]] = {}
+
+
+def benchmark(name: str):
+    """Register a generator function yielding the function to time under name"""
+    def decorator(setup: Callable):
+        if name in BENCHMARKS:
+            raise ValueError(f'Benchmark {name} is already registered')
+
+        BENCHMARKS[name] = contextmanager(setup)
+        return setup
+
+    return decorator
+
+
+@dataclass
+class Timing:
+    number: int  # calls per round
+    rounds: List[float]  # seconds per call of each round
+
+    @property
+    def best(self) -> float:
+        return min(self.rounds)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.rounds)
+
+    def to_dict(self) -> Dict:
+        return {
+            'number': self.number,
+            'rounds': self.rounds,
+            'best': self.best,
+            'median': self.median,
+        }
+
+
+def measure(func: Callable, repeat: int = DEFAULT_REPEAT) -> Timing:
+    """Time func over repeat rounds after one warm up call"""
+    func()
+
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+
+    return Timing(
+        number=number,
+        rounds=[total / number for total in timer.repeat(repeat=repeat, number=number)],
+    )
+
+
+def environment() -> Dict:
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': np.__version__,
+    }
+
+
+def run(names: List[str], repeat: int = DEFAULT_REPEAT, report: Callable = None) -> Dict:
+    """Run the named benchmarks and return JSON serializable results"""
+    timings = {}
+
+    for name in names:
+        with BENCHMARKS[name]() as func:
+            timings[name] = measure(func, repeat).to_dict()
+
+        if report:
+            report(name, timings[name])
+
+    return {
+        'version': RESULTS_VERSION,
+        'environment': environment(),
+        'benchmarks': timings,
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    tolerance: float
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if self.baseline is None or self.current is None:
+            return None
+        return self.current / self.baseline
+
+    @property
+    def status(self) -> str:
+        if self.baseline is None:
+            return 'new'
+        if self.current is None:
+            return 'missing'
+        if self.ratio > 1 + self.tolerance:
+            return 'regression'
+        if self.ratio < 1 / (1 + self.tolerance):
+            return 'improvement'
+        return 'ok'
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Comparison]:
+    """
+    Compare best times of results against a baseline.
+
+    The fastest round is the least affected by noise from other processes. Benchmarks
+    which were only run in one of the two are reported as new or missing.
+    """
+    current = results['benchmarks']
+    previous = baseline['benchmarks']
+
+    return [
+        Comparison(
+            name=name,
+            baseline=previous[name]['best'] if name in previous else None,
+            current=current[name]['best'] if name in current else None,
+            tolerance=tolerance,
+        )
+        for name in list(dict.fromkeys(list(previous) + list(current)))
+    ]
+
+
+def load(filename: str) -> Dict:
+    with open(filename, 'r') as results_fd:
+        return json.loads(results_fd.read())
+
+
+def save(filename: str, results: Dict):
+    with open(filename, 'w') as results_fd:
+        results_fd.write(json.dumps(results, indent=2, sort_keys=True))
+        results_fd.write('\n')
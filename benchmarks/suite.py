@@ -0,0 +1,174 @@
+"""
+Benchmarks of the hot paths of homecomp.
+
+Everything runs offline: listings are parsed from saved pages in benchmarks/fixtures and
+storage/output benchmarks work in temporary directories.
+"""
+import os
+import tempfile
+from dataclasses import replace
+
+from click.testing import CliRunner
+
+from benchmarks.harness import benchmark
+from homecomp import cli
+from homecomp import compute
+from homecomp import const
+from homecomp.clients import estately
+from homecomp.clients import zillow
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.csv import write_csv
+from homecomp.outputs.html import write_html
+from homecomp.results import ResultStore
+from homecomp.results import series
+from homecomp.storage import DataclassFileStorage
+from homecomp.storage import get_storage
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+HORIZONS = [5, 30, 60]
+STORAGE_ENTRIES = 10000
+RESULT_SCENARIOS = 10000
+STORAGE_FILES = {
+    'json': '.storage',
+    'sqlite': '.storage.db',
+}
+MULTI_YEAR_LISTINGS = 20
+MULTI_YEAR_LIMIT = 15
+
+PURCHASER = PurchaserProfile(name='bench', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME, hoa=150)
+RENTAL = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+
+def _listings(count: int):
+    """Mix of homes and rentals with varying prices"""
+    return [
+        replace(HOME, name=f'Home {idx}', price=HOME.price + idx * 1000, hoa=idx % 5 * 100)
+        if idx % 4 else
+        replace(RENTAL, name=f'Rental {idx}', price=RENTAL.price + idx * 10)
+        for idx in range(count)
+    ]
+
+
+def _register_compute(method, housing, years):
+    @benchmark(f'compute.{method.__name__}[{years}y]')
+    def _compute():
+        yield lambda: method(PURCHASER, housing, years)
+
+
+for _years in HORIZONS:
+    _register_compute(compute.buy, HOME, _years)
+    _register_compute(compute.rent, RENTAL, _years)
+
+
+def _register_multi_year(engine):
+    @benchmark(f'cli.multi_year[{engine}]')
+    def _multi_year():
+        runner = CliRunner()
+        args = [PURCHASER.name, str(MULTI_YEAR_LIMIT), '--engine', engine, '--no-cache', '--jobs', '1']
+
+        with runner.isolated_filesystem():
+            with DataclassFileStorage() as storage:
+                storage.profiles.save(PURCHASER)
+                for details in _listings(MULTI_YEAR_LISTINGS):
+                    storage.housing.save(details)
+
+            def _run():
+                result = runner.invoke(cli.multi_year, args, catch_exceptions=False)
+                assert result.exit_code == 0, result.output
+
+            yield _run
+
+
+for _engine in const.SUMMARY_ENGINES:
+    _register_multi_year(_engine)
+
+
+def _register_output(name, writer):
+    @benchmark(f'outputs.{name}[30y]')
+    def _output():
+        expenses, budget_items = compute.buy(PURCHASER, HOME, 30)
+
+        with tempfile.TemporaryDirectory() as directory:
+            yield lambda: writer(HOME, budget_items, expenses, directory)
+
+
+_register_output('write_html', write_html)
+_register_output('write_csv', write_csv)
+
+
+def _storage_file(directory: str, backend: str) -> str:
+    filename = os.path.join(directory, STORAGE_FILES[backend])
+
+    with get_storage(filename) as storage:
+        storage.profiles.save(PURCHASER)
+        for details in _listings(STORAGE_ENTRIES):
+            storage.housing.save(details)
+
+    return filename
+
+
+def _register_storage(backend):
+    @benchmark(f'storage.{backend}.load_save[{STORAGE_ENTRIES // 1000}k]')
+    def _storage_load_save():
+        with tempfile.TemporaryDirectory() as directory:
+            filename = _storage_file(directory, backend)
+
+            def _run():
+                with get_storage(filename) as storage:
+                    storage.housing.save(replace(HOME, name='Home 1'))
+
+            yield _run
+
+    @benchmark(f'storage.{backend}.find[{STORAGE_ENTRIES // 1000}k]')
+    def _storage_find():
+        with tempfile.TemporaryDirectory() as directory:
+            filename = _storage_file(directory, backend)
+
+            with get_storage(filename) as storage:
+                # last entry so a scan would visit every entry (the json backend indexes ids
+                # on the first lookup and the sqlite backend scans the id column)
+                yield lambda: storage.housing.find(f'Home {STORAGE_ENTRIES - 1}')
+
+
+for _backend in STORAGE_FILES:
+    _register_storage(_backend)
+
+
+@benchmark(f'results.column[{RESULT_SCENARIOS // 1000}k]')
+def _results_column():
+    columns = series(*compute.buy(PURCHASER, HOME, 30))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(directory)
+        with store.writer('sweep') as writer:
+            for _ in range(RESULT_SCENARIOS):
+                writer.add(PURCHASER, HOME, columns)
+
+        # final networth of every scenario
+        yield lambda: store.open('sweep')['networth.Total'][:, -1].sum()
+
+
+def _register_parser(module, fixture):
+    client = module.__name__.rsplit('.', 1)[-1]
+
+    # the full parse every page falls back to, for comparison with the targeted extraction
+    for name, parse in [(f'clients.{client}.parse', module.parse_home_details),
+                        (f'clients.{client}.parse[full]', module.parse_full_home_details)]:
+        _register_parse(name, parse, fixture)
+
+
+def _register_parse(name, parse, fixture):
+    @benchmark(name)
+    def _parse():
+        with open(os.path.join(FIXTURES_DIR, fixture), 'r') as fixture_fd:
+            html = fixture_fd.read()
+
+        yield lambda: parse(html, f'https://{fixture}')
+
+
+_register_parser(zillow, 'zillow.html')
+_register_parser(estately, 'estately.html')
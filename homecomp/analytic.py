@@ -0,0 +1,301 @@
+"""
+Closed form summaries of buy/rent scenarios.
+
+Average monthly cost and asset delta are computed from geometric series and annuity
+formulas instead of stepping through every month. Home values, rent and the investment
+balance grow geometrically while a minimum payment mortgage follows the standard
+amortization schedule, so a scenario is summarized in O(years) time.
+
+The simulation rounds values to the cent every month which the closed forms do not, so
+results drift from simulated results by a few cents over long horizons (see cross_check).
+Scenarios without a closed form (e.g. maximum payment mortgages or sampled rate paths)
+fall back to the batch simulation engine.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from homecomp import const
+from homecomp import errors
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_batch
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+def _geometric(ratio: float, count: int) -> float:
+    """Return the sum of ratio ** k for k in range(count)"""
+    if count <= 0:
+        return 0.0
+    if ratio == 1:
+        return float(count)
+    return (ratio ** count - 1) / (ratio - 1)
+
+
+def _scenarios(scenarios: ScenarioArrays) -> List[Dict]:
+    """Return a dict of plain values for each scenario"""
+    for name, values in vars(scenarios).items():
+        if np.ndim(values) > 1:
+            raise errors.UnsupportedBudgetItem(f'No closed form for per period {name}')
+
+    columns = {
+        name: values.tolist()
+        for name, values in vars(scenarios).items()
+    }
+
+    return [
+        dict(zip(columns.keys(), values))
+        for values in zip(*columns.values())
+    ]
+
+
+def _rent_summary(scenario: Dict, years: int) -> Tuple[float, float]:
+    periods = years * const.PERIODS_PER_YEAR
+    growth = 1 + scenario['investment_rate']
+    increase = 1 + scenario['rent_increase_rate']
+
+    total_rent = 0.0
+    rent_growth = 0.0
+
+    # rent is increased in the initial period and then after every 12th period so
+    # periods t where (t + 1) // 12 == j all pay rent * increase ** (j + 1)
+    for year in range(years + 1):
+        count = const.PERIODS_PER_YEAR if year < years else 1
+        first = year * const.PERIODS_PER_YEAR - 1
+        rent = scenario['price'] * increase ** (year + 1)
+
+        total_rent += rent * count
+        rent_growth += rent * growth ** (periods - first - count) * _geometric(growth, count)
+
+    investment = (
+        scenario['cash'] * growth ** (periods + 1)
+        + scenario['budget'] * _geometric(growth, periods + 1)
+        - rent_growth
+    )
+
+    return total_rent / (periods + 1), investment - scenario['cash']
+
+
+def _balance(principal: float, rate: float, payment: float, count: int) -> float:
+    """Mortgage balance after count full payments"""
+    return (principal - payment / rate) * (1 + rate) ** count + payment / rate
+
+
+@dataclass
+class _MortgageSchedule:
+    regular: int  # number of full payments made in periods [0, regular)
+    event: int = None  # period of the payoff or final partial payment
+    event_payment: float = 0
+    event_interest: float = 0
+    final_balance: float = 0
+
+
+def _mortgage_schedule(scenario: Dict, periods: int, remaining) -> _MortgageSchedule:
+    """
+    Follow MinMortgage through the given periods.
+
+    remaining(t) is the budget left before the mortgage in period t. The mortgage is paid
+    off as soon as remaining exceeds the balance, otherwise the minimum payment is made
+    until the final partial payment.
+    """
+    principal = scenario['principal']
+    rate = scenario['mortgage_rate']
+    payment = scenario['payment']
+
+    if principal <= 0:
+        return _MortgageSchedule(regular=0)
+
+    def _balance_at(count):
+        return _balance(principal, rate, payment, count)
+
+    # the final partial payment is due once the balance plus interest no longer exceeds a payment
+    final = math.ceil(math.log(payment / (payment - principal * rate)) / math.log(1 + rate)) - 1
+    while final > 0 and _balance_at(final - 1) * (1 + rate) <= payment:
+        final -= 1
+    while _balance_at(final) * (1 + rate) > payment:
+        final += 1
+
+    last = min(final, periods - 1)
+
+    # remaining never exceeds the budget before the sale so skip ahead to the first
+    # period where the balance falls below the budget
+    low, high = 0, last
+    while low < high:
+        middle = (low + high) // 2
+        if _balance_at(middle) < scenario['budget']:
+            high = middle
+        else:
+            low = middle + 1
+
+    for period in range(low, last + 1):
+        balance = _balance_at(period)
+
+        if remaining(period) > balance:
+            return _MortgageSchedule(regular=period, event=period, event_payment=balance)
+
+    if final <= periods - 1:
+        balance = _balance_at(final)
+        return _MortgageSchedule(
+            regular=final,
+            event=final,
+            event_payment=balance * (1 + rate),
+            event_interest=balance * rate,
+        )
+
+    return _MortgageSchedule(regular=periods, final_balance=_balance_at(periods))
+
+
+def _buy_summary(scenario: Dict, years: int) -> Tuple[float, float]:
+    periods = years * const.PERIODS_PER_YEAR
+    growth = 1 + scenario['investment_rate']
+    appreciation = 1 + scenario['appreciation']
+    price = scenario['price']
+    yearly_rate = scenario['property_tax_rate'] + scenario['home_insurance_rate']
+
+    # home value at the start of every owned period t in [0, periods) is price * appreciation ** t
+    home_values = price * _geometric(appreciation, periods)
+    home_growth = price * growth ** (periods - 1) * _geometric(appreciation / growth, periods)
+    # yearly costs are paid in periods t = 12 * j + 11
+    year_values = price * appreciation ** 11 * _geometric(appreciation ** 12, years)
+    year_growth = (
+        price * appreciation ** 11 * growth ** (periods - 12)
+        * _geometric((appreciation / growth) ** 12, years)
+    )
+    sell_price = price * appreciation ** (periods - 1)
+
+    def _remaining(period):
+        value = price * appreciation ** period
+        costs = scenario['hoa'] + value * scenario['maintenance_rate']
+        if period % 12 == 11:
+            costs += value * yearly_rate
+        if period == periods - 1:
+            costs -= sell_price * (1 - scenario['selling_costs_rate'])
+        return scenario['budget'] - costs
+
+    schedule = _mortgage_schedule(scenario, periods, _remaining)
+    rate = scenario['mortgage_rate']
+    payment = scenario['payment']
+    principal = scenario['principal']
+
+    interest = 0.0
+    if schedule.regular:
+        interest = rate * (
+            (principal - payment / rate) * _geometric(1 + rate, schedule.regular)
+            + schedule.regular * payment / rate
+        )
+    interest += schedule.event_interest
+
+    mortgage_growth = payment * growth ** (periods - schedule.regular) * _geometric(growth, schedule.regular)
+    if schedule.event is not None:
+        mortgage_growth += schedule.event_payment * growth ** (periods - 1 - schedule.event)
+
+    total_costs = (
+        price * scenario['buying_costs_rate']
+        + scenario['hoa'] * periods
+        + scenario['maintenance_rate'] * home_values
+        + yearly_rate * year_values
+        + scenario['selling_costs_rate'] * sell_price
+        + interest
+    )
+
+    investment = (
+        scenario['cash'] * growth ** (periods + 1)
+        + scenario['budget'] * _geometric(growth, periods + 1)
+        - price * (scenario['down_payment_pct'] + scenario['buying_costs_rate']) * growth ** periods
+        - scenario['hoa'] * _geometric(growth, periods)
+        - scenario['maintenance_rate'] * home_growth
+        - yearly_rate * year_growth
+        + sell_price * (1 - scenario['selling_costs_rate'])
+        - mortgage_growth
+    )
+
+    asset_delta = investment - scenario['cash'] - schedule.final_balance
+    return total_costs / (periods + 1), asset_delta
+
+
+def closed_form(scenario: Dict, years: int) -> Tuple[float, float]:
+    """
+    Return the average cost and asset delta of a single scenario from closed forms.
+
+    Raises UnsupportedBudgetItem if the scenario has no closed form.
+    """
+    if years < 1:
+        raise errors.UnsupportedBudgetItem('No closed form for horizons shorter than a year')
+
+    if not scenario['is_home']:
+        return _rent_summary(scenario, years)
+
+    if scenario['max_mortgage']:
+        raise errors.UnsupportedBudgetItem('No closed form for MaxMortgage')
+
+    return _buy_summary(scenario, years)
+
+
+def summarize_many(scenarios: ScenarioArrays, years: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return average cost and asset delta of every scenario.
+
+    Closed forms are used wherever possible and any remaining scenarios are simulated.
+    """
+    average_cost = np.zeros(len(scenarios))
+    asset_delta = np.zeros(len(scenarios))
+    simulated = []
+
+    try:
+        scenario_values = _scenarios(scenarios)
+    except errors.UnsupportedBudgetItem:
+        scenario_values = []
+        simulated = list(range(len(scenarios)))
+
+    for index, scenario in enumerate(scenario_values):
+        try:
+            average_cost[index], asset_delta[index] = closed_form(scenario, years)
+        except errors.UnsupportedBudgetItem:
+            simulated.append(index)
+
+    if simulated:
+        batch = simulate_batch(scenarios.take(np.array(simulated)), years, series=False)
+        average_cost[simulated] = batch.average_cost
+        asset_delta[simulated] = batch.asset_delta
+
+    return average_cost, asset_delta
+
+
+def summarize(purchaser: PurchaserProfile, housing: HousingDetail, years: int) -> Tuple[float, float]:
+    """Return the average monthly cost and asset delta of buying/renting the given housing"""
+    average_cost, asset_delta = summarize_many(ScenarioArrays.from_pairs([(purchaser, housing)]), years)
+    return average_cost.item(), asset_delta.item()
+
+
+@dataclass
+class CrossCheck:
+    """Closed form summaries next to simulated summaries of the same scenarios"""
+    analytic_average_cost: np.ndarray
+    analytic_asset_delta: np.ndarray
+    simulated_average_cost: np.ndarray
+    simulated_asset_delta: np.ndarray
+
+    @property
+    def average_cost_error(self) -> np.ndarray:
+        return np.abs(self.analytic_average_cost - self.simulated_average_cost)
+
+    @property
+    def asset_delta_error(self) -> np.ndarray:
+        return np.abs(self.analytic_asset_delta - self.simulated_asset_delta)
+
+
+def cross_check(scenarios: ScenarioArrays, years: int) -> CrossCheck:
+    """Compare closed form summaries against a full simulation of the same scenarios"""
+    average_cost, asset_delta = summarize_many(scenarios, years)
+    batch = simulate_batch(scenarios, years, series=False)
+
+    return CrossCheck(
+        analytic_average_cost=average_cost,
+        analytic_asset_delta=asset_delta,
+        simulated_average_cost=batch.average_cost,
+        simulated_asset_delta=batch.asset_delta,
+    )
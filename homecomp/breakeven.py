@@ -0,0 +1,87 @@
+"""
+Break even solvers comparing buying a home against renting.
+
+The break even month is read off every monthly horizon of a single simulation, as
+buying can fall back behind renting after catching up (e.x. around yearly property tax
+and insurance payments). The break even price assumes gains fall as the price rises,
+which allows it to be narrowed down by bisection with a handful of batch simulations.
+"""
+from dataclasses import replace
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+from homecomp import const
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_month_horizons
+from homecomp.engine import simulate_months
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+DEFAULT_PRICE_TOLERANCE = 100
+MAX_PRICE = 10 ** 10
+
+
+def _asset_deltas(purchaser: PurchaserProfile, housing: List[HousingDetail], months: int) -> List[float]:
+    scenarios = ScenarioArrays.from_pairs([(purchaser, details) for details in housing])
+    return simulate_months(scenarios, months, series=False).asset_delta.tolist()
+
+
+def breakeven_month(purchaser: PurchaserProfile,
+                    housing: HousingDetail,
+                    rental: HousingDetail,
+                    max_years: int) -> Optional[int]:
+    """
+    Return the earliest number of months after which buying has gained more than renting.
+
+    Every monthly horizon up to max_years is derived from one simulation of each of the
+    home and rental. None is returned if buying does not pass renting within max_years.
+    """
+    max_months = max_years * const.PERIODS_PER_YEAR
+    if max_months < 1:
+        return None
+
+    scenarios = ScenarioArrays.from_pairs([(purchaser, housing), (purchaser, rental)])
+    buy_delta, rent_delta = simulate_month_horizons(scenarios, max_months).asset_delta
+    ahead = np.flatnonzero(buy_delta > rent_delta)
+
+    return int(ahead[0]) + 1 if ahead.size else None
+
+
+def breakeven_price(purchaser: PurchaserProfile,
+                    housing: HousingDetail,
+                    rental: HousingDetail,
+                    years: int,
+                    tolerance: int = DEFAULT_PRICE_TOLERANCE) -> Optional[int]:
+    """
+    Return the highest list price at which buying has gained at least as much as renting
+    after the given years.
+
+    The price is bracketed by doubling from the current list price and then narrowed by
+    bisection to within tolerance. None is returned if buying never breaks even.
+    """
+    months = years * const.PERIODS_PER_YEAR
+    rent_delta = _asset_deltas(purchaser, [rental], months)[0]
+
+    def _breaks_even(price):
+        return _asset_deltas(purchaser, [replace(housing, price=price)], months)[0] >= rent_delta
+
+    if not _breaks_even(0):
+        return None
+
+    low, high = 0, max(housing.price, tolerance)
+    while _breaks_even(high):
+        if high >= MAX_PRICE:
+            return high
+        low, high = high, high * 2
+
+    while high - low > tolerance:
+        middle = (low + high) // 2
+        if _breaks_even(middle):
+            low = middle
+        else:
+            high = middle
+
+    return low
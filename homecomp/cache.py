@@ -0,0 +1,193 @@
+"""
+Content addressed on-disk cache for simulation results.
+
+Entries are keyed by a hash of everything which affects a simulation (purchaser profile,
+housing detail, horizon, engine version and const defaults) so edited profiles or
+listings simply miss the cache. Least recently used entries are evicted once the cache
+grows past its size limit.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import BinaryIO
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+import numpy as np
+
+from homecomp import const
+from homecomp import engine
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+DEFAULT_CACHE_DIR = os.getenv('HOMECOMP_CACHE_DIR', '.homecomp-cache')
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = '.npz'
+
+
+def _const_defaults() -> Dict:
+    return {
+        name: getattr(const, name)
+        for name in dir(const)
+        if name.startswith('DEFAULT_')
+    }
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    size: int
+    max_size: int
+
+
+class DiskCache:
+    """
+    Directory of cache entry files where least recently used entries are evicted once the
+    total size grows past max_bytes. Entries are written atomically so readers never see
+    a partial entry. Only files directly within the directory ending in entry_suffix are
+    entries, so caches can be nested (e.x. the HTTP cache within the result cache).
+    """
+
+    entry_suffix = ''
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None  # estimate of total entry size to avoid scanning on every put
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # caches are shared with worker processes where locks cannot be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{self.entry_suffix}')
+
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [
+                    entry
+                    for entry in entries
+                    if entry.is_file() and entry.name.endswith(self.entry_suffix)
+                ]
+        except FileNotFoundError:
+            return []
+
+    def _write(self, key: str, write: Callable[[BinaryIO], None]):
+        """Store the entry written by write and evict least recently used entries over the size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as entry_fd:
+                write(entry_fd)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, self._path(key))
+        except:
+            os.remove(temp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.stats().size
+            else:
+                self._size += size
+
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits within its size limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        size = sum(entry.stat().st_size for entry in entries)
+
+        for entry in entries:
+            if size <= self.max_bytes:
+                break
+
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+            size -= entry.stat().st_size
+
+        self._size = size
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+
+        return CacheStats(
+            entries=len(entries),
+            size=sum(entry.stat().st_size for entry in entries),
+            max_size=self.max_bytes,
+        )
+
+    def clear(self):
+        """Remove every entry of this cache (other caches can live in subdirectories)"""
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+        self._size = 0
+
+
+class ResultCache(DiskCache):
+
+    entry_suffix = ENTRY_SUFFIX
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        super().__init__(directory, max_bytes)
+
+    @staticmethod
+    def key(kind: str, purchaser: PurchaserProfile, housing: HousingDetail, years: int) -> str:
+        """Return stable hash of everything which affects the cached result"""
+        content = json.dumps({
+            'kind': kind,
+            'purchaser': asdict(purchaser),
+            'housing': asdict(housing),
+            'years': years,
+            'engine': engine.VERSION,
+            'const': _const_defaults(),
+        }, sort_keys=True)
+
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return cached arrays for key or None when there is no entry"""
+        path = self._path(key)
+
+        try:
+            with np.load(path) as entry:
+                arrays = dict(entry)
+            os.utime(path)  # track last access for eviction
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]):
+        """Store arrays for key and evict least recently used entries over the size limit"""
+        self._write(key, lambda entry_fd: np.savez(entry_fd, **arrays))
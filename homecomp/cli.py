@@ -4,22 +4,60 @@ from itertools import product
 
 import click
 
+from homecomp import analytic
+from homecomp import breakeven
 from homecomp import clients
 from homecomp import const
 from homecomp import errors
+from homecomp import montecarlo
+from homecomp import optimize
 from homecomp import outputs
+from homecomp import parallel
+from homecomp import profiling
+from homecomp import results
 from homecomp.models import PurchaserProfile
 from homecomp.models import HousingDetail
 from homecomp.outputs.html import write_multi_year
-from homecomp.outputs.common import get_asset_delta
-from homecomp.outputs.common import get_average_cost
 from homecomp import compute
-from homecomp.storage import DataclassFileStorage
+from homecomp.cache import ResultCache
+from homecomp.clients.cache import ResponseCache
+from homecomp.engine import ScenarioArrays
+from homecomp.storage import get_storage
+from homecomp.storage import migrate_storage
+
+
+class ValueList(click.ParamType):
+    """Comma separated list of values or an inclusive start:stop:step range"""
+    name = 'values'
+
+    def __init__(self, value_type: type = float):
+        self.value_type = value_type
+
+    def _range(self, value: str) -> list:
+        start, stop, step = (self.value_type(part) for part in value.split(':'))
+        count = int(round((stop - start) / step)) + 1
+
+        return [
+            self.value_type(round(start + idx * step, 10))
+            for idx in range(count)
+        ]
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, list):
+            return value
+
+        try:
+            if ':' in value:
+                return self._range(value)
+
+            return [self.value_type(part) for part in value.split(',')]
+        except (ValueError, ZeroDivisionError):
+            return self.fail(f'{value} is not a list or start:stop:step range of values', param, ctx)
 
 
 def get_purchaser_profile(name: str) -> PurchaserProfile:
     try:
-        with DataclassFileStorage() as storage:
+        with get_storage() as storage:
             return storage.profiles.find(name)
     except errors.NoEntryFound as error:
         raise click.ClickException(f'No profile found for {name}') from error
@@ -27,7 +65,7 @@ def get_purchaser_profile(name: str) -> PurchaserProfile:
 
 def get_housing_detail(name: str) -> HousingDetail:
     try:
-        with DataclassFileStorage() as storage:
+        with get_storage() as storage:
             return storage.housing.find(name)
     except errors.NoEntryFound as error:
         raise click.ClickException(f'No housing found for {name}') from error
@@ -45,7 +83,7 @@ def profiles():
 @click.option('--max-mortgage/--min-mortgage', default=False)
 @click.option('--yearly-appreciation', type=click.FLOAT, default=const.DEFAULT_HOME_APPRECIATION)
 def profiles_add(name, cash, budget, max_mortgage, yearly_appreciation):
-    with DataclassFileStorage() as storage:
+    with get_storage() as storage:
         profile = PurchaserProfile(
             name=name,
             cash=cash,
@@ -64,7 +102,7 @@ def profiles_add(name, cash, budget, max_mortgage, yearly_appreciation):
 @click.option('--max-mortgage/--min-mortgage', default=False)
 @click.option('--yearly-appreciation', type=click.FLOAT, default=const.DEFAULT_HOME_APPRECIATION)
 def profiles_update(name, cash, budget, max_mortgage, yearly_appreciation):
-    with DataclassFileStorage() as storage:
+    with get_storage() as storage:
         profile = PurchaserProfile(
             name=name,
             cash=cash,
@@ -79,7 +117,7 @@ def profiles_update(name, cash, budget, max_mortgage, yearly_appreciation):
 @profiles.command(name='list')
 @click.argument('name', nargs=-1)
 def profiles_list(name):
-    with DataclassFileStorage() as storage:
+    with get_storage() as storage:
         _profiles = storage.profiles.find_all(name[0]) if name else storage.profiles
 
         for profile in _profiles:
@@ -90,7 +128,7 @@ def profiles_list(name):
 @click.argument('name')
 def profiles_remove(name):
     try:
-        with DataclassFileStorage() as storage:
+        with get_storage() as storage:
             _profile = storage.profiles.find(name)
             storage.profiles.delete(_profile.name)
     except errors.NoEntryFound:
@@ -123,16 +161,57 @@ def housing_add(link, name, price, type):
     else:
         raise click.UsageError('Must provide link or name, price, type inputs')
 
-    with DataclassFileStorage() as storage:
+    with get_storage() as storage:
         storage.housing.save(_housing, overwrite=False)
 
 
+@housing.command(name='import')
+@click.argument('file', type=click.File('r'))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=clients.DEFAULT_FETCH_JOBS,
+              help='Number of listings fetched at once')
+@click.option('--per-host', type=click.IntRange(min=1), default=clients.DEFAULT_HOST_CONCURRENCY,
+              help='Number of listings fetched at once from the same site')
+@click.option('--overwrite', is_flag=True, help='Replace housing which already exists with the same name')
+@click.pass_context
+def housing_import(ctx, file, jobs, per_host, overwrite):
+    """
+    Add housing from every link in FILE (one link per line or CSV rows containing a link).
+
+    Listings are fetched concurrently and all of them saved together once fetched. A line
+    is printed for each link and the exit code is 1 if any link failed.
+    """
+    links = clients.read_links(file)
+    results = clients.fetch_home_details(links, jobs=jobs, host_concurrency=per_host)
+
+    with get_storage() as storage:
+        for result in results:
+            if result.housing is None:
+                continue
+
+            try:
+                storage.housing.save(result.housing, overwrite=overwrite)
+            except errors.EntryExists as error:
+                result.error = error
+
+    failed = 0
+    for result in results:
+        if result.error is None:
+            click.echo(f'OK\t{result.housing.name}\t{result.link}')
+        else:
+            failed += 1
+            click.echo(f'FAILED\t{type(result.error).__name__}: {result.error}\t{result.link}')
+
+    click.echo(f'Imported {len(results) - failed} of {len(results)} listings')
+    if failed:
+        ctx.exit(1)
+
+
 @housing.command(name='update')
 @click.argument('name')
 def housing_refresh(name):
     """Reload most recent housing details from link"""
     try:
-        with DataclassFileStorage() as storage:
+        with get_storage() as storage:
             _housing = storage.housing.find(name)
 
             # remove old housing option in case name has changed
@@ -152,7 +231,7 @@ def housing_refresh(name):
 @housing.command(name='list')
 @click.argument('name', nargs=-1)
 def housing_list(name):
-    with DataclassFileStorage() as storage:
+    with get_storage() as storage:
         _housings = storage.housing.find_all(name[0]) if name else storage.housing
 
         for idx, _housing in enumerate(_housings):
@@ -164,27 +243,46 @@ def housing_list(name):
 @click.argument('name')
 def housing_remove(name):
     try:
-        with DataclassFileStorage() as storage:
+        with get_storage() as storage:
             _housing = storage.housing.find(name)
             storage.housing.delete(_housing.name)
     except errors.NoEntryFound:
         click.echo(f'No housing found for {name}')
 
 
-def _run(purchaser, housing, time, output, format):
+def _check_stream(stream, engine):
+    if stream and engine != const.ENGINE_LOOP:
+        raise click.UsageError(f'--stream is not supported by the {engine} engine')
+
+
+def _run(purchaser, housing, time, output, format, engine=const.DEFAULT_ENGINE, cache=None, stream=False,
+         save_results=False):
+    """Write output of a single computation and return its result columns if save_results is set"""
     purchaser = get_purchaser_profile(purchaser) if isinstance(purchaser, str) else purchaser
     details = get_housing_detail(housing) if isinstance(housing, str) else housing
+    output_dir = os.path.join(output, purchaser.name)
+
+    if stream:
+        expenses, budget_items = compute.stream(purchaser, details, time)
+        outputs.stream(format, details, budget_items, expenses, output_dir)
+        return
 
     method = compute.buy if details.type == const.HOUSING_TYPE_HOME else compute.rent
     expenses, budget_items = method(
         purchaser=purchaser,
         housing=details,
-        years=time
+        years=time,
+        engine=engine,
+        cache=cache
     )
 
-    output_dir = os.path.join(output, purchaser.name)
     outputs.write(format, details, budget_items, expenses, output_dir)
 
+    if save_results:
+        return results.series(expenses, budget_items)
+
+    return None
+
 
 @click.command()
 @click.argument('purchaser')
@@ -192,27 +290,134 @@ def _run(purchaser, housing, time, output, format):
 @click.option('--time', '-t', type=click.INT, default=5, help='Number of years to run calculation')
 @click.option('--output', '-o', default=os.getenv('HOUSING_DIR', '.'), help='Output directory')
 @click.option('--format', type=click.Choice(outputs.FORMATS), default=outputs.DEFAULT_FORMAT)
-def run(purchaser, housing, time, output, format):
+@click.option('--engine', type=click.Choice(const.ENGINES), default=const.DEFAULT_ENGINE,
+              help='Simulation engine')
+@click.option('--cache/--no-cache', 'use_cache', default=True, help='Reuse previously computed results')
+@click.option('--stream', is_flag=True,
+              help='Write output as each month is computed to limit memory use (loop engine only, not cached)')
+def run(purchaser, housing, time, output, format, engine, use_cache, stream):
     """Run a single housing computation for the given profile"""
-    _run(purchaser, housing, time, output, format)
+    _check_stream(stream, engine)
+    _run(purchaser, housing, time, output, format, engine, ResultCache() if use_cache else None, stream)
+
+
+def _run_all_task(shared, purchaser_idx, housing_idx):
+    return _run(
+        shared['profiles'][purchaser_idx],
+        shared['housing'][housing_idx],
+        shared['time'],
+        shared['output'],
+        shared['format'],
+        shared['engine'],
+        shared['cache'],
+        shared['stream'],
+        shared['save_results']
+    )
 
 
 @click.command()
 @click.option('--time', '-t', type=click.INT, default=5, help='Number of years to run calculation')
 @click.option('--output', '-o', default=os.getenv('HOUSING_DIR', '.'), help='Output directory')
 @click.option('--format', type=click.Choice(outputs.FORMATS), default=outputs.DEFAULT_FORMAT)
-def run_all(time, output, format):
+@click.option('--engine', type=click.Choice(const.ENGINES), default=const.DEFAULT_ENGINE,
+              help='Simulation engine')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=parallel.default_jobs(),
+              help='Number of worker processes')
+@click.option('--cache/--no-cache', 'use_cache', default=True, help='Reuse previously computed results')
+@click.option('--stream', is_flag=True,
+              help='Write output as each month is computed to limit memory use (loop engine only, not cached)')
+@click.option('--results', 'results_name',
+              help='Also save the numeric results of every calculation to the results store under this name')
+def run_all(time, output, format, engine, jobs, use_cache, stream, results_name):
     """Run all buy/rent calculations crossing each housing option with each profile"""
-    with DataclassFileStorage() as storage:
-        for purchaser, details in product(storage.profiles, storage.housing):
-            _run(purchaser, details, time, output, format)
+    _check_stream(stream, engine)
+    if stream and results_name:
+        raise click.UsageError('--results is not supported with --stream')
+
+    with get_storage() as storage:
+        _profiles = list(storage.profiles)
+        _housing = list(storage.housing)
+
+    tasks = list(product(range(len(_profiles)), range(len(_housing))))
+    shared = {
+        'profiles': _profiles,
+        'housing': _housing,
+        'time': time,
+        'output': output,
+        'format': format,
+        'engine': engine,
+        'cache': ResultCache() if use_cache else None,
+        'stream': stream,
+        'save_results': bool(results_name),
+    }
+    columns = parallel.ordered_map(_run_all_task, tasks, jobs=jobs, shared=shared)
+
+    if not results_name:
+        for _ in columns:
+            pass
+        return
+
+    metadata = {'time': time, 'engine': engine}
+    with results.ResultStore().writer(results_name, metadata) as writer:
+        for (purchaser_idx, housing_idx), _columns in zip(tasks, columns):
+            writer.add(_profiles[purchaser_idx], _housing[housing_idx], _columns)
+
+    click.echo(f'Saved {len(tasks)} results to {writer.path}')
+
+
+def _multi_year_task(shared, start, stop):
+    """Return average cost and asset delta of each year for each housing in [start, stop)"""
+    purchaser = shared['purchaser']
+    _housing = shared['housing'][start:stop]
+    limit = shared['limit']
+
+    if shared['engine'] == const.ENGINE_ANALYTIC:
+        scenarios = ScenarioArrays.from_pairs([(purchaser, details) for details in _housing])
+        summaries = [analytic.summarize_many(scenarios, time) for time in range(1, limit + 1)]
+        return [
+            [
+                (average_cost[idx].item(), asset_delta[idx].item())
+                for average_cost, asset_delta in summaries
+            ]
+            for idx in range(len(_housing))
+        ]
+
+    if shared['engine'] == const.ENGINE_NUMPY:
+        horizons = compute.simulate_multi_year([purchaser], _housing, limit)
+        return [
+            list(zip(average_costs, asset_deltas))
+            for average_costs, asset_deltas in zip(
+                horizons.average_cost.tolist(),
+                horizons.asset_delta.tolist()
+            )
+        ]
+
+    return [
+        [
+            compute.summarize(
+                purchaser=purchaser,
+                housing=details,
+                years=time,
+                engine=shared['engine']
+            )
+            for time in range(1, limit + 1)
+        ]
+        for details in _housing
+    ]
 
 
 @click.command()
 @click.argument('purchaser')
 @click.argument('limit', type=click.INT)
 @click.option('--output', '-o', default=os.getenv('HOUSING_DIR', '.'), help='Output directory')
-def multi_year(purchaser, limit, output):
+@click.option('--engine', type=click.Choice(const.SUMMARY_ENGINES), default=const.ENGINE_NUMPY,
+              help='numpy (default) derives every horizon from one simulation, loop simulates each horizon '
+                   'separately and analytic uses closed forms')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=parallel.default_jobs(),
+              help='Number of worker processes')
+@click.option('--cache/--no-cache', 'use_cache', default=True, help='Reuse previously computed results')
+@click.option('--cross-check', is_flag=True, help='Compare closed form summaries against simulated summaries')
+def multi_year(purchaser, limit, output, engine, jobs, use_cache, cross_check):
     """
     Run all buy/rent calculations over different time ranges with simplified output.
 
@@ -220,45 +425,334 @@ def multi_year(purchaser, limit, output):
     """
     purchaser = get_purchaser_profile(purchaser)
 
-    with DataclassFileStorage() as storage:
-        rows = []
+    with get_storage() as storage:
+        _housing = list(storage.housing)
+
+    # summaries for each housing option with one (average cost, asset delta) per year
+    summaries = [None] * len(_housing)
+
+    result_cache = ResultCache() if use_cache else None
+    if result_cache:
+        kind = 'analytic-horizons' if engine == const.ENGINE_ANALYTIC else 'horizons'
+        keys = [result_cache.key(kind, purchaser, details, limit) for details in _housing]
+
+        for idx, key in enumerate(keys):
+            cached = result_cache.get(key)
+            if cached is not None:
+                summaries[idx] = list(zip(cached['average_cost'].tolist(), cached['asset_delta'].tolist()))
+
+    missing = [idx for idx, summary in enumerate(summaries) if summary is None]
+    shared = {
+        'purchaser': purchaser,
+        'housing': [_housing[idx] for idx in missing],
+        'limit': limit,
+        'engine': engine,
+    }
+    tasks = parallel.split(len(missing), jobs)
+    computed = (
+        summary
+        for chunk in parallel.ordered_map(_multi_year_task, tasks, jobs=jobs, shared=shared)
+        for summary in chunk
+    )
+
+    for idx, summary in zip(missing, computed):
+        summaries[idx] = summary
+
+        if result_cache:
+            result_cache.put(keys[idx], {
+                'average_cost': [average_cost for average_cost, _ in summary],
+                'asset_delta': [asset_delta for _, asset_delta in summary],
+            })
+
+    rows = [
+        [
+            outputs.format_currency(value)
+            for housing_summaries in summaries
+            for value in housing_summaries[time]
+        ]
+        for time in range(limit)
+    ]
+
+    write_multi_year(
+        _housing,
+        rows,
+        purchaser=purchaser,
+        directory=output
+    )
+
+    if cross_check:
+        scenarios = ScenarioArrays.from_pairs([(purchaser, details) for details in _housing])
 
         for time in range(1, limit + 1):
-            row = []
-
-            for details in storage.housing:
-                method = compute.buy if details.type == const.HOUSING_TYPE_HOME else compute.rent
-                expenses, budget_items = method(
-                    purchaser=purchaser,
-                    housing=details,
-                    years=time
-                )
-
-                row.extend([
-                    get_average_cost(expenses),
-                    get_asset_delta(budget_items),
-                ])
-
-            rows.append(row)
-
-        write_multi_year(
-            storage.housing,
-            rows,
-            purchaser=purchaser,
-            directory=output
+            check = analytic.cross_check(scenarios, time)
+            click.echo(
+                f'{time} years: average cost within {outputs.format_currency(check.average_cost_error.max())}, '
+                f'asset delta within {outputs.format_currency(check.asset_delta_error.max())}'
+            )
+
+
+@click.command()
+@click.argument('purchaser')
+@click.argument('housing')
+@click.option('--time', '-t', type=click.INT, default=5, help='Number of years to run calculation')
+@click.option('--paths', '-n', type=click.IntRange(min=1), default=1000, help='Number of sampled rate paths')
+@click.option('--seed', type=click.INT, default=0, help='Random number generator seed')
+def simulate(purchaser, housing, time, paths, seed):
+    """Run a Monte Carlo simulation with randomly sampled appreciation, returns and rent growth"""
+    purchaser = get_purchaser_profile(purchaser)
+    details = get_housing_detail(housing)
+
+    simulation = montecarlo.simulate_paths(purchaser, details, time, paths, seed=seed)
+    percentiles = montecarlo.DEFAULT_PERCENTILES
+
+    click.echo('\t'.join(['Year'] + [f'P{percentile}' for percentile in percentiles]))
+    for year, bands in zip(simulation.years.tolist(), simulation.percentiles(percentiles).T.tolist()):
+        click.echo('\t'.join([str(year)] + [outputs.format_currency(band) for band in bands]))
+
+
+@click.command()
+@click.argument('purchaser')
+@click.argument('housing')
+@click.option('--time', '-t', type=ValueList(int), default='5', help='Years to run calculation')
+@click.option('--yearly-appreciation', type=ValueList(), help='Yearly home appreciation rates')
+@click.option('--mortgage-rate', type=ValueList(), help='Yearly mortgage rates (APR)')
+@click.option('--down-payment', type=ValueList(), help='Down payment percentages of list price')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=parallel.default_jobs(),
+              help='Number of worker processes')
+def sweep(purchaser, housing, time, yearly_appreciation, mortgage_rate, down_payment, jobs):
+    """
+    Run calculations over every combination of the given parameter values.
+
+    Values are comma separated (0.02,0.03) or an inclusive range (0.02:0.05:0.01).
+    """
+    purchaser = get_purchaser_profile(purchaser)
+    details = get_housing_detail(housing)
+
+    cells = compute.sweep(
+        purchaser,
+        details,
+        years=time,
+        appreciation=yearly_appreciation,
+        mortgage_apr=mortgage_rate,
+        down_payment_pct=down_payment,
+        jobs=jobs
+    )
+
+    click.echo('Years\tAppreciation\tMortgage APR\tDown Payment\tCost\tGains')
+    for cell in cells:
+        click.echo('\t'.join([
+            str(cell.years),
+            f'{cell.appreciation:.2%}',
+            f'{cell.mortgage_apr:.2%}',
+            f'{cell.down_payment_pct:.0%}',
+            outputs.format_currency(cell.average_cost),
+            outputs.format_currency(cell.asset_delta),
+        ]))
+
+
+@click.command(name='breakeven')
+@click.argument('purchaser')
+@click.argument('housing')
+@click.argument('rental')
+@click.option('--time', '-t', type=click.IntRange(min=1), default=30,
+              help='Number of years buying must break even within')
+def run_breakeven(purchaser, housing, rental, time):
+    """Find when buying housing passes renting and the highest price which breaks even"""
+    purchaser = get_purchaser_profile(purchaser)
+    details = get_housing_detail(housing)
+    rental = get_housing_detail(rental)
+
+    if details.type != const.HOUSING_TYPE_HOME or rental.type != const.HOUSING_TYPE_RENTAL:
+        raise click.UsageError('Must compare a home against a rental')
+
+    month = breakeven.breakeven_month(purchaser, details, rental, time)
+    if month is None:
+        click.echo(f'Buying does not pass renting within {time} years')
+    else:
+        years, months = divmod(month, const.PERIODS_PER_YEAR)
+        click.echo(f'Buying passes renting after {years} years {months} months')
+
+    price = breakeven.breakeven_price(purchaser, details, rental, time)
+    if price is None:
+        click.echo(f'Buying does not break even within {time} years at any price')
+    else:
+        click.echo(f'Highest price breaking even within {time} years: {outputs.format_currency(price)}')
+
+
+@click.command(name='optimize')
+@click.argument('purchaser')
+@click.argument('housing')
+@click.option('--time', '-t', type=click.IntRange(min=1), default=5, help='Number of years to run calculation')
+@click.option('--min-down-payment', type=click.FLOAT, default=optimize.DEFAULT_MIN_DOWN_PAYMENT_PCT,
+              help='Smallest down payment percentage of list price')
+@click.option('--max-down-payment', type=click.FLOAT, default=optimize.DEFAULT_MAX_DOWN_PAYMENT_PCT,
+              help='Largest down payment percentage of list price')
+@click.option('--step', type=click.FloatRange(min=0.0001), default=optimize.DEFAULT_DOWN_PAYMENT_STEP,
+              help='Down payment percentage step')
+@click.option('--term', type=ValueList(int), default=','.join(map(str, optimize.DEFAULT_MORTGAGE_TERMS)),
+              help='Mortgage terms in years')
+@click.option('--top', type=click.IntRange(min=1), default=5, help='Number of strategies to list')
+def run_optimize(purchaser, housing, time, min_down_payment, max_down_payment, step, term, top):
+    """Find the down payment, mortgage type and term which gain the most over time"""
+    purchaser = get_purchaser_profile(purchaser)
+    details = get_housing_detail(housing)
+
+    if details.type != const.HOUSING_TYPE_HOME:
+        raise click.UsageError('Can only optimize financing of a home')
+
+    down_payments = optimize.down_payment_grid(purchaser, details, min_down_payment, max_down_payment, step)
+    if not down_payments:
+        max_pct = optimize.max_down_payment_pct(purchaser, details)
+        raise click.ClickException(
+            f'{purchaser.name} can afford at most a {max_pct:.1%} down payment on {details.name}'
         )
 
+    result = optimize.optimize(purchaser, details, time, down_payments, mortgage_terms=term)
+
+    click.echo('Mortgage\tTerm\tDown Payment\tCost\tGains')
+    for strategy in result.strategies[:top]:
+        click.echo('\t'.join([
+            strategy.mortgage_type,
+            str(strategy.mortgage_years),
+            f'{strategy.down_payment_pct:.1%}',
+            outputs.format_currency(strategy.average_cost),
+            outputs.format_currency(strategy.asset_delta),
+        ]))
+    click.echo(f'Simulated {len(result.strategies)} of {result.candidates} strategies')
+
+
+@click.group(name='storage')
+def storage_commands():
+    """Commands for managing profile and housing storage"""
+
+
+@storage_commands.command(name='migrate')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+@click.argument('destination', type=click.Path(dir_okay=False))
+def storage_migrate(source, destination):
+    """
+    Copy all profiles and housing from one storage file into another.
+
+    The backend of each file is chosen by extension (.db, .sqlite or .sqlite3 for SQLite,
+    anything else for JSON). Set HOMECOMP_STORAGE to the destination to start using it.
+    """
+    with get_storage(source) as source_storage, \
+            get_storage(destination) as destination_storage:
+        counts = migrate_storage(source_storage, destination_storage)
+
+    for name, count in counts.items():
+        click.echo(f'Migrated {count} {name} entries')
+
 
 @click.group()
-def cli():
-    pass
+def cache():
+    """Commands for managing cached simulation results and listing pages"""
+
+
+@cache.command(name='stats')
+def cache_stats():
+    for title, disk_cache in [('Results', ResultCache()), ('Listing pages', ResponseCache())]:
+        stats = disk_cache.stats()
+
+        click.echo(f'{title}:')
+        click.echo(f'  Directory: {disk_cache.directory}')
+        click.echo(f'  Entries: {stats.entries}')
+        click.echo(f'  Size: {stats.size / 2 ** 20:.1f} MiB of {stats.max_size / 2 ** 20:.1f} MiB')
+
+
+@cache.command(name='clear')
+def cache_clear():
+    ResultCache().clear()
+    ResponseCache().clear()
+
+
+@click.group(name='results')
+def results_commands():
+    """Commands for managing saved numeric results (see run-all --results)"""
+
+
+@results_commands.command(name='list')
+def results_list():
+    store = results.ResultStore()
+
+    for name in store.names():
+        result_set = store.open(name)
+        metadata = ', '.join(f'{key}={value}' for key, value in result_set.metadata.items())
+        click.echo(f'{name}\t{len(result_set)} scenarios\t{len(result_set.columns)} columns\t{metadata}')
+
+
+@results_commands.command(name='show')
+@click.argument('name')
+@click.argument('column', required=False)
+def results_show(name, column):
+    """List the columns of a result set or print the final value of a column for each scenario"""
+    try:
+        result_set = results.ResultStore().open(name)
+    except FileNotFoundError as error:
+        raise click.ClickException(str(error)) from error
+
+    if column is None:
+        click.echo('\n'.join(result_set.columns))
+        return
+
+    try:
+        values = result_set.column(column)
+    except KeyError as error:
+        raise click.ClickException(f'No result column {column}') from error
+
+    for idx, value in enumerate(values[:, -1].tolist()):
+        # scenarios without the column (e.x. rentals for home expenses) are NaN
+        if value != value:  # pylint: disable=comparison-with-itself
+            continue
+
+        purchaser, housing = result_set.scenario(idx)
+        click.echo(f'{purchaser.name}\t{housing.name}\t{outputs.format_currency(value)}')
+
+
+@results_commands.command(name='remove')
+@click.argument('name')
+def results_remove(name):
+    try:
+        results.ResultStore().remove(name)
+    except FileNotFoundError as error:
+        raise click.ClickException(f'No result set named {name}') from error
+
+
+def _report_profile(profiler, show, json_file, pstats_file):
+    if show:
+        click.echo('\n'.join(profiler.report()), err=True)
+    if json_file:
+        profiler.write_json(json_file)
+    if pstats_file:
+        profiler.write_pstats(pstats_file)
+
+
+@click.group()
+@click.option('--profile', is_flag=True, help='Print time spent in each budget item, compute and output stage')
+@click.option('--profile-json', type=click.Path(dir_okay=False), help='Write the profile breakdown as JSON')
+@click.option('--profile-pstats', type=click.Path(dir_okay=False), help='Write cProfile stats to a pstats file')
+@click.pass_context
+def cli(ctx, profile, profile_json, profile_pstats):
+    if not (profile or profile_json or profile_pstats):
+        return
+
+    # report is registered first so that it runs after the profile is closed
+    ctx.call_on_close(lambda: _report_profile(profiler, profile, profile_json, profile_pstats))
+    profiler = ctx.with_resource(profiling.profile(use_cprofile=bool(profile_pstats)))
 
 
 cli.add_command(profiles)
+cli.add_command(cache)
+cli.add_command(storage_commands)
+cli.add_command(results_commands)
 cli.add_command(housing)
 cli.add_command(run)
 cli.add_command(run_all)
 cli.add_command(multi_year)
+cli.add_command(simulate)
+cli.add_command(sweep)
+cli.add_command(run_breakeven)
+cli.add_command(run_optimize)
 
 
 def main():
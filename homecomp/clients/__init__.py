@@ -1,3 +1,13 @@
+import csv
+from collections import defaultdict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from typing import Iterable
+from typing import List
+from typing import Optional
 from urllib.parse import urlparse
 
 from homecomp import errors
@@ -6,6 +16,9 @@ from homecomp.clients import zillow
 from homecomp.models import HousingDetail
 
 
+DEFAULT_FETCH_JOBS = 8
+DEFAULT_HOST_CONCURRENCY = 2
+
 _URL_MAPPING = {
     'www.estately.com': estately.get_home_details,
     'www.zillow.com': zillow.get_home_details,
@@ -25,3 +38,77 @@ def get_home_details(shareable_link: str) -> HousingDetail:
         return _URL_MAPPING[parsed.netloc](shareable_link)
     except KeyError as error:
         raise errors.ClientNotSupported(f'No client implementation for {parsed.netloc}') from error
+
+
+def read_links(lines: Iterable[str]) -> List[str]:
+    """
+    Return unique links from lines of one link each or CSV rows containing a link.
+
+    The first http(s) cell of each row is used so header rows, blank lines and # comments
+    are skipped.
+    """
+    links = {}
+
+    for row in csv.reader(line for line in lines if not line.lstrip().startswith('#')):
+        link = next((cell.strip() for cell in row if cell.strip().startswith(('http://', 'https://'))), None)
+        if link:
+            links[link] = None
+
+    return list(links)
+
+
+@dataclass
+class FetchResult:
+    link: str
+    housing: Optional[HousingDetail] = None
+    error: Optional[Exception] = None
+
+
+def _fetch(link: str) -> FetchResult:
+    try:
+        return FetchResult(link, housing=get_home_details(link))
+    except Exception as error:  # pylint: disable=broad-except
+        # one bad listing should not stop the rest from being fetched
+        return FetchResult(link, error=error)
+
+
+def fetch_home_details(links: List[str],
+                       jobs: int = DEFAULT_FETCH_JOBS,
+                       host_concurrency: int = DEFAULT_HOST_CONCURRENCY) -> List[FetchResult]:
+    """
+    Fetch housing details of every link concurrently and return results in the order of links.
+
+    Up to jobs links are fetched at once but no more than host_concurrency from any one
+    host. Links are only handed to a thread once their host has a free slot so threads
+    never sit blocked behind a busy host while links to other hosts are waiting.
+    """
+    pending = defaultdict(deque)  # host -> indexes of links not yet started
+    for idx, link in enumerate(links):
+        pending[urlparse(link).netloc].append(idx)
+
+    results = [None] * len(links)
+    active = defaultdict(int)  # host -> links being fetched
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        running = {}
+
+        def _submit():
+            for host, indexes in pending.items():
+                while indexes and active[host] < host_concurrency and len(running) < jobs:
+                    idx = indexes.popleft()
+                    active[host] += 1
+                    running[pool.submit(_fetch, links[idx])] = (host, idx)
+
+        _submit()
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                host, idx = running.pop(future)
+                active[host] -= 1
+                results[idx] = future.result()
+
+            _submit()
+
+    return results
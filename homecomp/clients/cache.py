@@ -0,0 +1,137 @@
+"""
+On-disk cache of listing page responses.
+
+Entries are keyed by normalized URL and store the gzip compressed body along with the
+ETag and Last-Modified validators of the response. Entries younger than the TTL are
+served without any request while older entries are revalidated with a conditional GET,
+so an unchanged listing costs a 304 response instead of the whole page.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Dict
+from typing import Optional
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from homecomp.cache import DEFAULT_CACHE_DIR
+from homecomp.cache import DiskCache
+
+
+DEFAULT_HTTP_CACHE_DIR = os.getenv('HOMECOMP_HTTP_CACHE_DIR', os.path.join(DEFAULT_CACHE_DIR, 'http'))
+DEFAULT_HTTP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_HTTP_CACHE_TTL = float(os.getenv('HOMECOMP_HTTP_CACHE_TTL', str(12 * 60 * 60)))  # seconds
+ENTRY_SUFFIX = '.json.gz'
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """Return url with a lowercase scheme and host, no default port or fragment and sorted query"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    fetched: float  # time of the last response from the server (including 304s)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+
+    def age(self) -> float:
+        return time.time() - self.fetched
+
+    def validators(self) -> Dict[str, str]:
+        """Return headers making a request conditional on the entry having changed"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def response(self) -> requests.Response:
+        """Return the entry as a response the same as one from the server"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.encoding = 'utf-8'
+        response._content = self.body.encode('utf-8')  # pylint: disable=protected-access
+        response.headers = CaseInsensitiveDict({
+            key: value
+            for key, value in [('ETag', self.etag),
+                               ('Last-Modified', self.last_modified),
+                               ('Content-Type', self.content_type)]
+            if value
+        })
+        return response
+
+
+class ResponseCache(DiskCache):
+
+    entry_suffix = ENTRY_SUFFIX
+
+    def __init__(self,
+                 directory: str = DEFAULT_HTTP_CACHE_DIR,
+                 max_bytes: int = DEFAULT_HTTP_CACHE_MAX_BYTES,
+                 ttl: float = DEFAULT_HTTP_CACHE_TTL):
+        super().__init__(directory, max_bytes)
+        self.ttl = ttl
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return cached response of url or None when there is no entry"""
+        path = self._path(self.key(url))
+
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as entry_fd:
+                entry = CachedResponse(**json.loads(entry_fd.read()))
+            os.utime(path)  # track last access for eviction
+        except (FileNotFoundError, ValueError, TypeError, OSError, EOFError):
+            return None
+
+        return entry
+
+    def put(self, url: str, entry: CachedResponse):
+        content = json.dumps(asdict(entry)).encode('utf-8')
+        self._write(self.key(url), lambda entry_fd: entry_fd.write(gzip.compress(content)))
+
+    def store(self, url: str, response: requests.Response) -> Optional[CachedResponse]:
+        """Cache a successful response unless the server forbids storing it"""
+        if response.status_code != 200 or 'no-store' in response.headers.get('cache-control', ''):
+            return None
+
+        entry = CachedResponse(
+            url=url,
+            body=response.text,
+            fetched=time.time(),
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+            content_type=response.headers.get('content-type'),
+        )
+        self.put(url, entry)
+        return entry
+
+    def invalidate(self, url: str):
+        self.remove(self.key(url))
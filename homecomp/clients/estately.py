@@ -1,18 +1,21 @@
 import bs4
-import requests
 
 from homecomp import const
+from homecomp.clients import extract
+from homecomp.clients import transport
 from homecomp.models import HousingDetail
 
 
-HEADERS = {
-    'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-    'accept-encoding': 'gzip, deflate, br',
-    'accept-language': 'en-US,en;q=0.8',
-    'upgrade-insecure-requests': '1',
-    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                  '(KHTML, like Gecko) Chrome/61.0.3163.100 Safari/537.36'
-}
+# elements holding every detail of a listing as (tag, class)
+DETAILS_ELEMENTS = [
+    ('div', 'carousel-scroller-wrapper'),
+    ('section', 'price-block'),
+    ('ul', 'listing-basic-details'),
+    ('dl', 'home-attributes-list'),
+]
+DETAILS_STRAINER = bs4.SoupStrainer(attrs={'class': [class_name for _, class_name in DETAILS_ELEMENTS]})
+HOA_AMENITIES_LABEL = 'HOA/Condo/Coop Fee:'
+TAX_LABEL = 'Tax Annual Amount:'
 
 
 def currency_to_int(value):
@@ -34,11 +37,73 @@ def get_home_details(shareable_link: str) -> HousingDetail:
 
     Shareable link can be generated from a listing page.
     """
-    resp = requests.get(shareable_link, headers=HEADERS)
-    resp.raise_for_status()
+    resp = transport.get(shareable_link)
 
-    soup = bs4.BeautifulSoup(resp.text, 'html.parser')
-    name = soup.find('title').get_text(strip=True).split('|')[0].strip()
+    try:
+        return parse_home_details(resp.text, shareable_link)
+    except Exception:
+        # never serve a captcha or otherwise unusable page from the cache
+        transport.invalidate(shareable_link)
+        raise
+
+
+def parse_home_details(html: str, shareable_link: str) -> HousingDetail:
+    """
+    Return home details from the HTML of a listing page.
+
+    Only the part of the page spanning the elements holding details is tokenized and only
+    those elements are built into a tree, rather than the whole page. Pages where any of
+    them are missing or laid out differently fall back to a full parse.
+    """
+    name = extract.title(html)
+    spans = [extract.element_span(html, tag, class_name) for tag, class_name in DETAILS_ELEMENTS]
+
+    if name is None or None in spans:
+        return parse_full_home_details(html, shareable_link)
+
+    details_html = html[min(start for start, _ in spans):max(end for _, end in spans)]
+    soup = bs4.BeautifulSoup(details_html, 'html.parser', parse_only=DETAILS_STRAINER)
+
+    if not _has_details(soup, html):
+        return parse_full_home_details(html, shareable_link)
+
+    return _parse_soup(soup, name, shareable_link)
+
+
+def parse_full_home_details(html: str, shareable_link: str) -> HousingDetail:
+    """Return home details from the full parse of the HTML of a listing page"""
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    return _parse_soup(soup, soup.find('title').get_text(strip=True), shareable_link)
+
+
+def _find_hoa(soup: bs4.BeautifulSoup):
+    return soup.find('small', text='HOA')
+
+
+def _find_label(soup: bs4.BeautifulSoup, label: str):
+    return soup.find('dt', {'class': 'home-attributes-list-label'}, text=label)
+
+
+def _has_details(soup: bs4.BeautifulSoup, html: str) -> bool:
+    """Return whether the partial parse found everything a full parse of html would"""
+    required = [
+        soup.find('div', {'class': 'carousel-scroller-wrapper'}),
+        soup.find('h2', {'class': 'price-block-sale-price'}),
+        soup.find('ul', {'class': 'listing-basic-details'}),
+    ]
+    if not all(element is not None for element in required):
+        return False
+
+    # optional details appearing anywhere in the page must be within the parsed elements
+    return (
+        ('>HOA<' not in html or _find_hoa(soup) is not None)
+        and (HOA_AMENITIES_LABEL not in html or _find_label(soup, HOA_AMENITIES_LABEL) is not None)
+        and (TAX_LABEL not in html or _find_label(soup, TAX_LABEL) is not None)
+    )
+
+
+def _parse_soup(soup: bs4.BeautifulSoup, title: str, shareable_link: str) -> HousingDetail:
+    name = title.split('|')[0].strip()
 
     carousel = soup.find('div', {'class': 'carousel-scroller-wrapper'})
     image = carousel.find('img')
@@ -47,18 +112,18 @@ def get_home_details(shareable_link: str) -> HousingDetail:
     price = soup.find('h2', {'class': 'price-block-sale-price'}).get_text(strip=True)
     price = currency_to_int(price)
 
-    hoa = soup.find('small', text='HOA')
+    hoa = _find_hoa(soup)
     if hoa:
         hoa = hoa.find_next_sibling('div').get_text(strip=True)
         hoa = currency_to_int(hoa)
     else:
         hoa = 0
 
-    hoa_amenities = soup.find('dt', {'class': 'home-attributes-list-label'}, text='HOA/Condo/Coop Fee:')
+    hoa_amenities = _find_label(soup, HOA_AMENITIES_LABEL)
     if hoa_amenities:
         hoa_amenities = hoa_amenities.find_next_sibling('dd').get_text(strip=True).split(', ')
 
-    tax = soup.find('dt', {'class': 'home-attributes-list-label'}, text='Tax Annual Amount:')
+    tax = _find_label(soup, TAX_LABEL)
     if hoa_amenities and 'Taxes' in hoa_amenities:
         effective_tax_rate = 0
     elif tax:
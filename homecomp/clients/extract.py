@@ -0,0 +1,60 @@
+"""
+Targeted extraction of single elements from raw listing HTML without building a DOM.
+
+Only the plain markup of each element is understood, so callers fall back to a full
+BeautifulSoup parse whenever an element cannot be found.
+"""
+import html
+import re
+from typing import Optional
+from typing import Tuple
+
+
+_TITLE = re.compile(r'<title\b[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+_SCRIPT_END = re.compile(r'</script', re.IGNORECASE)
+
+
+def title(page: str) -> Optional[str]:
+    """Return the text of the page title (the same as get_text(strip=True) of its element)"""
+    match = _TITLE.search(page)
+
+    # markup within a title is left to the full parse
+    if not match or '<' in match.group(1):
+        return None
+
+    return html.unescape(match.group(1)).strip()
+
+
+def script(page: str, element_id: str) -> Optional[str]:
+    """Return the raw content of the script element with element_id (scripts are never unescaped)"""
+    start = re.search(
+        r'<script\b[^>]*?\sid\s*=\s*(["\']?)' + re.escape(element_id) + r'\1(?=[\s/>])[^>]*>',
+        page,
+        re.IGNORECASE
+    )
+    if not start:
+        return None
+
+    end = _SCRIPT_END.search(page, start.end())
+    return page[start.end():end.start()] if end else None
+
+
+def element_span(page: str, tag: str, class_name: str) -> Optional[Tuple[int, int]]:
+    """Return start and end offsets of the first tag element with class_name (counting nested tags)"""
+    opening = re.search(
+        r'<' + tag + r'\b[^>]*\sclass\s*=\s*(["\'])(?:[^"\']*\s)?' + re.escape(class_name) + r'(?:\s[^"\']*)?\1',
+        page,
+        re.IGNORECASE
+    )
+    if not opening:
+        return None
+
+    depth = 0
+    for match in re.finditer(r'<(/?)' + tag + r'\b', page[opening.start():], re.IGNORECASE):
+        depth += -1 if match.group(1) else 1
+
+        if not depth:
+            end = page.find('>', opening.start() + match.end())
+            return (opening.start(), end + 1) if end != -1 else None
+
+    return None
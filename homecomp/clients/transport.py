@@ -0,0 +1,237 @@
+"""
+Shared HTTP client of the listing clients.
+
+Every host gets one requests.Session so connections are pooled and kept alive between
+listings, and its own rate limit so requests to one site are spaced out without slowing
+down requests to another. Connection errors, timeouts and 429/5xx responses are retried
+with exponential backoff and full jitter (or after the delay asked for by Retry-After).
+With a response cache, fresh pages are served without any request and stale pages are
+revalidated with conditional requests (see clients.cache).
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from homecomp.clients.cache import ResponseCache
+
+
+HEADERS = {
+    'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'accept-encoding': 'gzip, deflate, br',
+    'accept-language': 'en-US,en;q=0.8',
+    'upgrade-insecure-requests': '1',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/61.0.3163.100 Safari/537.36'
+}
+
+DEFAULT_TIMEOUT = (
+    float(os.getenv('HOMECOMP_HTTP_CONNECT_TIMEOUT', '5')),
+    float(os.getenv('HOMECOMP_HTTP_READ_TIMEOUT', '30')),
+)
+DEFAULT_RETRIES = int(os.getenv('HOMECOMP_HTTP_RETRIES', '4'))
+DEFAULT_BACKOFF = 0.5  # seconds before the first retry, doubled for each retry after
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_RATE = float(os.getenv('HOMECOMP_HTTP_RATE', '1'))  # requests per second per host
+DEFAULT_POOL_SIZE = 8
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def _retry_after(response: requests.Response) -> float:
+    """Return seconds to wait requested by a Retry-After header (0 without one)"""
+    value = response.headers.get('retry-after')
+    if not value:
+        return 0.0
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RateLimiter:
+    """Spaces out calls to acquire so that at most rate happen per second (unlimited if rate is 0)"""
+
+    def __init__(self, rate: float, clock: Callable = time.monotonic, sleep: Callable = time.sleep):
+        self.interval = 1 / rate if rate else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+
+        # reserve the next slot while locked but wait for it without holding the lock
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+
+        if start > now:
+            self.sleep(start - now)
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with timeouts, retries and per host rate limits.
+
+    rate_limits overrides the requests per second of individual hosts. Clients are safe
+    to share between threads. Responses are cached when a cache is provided.
+    """
+
+    def __init__(self,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 rate: float = DEFAULT_RATE,
+                 rate_limits: Dict[str, float] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 cache: ResponseCache = None,
+                 sleep: Callable = time.sleep):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate = rate
+        self.rate_limits = rate_limits or {}
+        self.pool_size = pool_size
+        self.cache = cache
+        self.sleep = sleep
+        self._sessions = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def session(self, host: str) -> requests.Session:
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+
+                self._sessions[host] = session
+
+            return self._sessions[host]
+
+    def limiter(self, host: str) -> RateLimiter:
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.rate_limits.get(host, self.rate), sleep=self.sleep)
+
+            return self._limiters[host]
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return a random delay before retry number attempt + 1 (full jitter)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET url and return a successful response, raising the last error once retries run out"""
+        if self.cache is None:
+            return self._get(url, **kwargs)
+
+        entry = self.cache.get(url)
+        if entry is not None and entry.age() < self.cache.ttl:
+            return entry.response()
+
+        if entry is not None:
+            kwargs['headers'] = {**entry.validators(), **(kwargs.get('headers') or {})}
+
+        response = self._get(url, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            # unchanged since it was cached so only the time it was last fetched changes
+            entry.fetched = time.time()
+            self.cache.put(url, entry)
+            return entry.response()
+
+        self.cache.store(url, response)
+        return response
+
+    def invalidate(self, url: str):
+        """Drop any cached response of url (e.x. a page which could not be parsed)"""
+        if self.cache is not None:
+            self.cache.invalidate(url)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        host = urlparse(url).netloc
+        session = self.session(host)
+        limiter = self.limiter(host)
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            limiter.acquire()
+
+            try:
+                response = session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response
+
+                delay = max(self.backoff_delay(attempt), _retry_after(response))
+                response.close()
+
+            self.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Return the client shared by every listing client"""
+    global _CLIENT  # pylint: disable=global-statement
+
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = HttpClient(cache=ResponseCache())
+        return _CLIENT
+
+
+def set_client(client: Optional[HttpClient]):
+    """Replace the shared client (e.x. with different timeouts or rate limits)"""
+    global _CLIENT  # pylint: disable=global-statement
+
+    with _CLIENT_LOCK:
+        if _CLIENT is not None and _CLIENT is not client:
+            _CLIENT.close()
+        _CLIENT = client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_client().get(url, **kwargs)
+
+
+def invalidate(url: str):
+    get_client().invalidate(url)
@@ -1,21 +1,16 @@
 import json
 
 import bs4
-import requests
 
 from homecomp import const
 from homecomp import errors
+from homecomp.clients import extract
+from homecomp.clients import transport
 from homecomp.models import HousingDetail
 
 
-HEADERS = {
-    'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-    'accept-encoding': 'gzip, deflate, br',
-    'accept-language': 'en-US,en;q=0.8',
-    'upgrade-insecure-requests': '1',
-    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                  '(KHTML, like Gecko) Chrome/61.0.3163.100 Safari/537.36'
-}
+CAPTCHA_TEXT = "Please verify you're a human to continue."
+PRELOADED_DATA_ID = 'hdpApolloPreloadedData'
 
 
 def currency_to_int(value: str) -> int:
@@ -31,21 +26,62 @@ def get_home_details(shareable_link: str) -> HousingDetail:
 
     Shareable link can be generated from a listing page.
     """
-    resp = requests.get(shareable_link, headers=HEADERS)
-    resp.raise_for_status()
+    resp = transport.get(shareable_link)
 
-    soup = bs4.BeautifulSoup(resp.text, 'html.parser')
-    if soup.find('h5', text="Please verify you're a human to continue."):
+    try:
+        return parse_home_details(resp.text, shareable_link)
+    except Exception:
+        # never serve a captcha or otherwise unusable page from the cache
+        transport.invalidate(shareable_link)
+        raise
+
+
+def parse_home_details(html: str, shareable_link: str) -> HousingDetail:
+    """
+    Return home details from the HTML of a listing page.
+
+    The title and preloaded data script are pulled straight out of the page as building
+    the whole DOM is by far the slowest part of parsing. Pages where either cannot be
+    found (or which could be a captcha) fall back to a full parse.
+    """
+    if CAPTCHA_TEXT not in html:
+        name = extract.title(html)
+        data = extract.script(html, PRELOADED_DATA_ID)
+
+        if name is not None and data is not None:
+            try:
+                home = _preloaded_home(data)
+            except (ValueError, KeyError, TypeError, StopIteration):
+                home = None
+
+            if home is not None:
+                return _home_details(name, home, shareable_link)
+
+    return parse_full_home_details(html, shareable_link)
+
+
+def parse_full_home_details(html: str, shareable_link: str) -> HousingDetail:
+    """Return home details from the full parse of the HTML of a listing page"""
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    if soup.find('h5', text=CAPTCHA_TEXT):
         raise errors.CaptchaError('You have been had!')
 
-    name = soup.find('title').get_text(strip=True).split('|')[0].strip()
+    name = soup.find('title').get_text(strip=True)
+    home = _preloaded_home(next(soup.find(id=PRELOADED_DATA_ID).children))
+
+    return _home_details(name, home, shareable_link)
 
+
+def _preloaded_home(data: str) -> dict:
     # instead of searching across HTML fields pull this giant json scipt field and
     # wrangle details form that - hopefully this doesn't change :)
-    data = json.loads(next(soup.find(id='hdpApolloPreloadedData').children))
-    cache = json.loads(data['apiCache'])
+    cache = json.loads(json.loads(data)['apiCache'])
     full_data_key = next(key for key in cache if 'FullRenderQuery' in key)
-    home = cache[full_data_key]['property']
+    return cache[full_data_key]['property']
+
+
+def _home_details(title: str, home: dict, shareable_link: str) -> HousingDetail:
+    name = title.split('|')[0].strip()
 
     hoa = currency_to_int(home['resoFacts']['associationFee']) \
           or currency_to_int(home['resoFacts']['associationFee2'])
@@ -1,38 +1,64 @@
+from dataclasses import dataclass
+from dataclasses import replace
+from itertools import islice
+from itertools import product
 from typing import Dict
+from typing import Iterator
 from typing import List
+from typing import Sequence
 from typing import Tuple
 
+import numpy as np
+
+from homecomp import analytic
 from homecomp import const
+from homecomp import errors
+from homecomp import parallel
+from homecomp import profiling
 from homecomp.budget_items.assets import Investment
 from homecomp.budget_items.composite import HomeLifetime
 from homecomp.budget_items.liabilities import MaxMortgage
 from homecomp.budget_items.liabilities import MinMortgage
 from homecomp.budget_items.misc import Rent
+from homecomp.cache import ResultCache
+from homecomp.engine import BatchSimulation
+from homecomp.engine import HorizonSimulation
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import Simulation
+from homecomp.engine import simulate
+from homecomp.engine import simulate_batch
+from homecomp.engine import simulate_horizons
 from homecomp.models import BudgetItem
+from homecomp.models import ExpenseSeries
 from homecomp.models import HousingDetail
 from homecomp.models import MonthlyBudget
 from homecomp.models import MonthlyExpense
 from homecomp.models import PurchaserProfile
-
+from homecomp.outputs.common import asset_delta
+from homecomp.outputs.common import average_cost
+from homecomp.plan import StepPlan
 
 
 def compute(budget: MonthlyBudget,
             budget_items: Dict[str, BudgetItem],
-            periods: int):
-    """Run computation over the given periods of time"""
-    computation = compute_iter(budget, budget_items)
+            periods: int) -> ExpenseSeries:
+    """
+    Run computation over the given periods of time.
 
-    return [
-        next(computation)
-        for _ in range(periods)
-    ]
+    Each period's expenses are flattened as soon as they are computed so only the leaf
+    values are kept in memory.
+    """
+    try:
+        plan = StepPlan(budget, budget_items)
+    except errors.UnsupportedBudgetItem:
+        return ExpenseSeries.from_expenses(islice(_step_iter(budget, budget_items), periods))
 
+    return plan.run(periods)
 
-def compute_iter(budget: MonthlyBudget,
-                 budget_items: Dict[str, BudgetItem]):
-    """
-    Budget computation iterator where each item returned is a single period's budget.
-    """
+
+def _step_iter(budget: MonthlyBudget,
+               budget_items: Dict[str, BudgetItem]):
+    """Step each budget item directly (used for items without a compiled step plan)"""
     while True:
         m_expenses = []
         m_budget = budget.new()
@@ -44,17 +70,47 @@ def compute_iter(budget: MonthlyBudget,
         yield MonthlyExpense.join('total', m_expenses)
 
 
-def buy(purchaser: PurchaserProfile,
-        housing: HousingDetail,
-        years: int) -> Tuple[List[MonthlyExpense], List[BudgetItem]]:
-    """Compute monthly expenses and asset values over the given years"""
+def compute_iter(budget: MonthlyBudget,
+                 budget_items: Dict[str, BudgetItem]):
+    """
+    Budget computation iterator where each item returned is a single period's budget.
+    """
+    try:
+        plan = StepPlan(budget, budget_items)
+    except errors.UnsupportedBudgetItem:
+        yield from _step_iter(budget, budget_items)
+        return
+
+    while True:
+        yield plan.expense()
+
+
+@profiling.timed('compute.run')
+def run(budget: MonthlyBudget,
+        budget_items: List[BudgetItem],
+        periods: int,
+        engine: str = const.DEFAULT_ENGINE) -> ExpenseSeries:
+    """Run computation over the given periods of time using the selected engine"""
+    if engine == const.ENGINE_NUMPY:
+        return simulate(budget, budget_items, periods).expenses()
+
+    if engine != const.ENGINE_LOOP:
+        raise ValueError(f'{engine} is not an acceptable engine')
+
+    return compute(budget, budget_items, periods)
+
+
+def buy_items(purchaser: PurchaserProfile,
+              housing: HousingDetail,
+              years: int) -> List[BudgetItem]:
+    """Return budget items for buying housing and holding it for the given years"""
     periods = years * const.PERIODS_PER_YEAR
     mortgage_cls = {
         'min': MinMortgage,
         'max': MaxMortgage,
     }[purchaser.mortgage_type]
 
-    budget_items = [
+    return [
         HomeLifetime(
             name=f'{housing.name}',
             lifetime=list(range(periods)),
@@ -70,31 +126,212 @@ def buy(purchaser: PurchaserProfile,
         Investment(purchaser.cash),
     ]
 
-    expenses = compute(
-        MonthlyBudget(purchaser.budget),
-        budget_items,
-        periods=periods + 1
-    )
 
+def rent_items(purchaser: PurchaserProfile,
+               housing: HousingDetail,
+               years: int) -> List[BudgetItem]:  # pylint: disable=unused-argument
+    """Return budget items for renting housing"""
+    return [
+        Rent(housing.price),
+        Investment(purchaser.cash),
+    ]
+
+
+def stream(purchaser: PurchaserProfile,
+           housing: HousingDetail,
+           years: int) -> Tuple[Iterator[MonthlyExpense], List[BudgetItem]]:
+    """
+    Lazily compute monthly expenses of buying or renting housing over the given years.
+
+    Budget items are only stepped as expenses are read so results can be written out
+    period by period without keeping every period in memory.
+    """
+    items_func = buy_items if housing.type == const.HOUSING_TYPE_HOME else rent_items
+    budget_items = items_func(purchaser, housing, years)
+    periods = years * const.PERIODS_PER_YEAR + 1
+
+    computation = compute_iter(MonthlyBudget(purchaser.budget), budget_items)
+    return islice(computation, periods), budget_items
+
+
+def _run_housing(budget_items: List[BudgetItem],
+                 purchaser: PurchaserProfile,
+                 housing: HousingDetail,
+                 years: int,
+                 engine: str,
+                 cache: ResultCache = None) -> Tuple[ExpenseSeries, List[BudgetItem]]:
+    budget = MonthlyBudget(purchaser.budget)
+    periods = years * const.PERIODS_PER_YEAR + 1
+
+    if cache is None:
+        return run(budget, budget_items, periods, engine=engine), budget_items
+
+    key = cache.key('simulation', purchaser, housing, years)
+    arrays = cache.get(key)
+
+    if arrays is not None:
+        simulation = Simulation.from_arrays(arrays)
+        simulation.restore(budget_items)
+        return simulation.expenses(), budget_items
+
+    if engine == const.ENGINE_NUMPY:
+        simulation = simulate(budget, budget_items, periods)
+        expenses = simulation.expenses()
+    else:
+        expenses = run(budget, budget_items, periods, engine=engine)
+        simulation = Simulation.from_expenses(expenses, budget_items)
+
+    cache.put(key, simulation.to_arrays())
     return expenses, budget_items
 
 
+@profiling.timed('compute.buy')
+def buy(purchaser: PurchaserProfile,
+        housing: HousingDetail,
+        years: int,
+        engine: str = const.DEFAULT_ENGINE,
+        cache: ResultCache = None) -> Tuple[ExpenseSeries, List[BudgetItem]]:
+    """
+    Compute monthly expenses and asset values over the given years.
+
+    When a cache is provided results are reused from any previous identical run.
+    """
+    budget_items = buy_items(purchaser, housing, years)
+    return _run_housing(budget_items, purchaser, housing, years, engine, cache)
+
+
+@profiling.timed('compute.rent')
 def rent(purchaser: PurchaserProfile,
          housing: HousingDetail,
-         years: int) -> Tuple[List[MonthlyExpense], List[BudgetItem]]:
-    periods = years * const.PERIODS_PER_YEAR
+         years: int,
+         engine: str = const.DEFAULT_ENGINE,
+         cache: ResultCache = None) -> Tuple[ExpenseSeries, List[BudgetItem]]:
+    budget_items = rent_items(purchaser, housing, years)
+    return _run_housing(budget_items, purchaser, housing, years, engine, cache)
 
-    budget_items = [
-        Rent(housing.price),
-        Investment(purchaser.cash),
-    ]
 
+@profiling.timed('compute.summarize')
+def summarize(purchaser: PurchaserProfile,
+              housing: HousingDetail,
+              years: int,
+              engine: str = const.DEFAULT_ENGINE) -> Tuple[float, float]:
+    """
+    Return the average monthly cost and asset delta of buying/renting the given housing.
+
+    The array engine computes both values without materializing any expenses while the
+    analytic engine uses closed forms (falling back to simulation where there are none).
+    """
+    if engine == const.ENGINE_ANALYTIC:
+        return analytic.summarize(purchaser, housing, years)
+
+    items_method = buy_items if housing.type == const.HOUSING_TYPE_HOME else rent_items
+    budget_items = items_method(purchaser, housing, years)
     budget = MonthlyBudget(purchaser.budget)
+    periods = years * const.PERIODS_PER_YEAR + 1
 
-    expenses = compute(
-        budget,
-        budget_items,
-        periods=periods + 1
-    )
+    if engine == const.ENGINE_NUMPY:
+        simulation = simulate(budget, budget_items, periods)
+        return simulation.average_cost, simulation.asset_delta
 
-    return expenses, budget_items
+    expenses = run(budget, budget_items, periods, engine=engine)
+    return average_cost(expenses), asset_delta(budget_items)
+
+
+def simulate_many(purchasers: List[PurchaserProfile],
+                  housing: List[HousingDetail],
+                  years: int,
+                  series: bool = True) -> BatchSimulation:
+    """
+    Simulate every (purchaser, housing) pair together using the array engine.
+
+    Pairs are ordered the same as itertools.product(purchasers, housing) and index the
+    scenario axis of the returned simulation. Set series to False when only the average
+    cost and asset delta are needed.
+    """
+    pairs = list(product(purchasers, housing))
+
+    batch = simulate_batch(ScenarioArrays.from_pairs(pairs), years, series=series)
+    batch.pairs = pairs
+
+    return batch
+
+
+def simulate_multi_year(purchasers: List[PurchaserProfile],
+                        housing: List[HousingDetail],
+                        limit: int) -> HorizonSimulation:
+    """
+    Compute average cost and asset delta of every (purchaser, housing) pair for each
+    horizon from 1 to limit years using a single simulation per pair.
+    """
+    pairs = list(product(purchasers, housing))
+
+    horizons = simulate_horizons(ScenarioArrays.from_pairs(pairs), limit)
+    horizons.pairs = pairs
+
+    return horizons
+
+
+@dataclass
+class SweepCell:
+    years: int
+    appreciation: float
+    mortgage_apr: float
+    down_payment_pct: float
+    average_cost: float
+    asset_delta: float
+
+
+def _sweep_task(shared, start, stop):
+    horizons = simulate_horizons(shared['scenarios'].take(slice(start, stop)), shared['limit'])
+    return horizons.average_cost, horizons.asset_delta
+
+
+def sweep(purchaser: PurchaserProfile,
+          housing: HousingDetail,
+          years: Sequence[int],
+          appreciation: Sequence[float] = None,
+          mortgage_apr: Sequence[float] = None,
+          down_payment_pct: Sequence[float] = None,
+          jobs: int = 1) -> List[SweepCell]:
+    """
+    Compute average cost and asset delta over the cartesian grid of the given values.
+
+    Yearly appreciation, mortgage APR and down payment percentages default to the
+    purchaser/const values. Grid cells which only differ by values that do not apply to
+    the housing (e.g. mortgage APR for rentals) share one scenario and every horizon of a
+    scenario is derived from a single simulation. Scenarios are split across jobs processes.
+    """
+    appreciation = appreciation or [purchaser.home_appreciation]
+    mortgage_apr = mortgage_apr or [const.DEFAULT_MORTGAGE_APR]
+    down_payment_pct = down_payment_pct or [const.DEFAULT_DOWN_PAYMENT_PCT]
+    is_home = housing.type == const.HOUSING_TYPE_HOME
+
+    grid = list(product(appreciation, mortgage_apr, down_payment_pct))
+    keys = grid if is_home else [()] * len(grid)
+    scenario_index = {key: idx for idx, key in enumerate(dict.fromkeys(keys))}
+
+    scenarios = ScenarioArrays.from_pairs([(purchaser, housing)]).take(np.zeros(len(scenario_index), dtype=int))
+    if is_home:
+        terms = np.array(list(scenario_index), dtype=float).T
+        scenarios = replace(scenarios, appreciation=const.yearly_to_period_rate(terms[0])).with_mortgage(
+            rate=const.yearly_to_period_rate(terms[1]),
+            down_payment_pct=terms[2],
+        )
+
+    shared = {'scenarios': scenarios, 'limit': max(years)}
+    results = list(parallel.ordered_map(_sweep_task, parallel.split(len(scenarios), jobs), jobs=jobs, shared=shared))
+    average_cost = np.concatenate([average_cost for average_cost, _ in results]).tolist()
+    asset_delta = np.concatenate([asset_delta for _, asset_delta in results]).tolist()
+
+    return [
+        SweepCell(
+            years=time,
+            appreciation=cell[0],
+            mortgage_apr=cell[1],
+            down_payment_pct=cell[2],
+            average_cost=average_cost[scenario_index[key]][time - 1],
+            asset_delta=asset_delta[scenario_index[key]][time - 1],
+        )
+        for time in years
+        for cell, key in zip(grid, keys)
+    ]
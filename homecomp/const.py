@@ -30,6 +30,11 @@ DEFAULT_PROPERTY_TAX_PCT = 0.0075
 
 DEFAULT_RENT_INCREASE_PCT = 0.025
 
+# standard deviation of yearly rates used when sampling rate paths
+DEFAULT_HOME_APPRECIATION_VOLATILITY = 0.05
+DEFAULT_INVESTMENT_RETURN_VOLATILITY = 0.15
+DEFAULT_RENT_INCREASE_VOLATILITY = 0.015
+
 INIT_PERIOD = -1
 NEVER_PERIOD = -2
 
@@ -40,3 +45,18 @@ HOUSING_TYPES = [
     HOUSING_TYPE_HOME,
     HOUSING_TYPE_RENTAL
 ]
+
+
+ENGINE_LOOP = 'loop'
+ENGINE_NUMPY = 'numpy'
+ENGINES = [
+    ENGINE_LOOP,
+    ENGINE_NUMPY,
+]
+DEFAULT_ENGINE = ENGINE_LOOP
+
+# summary only engine which uses closed forms where possible
+ENGINE_ANALYTIC = 'analytic'
+SUMMARY_ENGINES = ENGINES + [
+    ENGINE_ANALYTIC,
+]
@@ -0,0 +1,823 @@
+"""
+Array based simulation engine.
+
+Instead of stepping every BudgetItem one period at a time (see compute.compute_iter) each
+item is evaluated across the entire horizon before moving on to the next item. This works
+because a BudgetItem only depends on its own prior state and on the budget remaining after
+the items which precede it within the same period.
+"""
+import json
+from dataclasses import dataclass
+from dataclasses import replace
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from homecomp import const
+from homecomp import errors
+from homecomp.budget_items.assets import Home
+from homecomp.budget_items.assets import Investment
+from homecomp.budget_items.composite import HomeLifetime
+from homecomp.budget_items.liabilities import MaxMortgage
+from homecomp.budget_items.liabilities import MinMortgage
+from homecomp.budget_items.liabilities import Mortgage
+from homecomp.budget_items.liabilities import calculate_min_payment
+from homecomp.budget_items.misc import HOA
+from homecomp.budget_items.misc import HomeInsurance
+from homecomp.budget_items.misc import Maintenance
+from homecomp.budget_items.misc import PropertyTax
+from homecomp.budget_items.misc import Rent
+from homecomp.models import BudgetItem
+from homecomp.models import BudgetLineItem
+from homecomp.models import ExpenseSeries
+from homecomp.models import HousingDetail
+from homecomp.models import MonthlyBudget
+from homecomp.models import MonthlyExpense
+from homecomp.models import NetworthMixin
+from homecomp.models import PeriodValues
+from homecomp.models import PurchaserProfile
+
+
+# bump whenever simulation results change so that cached results are recomputed
+VERSION = 1
+
+
+def _set_period(budget_items: List[BudgetItem], period: int):
+    for budget_item in budget_items:
+        budget_item.period = period
+        _set_period(getattr(budget_item, 'budget_items', []), period)
+
+
+@dataclass
+class Simulation:
+    """
+    Result of an array based simulation.
+
+    Expenses are stored as a periods x leaves matrix for both savings and costs while
+    the tree describes how leaf columns are grouped under composite budget items. Each
+    node in the tree is a (name, column) tuple for leaves or a (name, [nodes]) tuple for
+    composite items.
+    """
+    periods: np.ndarray
+    tree: Tuple
+    savings: np.ndarray
+    costs: np.ndarray
+    total_savings: np.ndarray
+    total_costs: np.ndarray
+    networth: Dict[str, np.ndarray]
+
+    @property
+    def average_cost(self) -> float:
+        """Average monthly cost of all expenses (see outputs.common.get_average_cost)"""
+        return -sum(self.total_costs.tolist()) / len(self.total_costs)
+
+    @property
+    def asset_delta(self) -> float:
+        """Change in networth over the simulation (see outputs.common.get_asset_delta)"""
+        final_value = sum(values[-1] for values in self.networth.values())
+        init_value = sum(values[0] for values in self.networth.values())
+        return float(final_value - init_value)
+
+    def expenses(self) -> ExpenseSeries:
+        """Return expenses of every period (MonthlyExpense trees are built on access)"""
+        return ExpenseSeries(
+            periods=self.periods,
+            tree=self.tree,
+            savings=self.savings,
+            costs=self.costs,
+            total_savings=self.total_savings,
+            total_costs=self.total_costs,
+        )
+
+    def restore(self, budget_items: List[BudgetItem]):
+        """Leave fresh budget items with the networth values of this simulation"""
+        final_period = int(self.periods[-1]) + 1
+
+        for budget_item in budget_items:
+            if isinstance(budget_item, NetworthMixin) and budget_item.name in self.networth:
+                budget_item.values = PeriodValues.from_array(self.networth[budget_item.name])
+
+        _set_period(budget_items, final_period)
+
+    @classmethod
+    def from_expenses(cls, expenses: Sequence[MonthlyExpense], budget_items: List[BudgetItem]) -> 'Simulation':
+        """Lay out results of compute.compute the same way as an array simulation"""
+        if not isinstance(expenses, ExpenseSeries):
+            expenses = ExpenseSeries.from_expenses(expenses)
+
+        periods = expenses.periods
+        stop = int(periods[-1]) + 2
+
+        return cls(
+            periods=periods,
+            tree=expenses.tree,
+            savings=expenses.savings,
+            costs=expenses.costs,
+            total_savings=expenses.total_savings,
+            total_costs=expenses.total_costs,
+            networth={
+                budget_item.name: budget_item.get_period_values(const.INIT_PERIOD, stop)
+                for budget_item in budget_items
+                if isinstance(budget_item, NetworthMixin)
+            },
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Return plain arrays which can be saved with np.savez"""
+        return {
+            'periods': self.periods,
+            'tree': np.array(json.dumps(self.tree)),
+            'savings': self.savings,
+            'costs': self.costs,
+            'total_savings': self.total_savings,
+            'total_costs': self.total_costs,
+            'networth_names': np.array(json.dumps(list(self.networth))),
+            'networth': np.array(list(self.networth.values())).reshape(len(self.networth), len(self.periods) + 1),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'Simulation':
+        return cls(
+            periods=arrays['periods'],
+            tree=json.loads(str(arrays['tree'])),
+            savings=arrays['savings'],
+            costs=arrays['costs'],
+            total_savings=arrays['total_savings'],
+            total_costs=arrays['total_costs'],
+            networth=dict(zip(json.loads(str(arrays['networth_names'])), arrays['networth'])),
+        )
+
+
+class _Evaluator:
+    """Evaluate a budget item graph one item at a time over every period"""
+
+    def __init__(self, periods: int):
+        self.periods = np.arange(const.INIT_PERIOD, const.INIT_PERIOD + periods)
+        self.zeros = np.zeros(periods)
+        self.leaves_savings = []
+        self.leaves_costs = []
+        self.homes = {}
+        self.stepped_homes = set()
+        self.values = []
+
+    def evaluate(self, item: BudgetItem, remaining: np.ndarray) -> Tuple:
+        """Return (node, savings, costs) of item given the budget remaining in each period"""
+        if item.period != const.INIT_PERIOD:
+            raise errors.UnsupportedBudgetItem(f'{item.name} has already been stepped')
+
+        try:
+            handler = self.handlers[type(item)]
+        except KeyError as error:
+            raise errors.UnsupportedBudgetItem(f'No array implementation for {type(item)}') from error
+
+        result = handler(self, item, remaining)
+        if isinstance(item, BudgetLineItem):
+            return result
+
+        savings, costs = result
+        self.leaves_savings.append(savings)
+        self.leaves_costs.append(costs)
+
+        return (item.name, len(self.leaves_savings) - 1), savings, costs
+
+    def _track(self, item: NetworthMixin, values: np.ndarray):
+        self.values.append((item, values))
+
+    def _owned(self, home: Home) -> np.ndarray:
+        if not home.lifetime:
+            return np.ones(len(self.periods), dtype=bool)
+
+        return np.isin(self.periods, home.lifetime)
+
+    def _yearly(self) -> np.ndarray:
+        return self.periods % 12 == 11
+
+    def _home_values(self, home: Home, dependent: bool = True) -> np.ndarray:
+        """Home value at the beginning of each period plus the final value"""
+        if id(home) not in self.homes:
+            # home values do not depend on the budget so they can be computed ahead of time
+            self.homes[id(home)] = self._compute_home_values(home)
+        elif dependent and id(home) in self.stepped_homes:
+            raise errors.UnsupportedBudgetItem(f'{home.name} must be stepped after items which depend on it')
+
+        return self.homes[id(home)]
+
+    def _composite(self, item: BudgetLineItem, remaining: np.ndarray) -> Tuple:
+        children = []
+        savings = costs = 0
+
+        for budget_item in item.budget_items:
+            node, item_savings, item_costs = self.evaluate(budget_item, remaining)
+            children.append(node)
+
+            savings = savings + item_savings
+            costs = costs + item_costs
+            remaining = remaining + (item_savings + item_costs)
+
+        if isinstance(item, HomeLifetime):
+            self._track(item, self._home_values(item.budget_items[-1], dependent=False))
+
+        return (item.name, children), self.zeros + savings, self.zeros + costs
+
+    def _compute_home_values(self, home: Home) -> np.ndarray:
+        value = home.value
+        values = [value]
+        growth = 1 + home.rate
+        buying_period = home.buying_period
+        selling_period = home.selling_period
+
+        for period in self.periods.tolist():
+            if period == buying_period:
+                value = home.price
+            elif period == selling_period:
+                value = 0
+            else:
+                value = round(value * growth, 2)
+
+            values.append(value)
+
+        return np.array(values, dtype=float)
+
+    def _home(self, home: Home, remaining: np.ndarray) -> Tuple:  # pylint: disable=unused-argument
+        values = self._home_values(home, dependent=False)
+        self.stepped_homes.add(id(home))
+        start_values = values[:-1]
+
+        buying = self.periods == home.buying_period
+        selling = self.periods == home.selling_period
+
+        savings = np.where(buying, -(home.price * home.down_payment_pct), self.zeros)
+        savings = np.where(selling, start_values, savings)
+
+        costs = np.where(buying, -(home.price * home.buying_costs_rate), self.zeros)
+        costs = np.where(selling, -(start_values * home.selling_costs_rate), costs)
+
+        self._track(home, values)
+        return savings, costs
+
+    def _hoa(self, item: HOA, remaining: np.ndarray) -> Tuple:  # pylint: disable=unused-argument
+        costs = np.where(self._owned(item.home), float(-item.hoa_fee), 0.0)
+        return self.zeros, costs
+
+    def _maintenance(self, item: Maintenance, remaining: np.ndarray) -> Tuple:  # pylint: disable=unused-argument
+        start_values = self._home_values(item.home)[:-1]
+        costs = np.where(self._owned(item.home), -(start_values * item.rate), 0.0)
+        return self.zeros, costs
+
+    def _yearly_home_rate(self, item, remaining: np.ndarray) -> Tuple:  # pylint: disable=unused-argument
+        start_values = self._home_values(item.home)[:-1]
+        costs = np.where(self._owned(item.home) & self._yearly(), -(start_values * item.rate), 0.0)
+        return self.zeros, costs
+
+    def _rent(self, item: Rent, remaining: np.ndarray) -> Tuple:  # pylint: disable=unused-argument
+        factors = np.where(self._yearly(), item.rate + 1, 1.0)
+        rents = np.multiply.accumulate(np.concatenate([[item.rent], factors]))
+
+        item.rent = float(rents[-1])
+        return self.zeros, -rents[1:]
+
+    def _investment(self, item: Investment, remaining: np.ndarray) -> Tuple:
+        value = item.value
+        values = [value]
+        growth = 1 + item.rate
+
+        for budget in remaining.tolist():
+            value = round(value * growth, 2)
+            value += budget
+            values.append(value)
+
+        self._track(item, np.array(values, dtype=float))
+        return -remaining, self.zeros
+
+    def _mortgage(self, item: Mortgage, remaining: np.ndarray) -> Tuple:
+        pay_max = isinstance(item, MaxMortgage)
+        start_period = item.start - 1
+        value = item.value
+
+        values = [value]
+        savings = []
+        costs = []
+
+        for period, budget in zip(self.periods.tolist(), remaining.tolist()):
+            item_savings = item_costs = 0
+
+            if period == start_period:
+                value = -item.principal
+            elif not pay_max and budget > abs(value):  # assume sell of house/end of mortgage
+                item_savings = value
+                value -= item_savings
+            elif value < 0:
+                interest = round(abs(value * item.rate), 2)
+                value -= interest
+
+                payment = max([budget, item.payment]) if pay_max else item.payment
+                payment = min([payment, -value])
+                value += payment
+
+                item_savings = -(payment - interest)
+                item_costs = -interest
+
+            values.append(value)
+            savings.append(item_savings)
+            costs.append(item_costs)
+
+        self._track(item, np.array(values, dtype=float))
+        return np.array(savings, dtype=float), np.array(costs, dtype=float)
+
+    handlers = {
+        BudgetLineItem: _composite,
+        HomeLifetime: _composite,
+        Home: _home,
+        HOA: _hoa,
+        Maintenance: _maintenance,
+        PropertyTax: _yearly_home_rate,
+        HomeInsurance: _yearly_home_rate,
+        Rent: _rent,
+        Investment: _investment,
+        Mortgage: _mortgage,
+        MinMortgage: _mortgage,
+        MaxMortgage: _mortgage,
+    }
+
+    def finalize(self, budget_items: List[BudgetItem]):
+        """Leave budget items in the same state as after stepping through every period"""
+        final_period = int(self.periods[-1]) + 1
+
+        for item, values in self.values:
+            item.values = PeriodValues.from_array(values)
+
+        _set_period(budget_items, final_period)
+
+
+def simulate(budget: MonthlyBudget,
+             budget_items: List[BudgetItem],
+             periods: int) -> Simulation:
+    """
+    Run array based computation over the given periods of time.
+
+    Produces the same results as compute.compute and leaves the budget items in the same
+    final state.
+    """
+    evaluator = _Evaluator(periods)
+    root = BudgetLineItem(name='total', budget_items=budget_items)
+
+    remaining = np.full(periods, budget.budget, dtype=float)
+    tree, total_savings, total_costs = evaluator.evaluate(root, remaining)
+
+    networth = {}
+    tracked = {id(item): values for item, values in evaluator.values}
+    for budget_item in budget_items:
+        if isinstance(budget_item, NetworthMixin):
+            networth[budget_item.name] = tracked[id(budget_item)]
+
+    evaluator.finalize(budget_items)
+
+    return Simulation(
+        periods=evaluator.periods,
+        tree=tree,
+        savings=np.column_stack(evaluator.leaves_savings),
+        costs=np.column_stack(evaluator.leaves_costs),
+        total_savings=total_savings,
+        total_costs=total_costs,
+        networth=networth,
+    )
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized round(value, 2).
+
+    np.round breaks ties on the scaled binary value while round breaks them on the exact
+    decimal value, so anything close to a half cent is rounded the same way as round.
+    """
+    scaled = values * 100
+    result = np.rint(scaled) / 100
+
+    ties = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-4
+    if ties.any():
+        result[ties] = [round(value, 2) for value in values[ties].tolist()]
+
+    return result
+
+
+@dataclass
+class ScenarioArrays:
+    """
+    Struct of arrays describing a batch of buy/rent scenarios.
+
+    Each field holds one value per scenario. Rates use the same units as the matching
+    budget item arguments (e.g. appreciation is a per period rate). The appreciation,
+    rent_increase_rate and investment_rate fields may also be scenarios x periods arrays
+    holding the rate used in each period of the simulation.
+    """
+    budget: np.ndarray
+    cash: np.ndarray
+    is_home: np.ndarray
+    price: np.ndarray
+    hoa: np.ndarray
+    property_tax_rate: np.ndarray
+    appreciation: np.ndarray
+    max_mortgage: np.ndarray
+    mortgage_rate: np.ndarray
+    mortgage_years: np.ndarray
+    principal: np.ndarray
+    payment: np.ndarray
+    down_payment_pct: np.ndarray
+    buying_costs_rate: np.ndarray
+    selling_costs_rate: np.ndarray
+    maintenance_rate: np.ndarray
+    home_insurance_rate: np.ndarray
+    rent_increase_rate: np.ndarray
+    investment_rate: np.ndarray
+
+    def __len__(self):
+        return len(self.budget)
+
+    def take(self, index) -> 'ScenarioArrays':
+        """Return subset of scenarios selected by a slice, mask or index array"""
+        return ScenarioArrays(**{
+            name: values[index]
+            for name, values in vars(self).items()
+        })
+
+    @classmethod
+    def from_pairs(cls, pairs: List[Tuple[PurchaserProfile, HousingDetail]]) -> 'ScenarioArrays':
+        """Lay out (purchaser, housing) pairs using the same defaults as compute.buy/rent"""
+        size = len(pairs)
+
+        def _full(value):
+            return np.full(size, value, dtype=float)
+
+        scenarios = cls(
+            budget=np.array([purchaser.budget for purchaser, _ in pairs], dtype=float),
+            cash=np.array([purchaser.cash for purchaser, _ in pairs], dtype=float),
+            is_home=np.array([housing.type == const.HOUSING_TYPE_HOME for _, housing in pairs], dtype=bool),
+            price=np.array([housing.price for _, housing in pairs], dtype=float),
+            hoa=np.array([housing.hoa for _, housing in pairs], dtype=float),
+            property_tax_rate=np.array([housing.property_tax_rate for _, housing in pairs], dtype=float),
+            appreciation=np.array([
+                const.yearly_to_period_rate(purchaser.home_appreciation)
+                for purchaser, _ in pairs
+            ], dtype=float),
+            max_mortgage=np.array([purchaser.mortgage_type == 'max' for purchaser, _ in pairs], dtype=bool),
+            mortgage_rate=_full(const.DEFAULT_MORTGAGE_RATE),
+            mortgage_years=np.full(size, const.DEFAULT_MORTGAGE_YEARS, dtype=int),
+            principal=_full(0),
+            payment=_full(0),
+            down_payment_pct=_full(const.DEFAULT_DOWN_PAYMENT_PCT),
+            buying_costs_rate=_full(const.DEFAULT_HOME_BUYING_COSTS_PCT),
+            selling_costs_rate=_full(const.DEFAULT_HOME_SELLING_COSTS_PCT),
+            maintenance_rate=_full(const.DEFAULT_HOME_MAINTENANCE_RATE),
+            home_insurance_rate=_full(const.DEFAULT_HOME_INURANCE_PCT),
+            rent_increase_rate=_full(const.DEFAULT_RENT_INCREASE_PCT),
+            investment_rate=_full(const.DEFAULT_INVESTMENT_RETURN_RATE),
+        )
+
+        return scenarios.with_mortgage()
+
+    def with_mortgage(self,
+                      rate: np.ndarray = None,
+                      down_payment_pct: np.ndarray = None,
+                      mortgage_years: np.ndarray = None) -> 'ScenarioArrays':
+        """Return copy with the given mortgage terms replaced and the loan recomputed"""
+        def _terms(values, current, dtype):
+            if values is None:
+                return current
+            return np.array(np.broadcast_to(values, current.shape), dtype=dtype)
+
+        rate = _terms(rate, self.mortgage_rate, float)
+        down_payment_pct = _terms(down_payment_pct, self.down_payment_pct, float)
+        mortgage_years = _terms(mortgage_years, self.mortgage_years, int)
+        principal = np.where(self.is_home, self.price * (1 - down_payment_pct), 0.0)
+
+        return replace(
+            self,
+            mortgage_rate=rate,
+            down_payment_pct=down_payment_pct,
+            mortgage_years=mortgage_years,
+            principal=principal,
+            payment=min_payments(principal, rate, mortgage_years),
+        )
+
+
+def min_payments(principal: np.ndarray, rate: np.ndarray, mortgage_years: np.ndarray) -> np.ndarray:
+    """Vector of calculate_min_payment results (computed once per unique loan)"""
+    length = mortgage_years * const.PERIODS_PER_YEAR
+    payments = {}
+
+    for loan in zip(principal.tolist(), rate.tolist(), length.tolist()):
+        if loan not in payments:
+            payments[loan] = calculate_min_payment(*loan) if loan[0] else 0.0
+
+    return np.array([
+        payments[loan]
+        for loan in zip(principal.tolist(), rate.tolist(), length.tolist())
+    ], dtype=float)
+
+
+@dataclass
+class BatchSimulation:
+    """
+    Result of simulating many scenarios together.
+
+    Series are indexed [scenario, period]. Savings and costs hold the total expense of
+    each period while networth holds the combined value of all assets and liabilities at
+    the beginning of each period plus the final value. Series are None when a batch is
+    run for summary metrics only.
+    """
+    periods: np.ndarray
+    average_cost: np.ndarray
+    asset_delta: np.ndarray
+    savings: np.ndarray = None
+    costs: np.ndarray = None
+    networth: np.ndarray = None
+    pairs: List[Tuple[PurchaserProfile, HousingDetail]] = None
+
+
+@dataclass
+class HorizonSimulation:
+    """
+    Summary metrics of a batch simulated for every horizon from 1 to limit years (or
+    months, see simulate_month_horizons).
+
+    Metrics are indexed [scenario, years - 1].
+    """
+    average_cost: np.ndarray
+    asset_delta: np.ndarray
+    pairs: List[Tuple[PurchaserProfile, HousingDetail]] = None
+
+
+BATCH_CHUNK_SIZE = 4096
+
+
+class BatchKernel:
+    """Period step shared by every scenario in a batch"""
+
+    def __init__(self, scenarios: ScenarioArrays):
+        self.scenarios = scenarios
+        self.is_home = scenarios.is_home
+        self.is_rental = ~scenarios.is_home
+        self.pay_min = scenarios.is_home & ~scenarios.max_mortgage
+        self.zeros = np.zeros(len(scenarios))
+
+    @staticmethod
+    def _at(values: np.ndarray, period: int) -> np.ndarray:
+        """Per scenario value used in the given period"""
+        if values.ndim == 1:
+            return values
+
+        return values[:, period - const.INIT_PERIOD]
+
+    def initial_state(self) -> Dict[str, np.ndarray]:
+        return {
+            'home': self.zeros,
+            'mortgage': self.zeros,
+            'rent': np.where(self.is_rental, self.scenarios.price, 0.0),
+            'investment': self.scenarios.cash.copy(),
+        }
+
+    @staticmethod
+    def networth(state: Dict[str, np.ndarray]) -> np.ndarray:
+        return state['home'] + state['mortgage'] + state['investment']
+
+    def step(self, state: Dict[str, np.ndarray], period: int, selling_period: int) -> Tuple:
+        """Return the state after the period along with the period's total savings and costs"""
+        # pylint: disable=too-many-locals
+        scenarios = self.scenarios
+        is_home = self.is_home
+        home = state['home']
+        mortgage = state['mortgage']
+        rent = state['rent']
+        remaining = scenarios.budget
+
+        if period == const.INIT_PERIOD:
+            # home is bought the period before it is owned and the mortgage starts
+            home_savings = np.where(is_home, -(scenarios.price * scenarios.down_payment_pct), 0.0)
+            home_costs = np.where(is_home, -(scenarios.price * scenarios.buying_costs_rate), 0.0)
+            home = np.where(is_home, scenarios.price, 0.0)
+        else:
+            home_costs = -scenarios.hoa + -(home * scenarios.maintenance_rate)
+            if period % 12 == 11:
+                home_costs = home_costs + -(home * scenarios.property_tax_rate)
+                home_costs = home_costs + -(home * scenarios.home_insurance_rate)
+
+            if period == selling_period:
+                home_savings = home
+                home_costs = home_costs + -(home * scenarios.selling_costs_rate)
+                home = self.zeros
+            else:
+                home_savings = self.zeros
+                home = round_cents(home * (1 + self._at(scenarios.appreciation, period)))
+
+            home_savings = np.where(is_home, home_savings, 0.0)
+            home_costs = np.where(is_home, home_costs, 0.0)
+
+        remaining = remaining + (home_savings + home_costs)
+
+        if period == const.INIT_PERIOD:
+            mortgage_savings = mortgage_costs = self.zeros
+            mortgage = np.where(is_home, -scenarios.principal, 0.0)
+        else:
+            payoff = self.pay_min & (remaining > np.abs(mortgage))
+            active = is_home & ~payoff & (mortgage < 0)
+
+            interest = round_cents(np.abs(mortgage * scenarios.mortgage_rate))
+            balance = mortgage - interest
+            payment = np.where(scenarios.max_mortgage, np.maximum(remaining, scenarios.payment), scenarios.payment)
+            payment = np.minimum(payment, -balance)
+
+            mortgage_savings = np.where(payoff, mortgage, np.where(active, -(payment - interest), 0.0))
+            mortgage_costs = np.where(active, -interest, 0.0)
+            mortgage = np.where(payoff, mortgage - mortgage, np.where(active, balance + payment, mortgage))
+
+        remaining = remaining + (mortgage_savings + mortgage_costs)
+
+        if period % 12 == 11:
+            rent = rent * (self._at(scenarios.rent_increase_rate, period) + 1)
+        rent_costs = np.where(self.is_rental, -rent, 0.0)
+        remaining = remaining + rent_costs
+
+        state = {
+            'home': home,
+            'mortgage': mortgage,
+            'rent': rent,
+            'investment': round_cents(
+                state['investment'] * (1 + self._at(scenarios.investment_rate, period))
+            ) + remaining,
+        }
+
+        savings = home_savings + mortgage_savings + -remaining
+        costs = home_costs + mortgage_costs + rent_costs
+        return state, savings, costs
+
+
+def _simulate_chunk(scenarios: ScenarioArrays, months: int, series: bool) -> Dict[str, np.ndarray]:
+    """Advance every scenario of the chunk together one period at a time"""
+    kernel = BatchKernel(scenarios)
+    selling_period = months - 1
+    periods = selling_period + 2
+
+    state = kernel.initial_state()
+    result = {'cost_sum': kernel.zeros, 'init_networth': kernel.networth(state)}
+    if series:
+        result['savings'] = np.empty((len(scenarios), periods))
+        result['costs'] = np.empty((len(scenarios), periods))
+        result['networth'] = np.empty((len(scenarios), periods + 1))
+        result['networth'][:, 0] = result['init_networth']
+
+    for idx, period in enumerate(range(const.INIT_PERIOD, selling_period + 1)):
+        state, savings, costs = kernel.step(state, period, selling_period)
+        result['cost_sum'] = result['cost_sum'] + costs
+
+        if series:
+            result['savings'][:, idx] = savings
+            result['costs'][:, idx] = costs
+            result['networth'][:, idx + 1] = kernel.networth(state)
+
+    result['final_networth'] = kernel.networth(state)
+    return result
+
+
+def _simulate_horizons_chunk(scenarios: ScenarioArrays,
+                             limit: int,
+                             horizon_months: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance the chunk once up to limit horizons of horizon_months each, deriving every
+    shorter horizon on the way.
+
+    A horizon only differs from longer horizons in its final period where the home is
+    sold (and the mortgage paid off), so each horizon is a single selling step taken
+    from the shared state at the start of its final period.
+    """
+    kernel = BatchKernel(scenarios)
+    average_cost = np.empty((len(scenarios), limit))
+    asset_delta = np.empty((len(scenarios), limit))
+
+    state = kernel.initial_state()
+    init_networth = kernel.networth(state)
+    cost_sum = kernel.zeros
+
+    for horizon in range(1, limit + 1):
+        selling_period = horizon * horizon_months - 1
+        first_period = const.INIT_PERIOD if horizon == 1 else selling_period - horizon_months + 1
+
+        for period in range(first_period, selling_period):
+            state, _, costs = kernel.step(state, period, const.NEVER_PERIOD)
+            cost_sum = cost_sum + costs
+
+        final_state, _, costs = kernel.step(state, selling_period, selling_period)
+        average_cost[:, horizon - 1] = -(cost_sum + costs) / (selling_period + 2)
+        asset_delta[:, horizon - 1] = kernel.networth(final_state) - init_networth
+
+        if horizon < limit:
+            state, _, costs = kernel.step(state, selling_period, const.NEVER_PERIOD)
+            cost_sum = cost_sum + costs
+
+    return average_cost, asset_delta
+
+
+def simulate_batch(scenarios: ScenarioArrays,
+                   years: int,
+                   series: bool = True,
+                   chunk_size: int = BATCH_CHUNK_SIZE) -> BatchSimulation:
+    """
+    Simulate buying/renting for every scenario in the batch over the given years.
+
+    Produces the same totals as running compute.buy/rent separately for each scenario.
+    Scenarios are processed in chunks to bound the size of intermediate arrays.
+    """
+    return simulate_months(scenarios, years * const.PERIODS_PER_YEAR, series=series, chunk_size=chunk_size)
+
+
+def simulate_months(scenarios: ScenarioArrays,
+                    months: int,
+                    series: bool = True,
+                    chunk_size: int = BATCH_CHUNK_SIZE) -> BatchSimulation:
+    """
+    Simulate buying/renting for every scenario in the batch over the given months.
+
+    Homes are owned for exactly the given number of months before being sold.
+    """
+    if months < 1:
+        raise ValueError('Batch simulations require at least one month')
+
+    periods = months + 1
+    size = len(scenarios)
+
+    batch = BatchSimulation(
+        periods=np.arange(const.INIT_PERIOD, const.INIT_PERIOD + periods),
+        average_cost=np.empty(size),
+        asset_delta=np.empty(size),
+    )
+    if series:
+        batch.savings = np.empty((size, periods))
+        batch.costs = np.empty((size, periods))
+        batch.networth = np.empty((size, periods + 1))
+
+    for start in range(0, size, chunk_size):
+        index = slice(start, start + chunk_size)
+        result = _simulate_chunk(scenarios.take(index), months, series)
+
+        batch.average_cost[index] = -result['cost_sum'] / periods
+        batch.asset_delta[index] = result['final_networth'] - result['init_networth']
+
+        if series:
+            batch.savings[index] = result['savings']
+            batch.costs[index] = result['costs']
+            batch.networth[index] = result['networth']
+
+    return batch
+
+
+def _simulate_horizons(scenarios: ScenarioArrays,
+                       limit: int,
+                       horizon_months: int,
+                       chunk_size: int) -> HorizonSimulation:
+    size = len(scenarios)
+    horizons = HorizonSimulation(
+        average_cost=np.empty((size, limit)),
+        asset_delta=np.empty((size, limit)),
+    )
+
+    for start in range(0, size, chunk_size):
+        index = slice(start, start + chunk_size)
+        horizons.average_cost[index], horizons.asset_delta[index] = _simulate_horizons_chunk(
+            scenarios.take(index),
+            limit,
+            horizon_months
+        )
+
+    return horizons
+
+
+def simulate_horizons(scenarios: ScenarioArrays,
+                      limit: int,
+                      chunk_size: int = BATCH_CHUNK_SIZE) -> HorizonSimulation:
+    """
+    Simulate every scenario for each horizon from 1 to limit years.
+
+    Produces the same metrics as separate simulate_batch calls for every horizon for
+    roughly the cost of the longest one.
+    """
+    if limit < 1:
+        raise ValueError('Batch simulations require at least one year')
+
+    return _simulate_horizons(scenarios, limit, const.PERIODS_PER_YEAR, chunk_size)
+
+
+def simulate_month_horizons(scenarios: ScenarioArrays,
+                            months: int,
+                            chunk_size: int = BATCH_CHUNK_SIZE) -> HorizonSimulation:
+    """
+    Simulate every scenario for each horizon from 1 to the given months.
+
+    Produces the same metrics as separate simulate_months calls for every horizon, with
+    metrics indexed [scenario, months - 1], for roughly twice the cost of the longest one.
+    """
+    if months < 1:
+        raise ValueError('Batch simulations require at least one month')
+
+    return _simulate_horizons(scenarios, months, 1, chunk_size)
@@ -24,3 +24,11 @@ class NoEntryFound(StorageError):
 
 class EntryExists(StorageError):
     """Raised if entry already exists when adding a new entry to storage"""
+
+
+class ComputeError(Exception):
+    """Generic computation exception"""
+
+
+class UnsupportedBudgetItem(ComputeError):
+    """Raised when a budget item has no implementation in the selected engine"""
@@ -0,0 +1,121 @@
+"""
+In-memory index of storage entry ids for substring, prefix and exact lookups.
+
+Ids are indexed by every substring of GRAM_SIZE characters (trigrams) so a substring
+lookup only verifies the ids containing all trigrams of the query, and kept sorted so a
+prefix lookup is a binary search. The index is built on the first substring or prefix
+lookup of a table and kept up to date on every save and delete from then on.
+"""
+import bisect
+import operator
+from collections import defaultdict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+
+
+GRAM_SIZE = 3
+
+SUBSTRING = operator.contains
+PREFIX = str.startswith
+
+
+def _grams(value: str) -> Set[str]:
+    return {value[idx:idx + GRAM_SIZE] for idx in range(len(value) - GRAM_SIZE + 1)}
+
+
+class SubstringIndex:
+
+    def __init__(self):
+        self.built = False
+        self.order = {}  # id -> insertion sequence
+        self.grams = defaultdict(set)  # trigram -> ids containing it
+        self.sorted_ids = []
+        self._sequence = 0
+
+    def build(self, ids: Iterable[str]):
+        """Index ids in their insertion order"""
+        self.order = {}
+        self.grams = defaultdict(set)
+
+        for sequence, entry_id in enumerate(ids):
+            self.order[entry_id] = sequence
+            for gram in _grams(entry_id):
+                self.grams[gram].add(entry_id)
+
+        self.sorted_ids = sorted(self.order)
+        self._sequence = len(self.order)
+        self.built = True
+
+    def add(self, entry_id: str):
+        """Index a newly saved id (no-op until the index is built)"""
+        if not self.built or entry_id in self.order:
+            return
+
+        self.order[entry_id] = self._sequence
+        self._sequence += 1
+
+        for gram in _grams(entry_id):
+            self.grams[gram].add(entry_id)
+        bisect.insort(self.sorted_ids, entry_id)
+
+    def remove(self, entry_id: str):
+        """Remove a deleted id (no-op until the index is built)"""
+        if not self.built or self.order.pop(entry_id, None) is None:
+            return
+
+        for gram in _grams(entry_id):
+            ids = self.grams[gram]
+            ids.discard(entry_id)
+            if not ids:
+                del self.grams[gram]
+        del self.sorted_ids[bisect.bisect_left(self.sorted_ids, entry_id)]
+
+    def search(self, ids: Iterable[str], query: str, match: callable) -> Optional[List[str]]:
+        """
+        Return ids matching query, an exact match first and the rest in insertion order.
+
+        Returns None if the lookup should scan instead, either because match is not a
+        substring or prefix match or the query is shorter than a trigram. ids is only
+        iterated when the index is built.
+        """
+        if match is SUBSTRING:
+            if len(query) < GRAM_SIZE:
+                return None
+        elif match is not PREFIX:
+            return None
+
+        if not self.built:
+            self.build(ids)
+
+        if match is SUBSTRING:
+            matches = self._substring(query)
+        else:
+            matches = self._prefix(query)
+
+        return sorted(matches, key=lambda entry_id: (entry_id != query, self.order[entry_id]))
+
+    def _substring(self, query: str) -> List[str]:
+        candidates = None
+
+        # intersect the smallest sets first
+        for gram in sorted(_grams(query), key=lambda gram: len(self.grams.get(gram, ()))):
+            ids = self.grams.get(gram)
+            if not ids:
+                return []
+
+            candidates = set(ids) if candidates is None else candidates & ids
+
+        # trigrams can appear in an id without the whole query being contained in it
+        return [entry_id for entry_id in candidates if query in entry_id]
+
+    def _prefix(self, query: str) -> List[str]:
+        matches = []
+
+        for idx in range(bisect.bisect_left(self.sorted_ids, query), len(self.sorted_ids)):
+            if not self.sorted_ids[idx].startswith(query):
+                break
+            matches.append(self.sorted_ids[idx])
+
+        return matches
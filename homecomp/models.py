@@ -2,9 +2,15 @@
 from abc import abstractmethod
 from abc import ABC
 from abc import ABCMeta
+from array import array
+from collections.abc import Sequence
 from dataclasses import dataclass
 from dataclasses import field
+from typing import Iterable
 from typing import List
+from typing import Tuple
+
+import numpy as np
 
 from homecomp import const
 
@@ -52,15 +58,25 @@ class MonthlyExpense:
     @classmethod
     def join(cls, name: str, expenses: List):
         """Join mulitiple expenses under a single name"""
-        periods = set(expense.period for expense in expenses)
-        if len(periods) != 1:
+        if not expenses:
             raise ValueError('Cannot join expenses from different periods')
 
+        period = expenses[0].period
+        savings = 0
+        costs = 0
+
+        for expense in expenses:
+            if expense.period != period:
+                raise ValueError('Cannot join expenses from different periods')
+
+            savings += expense.savings
+            costs += expense.costs
+
         return MonthlyExpense(
-            period=list(periods)[0],
+            period=period,
             name=name,
-            savings=sum(expense.savings for expense in expenses),
-            costs=sum(expense.costs for expense in expenses),
+            savings=savings,
+            costs=costs,
             components=expenses
         )
 
@@ -69,6 +85,143 @@ class MonthlyExpense:
         return self.savings + self.costs
 
 
+def _expense_node(expense: MonthlyExpense, leaves: List[MonthlyExpense]) -> Tuple:
+    if not expense.components:
+        leaves.append(expense)
+        return expense.name, len(leaves) - 1
+
+    return expense.name, [_expense_node(component, leaves) for component in expense.components]
+
+
+class ExpenseSeries(Sequence):
+    """
+    Compact MonthlyExpense history over many periods.
+
+    Leaf expenses are stored as a periods x leaves matrix for both savings and costs while
+    the tree describes how leaf columns are grouped under composite budget items. Each
+    node in the tree is a (name, column) tuple for leaves or a (name, [nodes]) tuple for
+    composite items. MonthlyExpense trees are only built when a period is accessed.
+    """
+
+    def __init__(self,
+                 periods: np.ndarray,
+                 tree: Tuple,
+                 savings: np.ndarray,
+                 costs: np.ndarray,
+                 total_savings: np.ndarray = None,
+                 total_costs: np.ndarray = None):
+        self.periods = np.asarray(periods)
+        self.tree = tree
+        self.savings = np.asarray(savings, dtype=float)
+        self.costs = np.asarray(costs, dtype=float)
+
+        if tree is None:
+            total_savings = total_costs = np.zeros(len(self.periods))
+        elif total_savings is None or total_costs is None:
+            total_savings, total_costs, _ = self._node_columns(tree, '')
+
+        self.total_savings = np.asarray(total_savings, dtype=float)
+        self.total_costs = np.asarray(total_costs, dtype=float)
+
+    @classmethod
+    def from_expenses(cls, expenses: Iterable[MonthlyExpense]) -> 'ExpenseSeries':
+        """Flatten MonthlyExpense trees which all share the same structure"""
+        tree = None
+        periods = []
+        savings = []
+        costs = []
+
+        for expense in expenses:
+            leaves = []
+            node = _expense_node(expense, leaves)
+
+            if tree is None:
+                tree = node
+            elif len(leaves) != len(savings[0]):
+                raise ValueError('All expenses are not available across all periods')
+
+            periods.append(expense.period)
+            savings.append([leaf.savings for leaf in leaves])
+            costs.append([leaf.costs for leaf in leaves])
+
+        return cls(
+            periods=np.array(periods, dtype=int),
+            tree=tree,
+            savings=np.array(savings, dtype=float).reshape(len(periods), -1),
+            costs=np.array(costs, dtype=float).reshape(len(periods), -1),
+        )
+
+    def __len__(self):
+        return len(self.periods)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(
+                periods=self.periods[index],
+                tree=self.tree,
+                savings=self.savings[index],
+                costs=self.costs[index],
+                total_savings=self.total_savings[index],
+                total_costs=self.total_costs[index],
+            )
+
+        return self.build_expense(
+            self.tree,
+            int(self.periods[index]),
+            self.savings[index].tolist(),
+            self.costs[index].tolist()
+        )
+
+    @classmethod
+    def build_expense(cls, node: Tuple, period: int, savings: List, costs: List) -> MonthlyExpense:
+        """Build the MonthlyExpense tree of node from a single period of leaf values"""
+        name, children = node
+
+        if isinstance(children, int):
+            return MonthlyExpense(
+                period=period,
+                name=name,
+                savings=savings[children],
+                costs=costs[children]
+            )
+
+        return MonthlyExpense.join(name, [
+            cls.build_expense(child, period, savings, costs)
+            for child in children
+        ])
+
+    def _node_columns(self, node: Tuple, column: str) -> Tuple:
+        """Return savings, costs and (header, total) columns of node in the order of its expense row"""
+        _, children = node
+
+        if isinstance(children, int):
+            savings = self.savings[:, children]
+            costs = self.costs[:, children]
+            return savings, costs, [(column, savings + costs)]
+
+        # accumulate in the same order as MonthlyExpense.join so totals match exactly
+        prefix = f'{column}.' if column else ''
+        savings = np.zeros(len(self.periods))
+        costs = np.zeros(len(self.periods))
+        columns = []
+
+        for child in children:
+            child_savings, child_costs, child_columns = self._node_columns(child, f'{prefix}{child[0]}')
+            savings = savings + child_savings
+            costs = costs + child_costs
+            columns += child_columns
+
+        columns.append((f'{prefix}Total', savings + costs))
+        return savings, costs, columns
+
+    def columns(self) -> List[Tuple[str, np.ndarray]]:
+        """Return total of every expense column keyed by its composite header (e.x. Home.HOA)"""
+        if self.tree is None:
+            return []
+
+        return self._node_columns(self.tree, '')[2]
+
+
 @dataclass
 class MonthlyBudget:
     """Fixed budget which MonthlyExpenses can be deducted from"""
@@ -132,6 +285,89 @@ class BudgetLineItem(BudgetItem):
         return MonthlyExpense.join(self.name, expenses)
 
 
+class PeriodValues:
+    """
+    Values keyed by period backed by a growable array.
+
+    Values are stored at index period - const.INIT_PERIOD with a mask of which periods
+    were actually written so that lookups of any period are O(1).
+    """
+
+    def __init__(self, value=0):
+        self._values = array('d', [value])
+        self._written = bytearray(b'\x01')
+        self._last = 0  # index of the latest written period
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> 'PeriodValues':
+        """Create values for consecutive periods starting from const.INIT_PERIOD"""
+        period_values = cls()
+        period_values._values = array('d', np.asarray(values, dtype=float).tobytes())
+        period_values._written = bytearray(b'\x01') * len(period_values._values)
+        period_values._last = len(period_values._values) - 1
+        return period_values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, period) -> bool:
+        index = period - const.INIT_PERIOD
+        return 0 <= index < len(self._written) and bool(self._written[index])
+
+    def __getitem__(self, period) -> float:
+        if period not in self:
+            raise KeyError(period)
+        return self._values[period - const.INIT_PERIOD]
+
+    def __setitem__(self, period, value):
+        index = period - const.INIT_PERIOD
+        size = len(self._values)
+
+        if index == size:  # common case of writing the next period
+            self._values.append(value)
+            self._written.append(1)
+            self._last = index
+            return
+
+        if index < 0:
+            raise KeyError(period)
+
+        if index > size:
+            self._values.extend([0.0] * (index - size + 1))
+            self._written.extend(bytes(index - size + 1))
+
+        self._values[index] = value
+        self._written[index] = 1
+        self._last = max(self._last, index)
+
+    def get(self, period, default=None) -> float:
+        index = period - const.INIT_PERIOD
+        if 0 <= index < len(self._written) and self._written[index]:
+            return self._values[index]
+        return default
+
+    def latest(self, period) -> float:
+        """Return value of the most recently written period up to and including period"""
+        index = min(period - const.INIT_PERIOD, self._last)
+        while not self._written[index]:
+            index -= 1
+        return self._values[index]
+
+    def to_array(self, start: int, stop: int, default: float) -> np.ndarray:
+        """Return values for range(start, stop) with default for every unwritten period"""
+        result = np.full(stop - start, default, dtype=float)
+
+        begin = max(start - const.INIT_PERIOD, 0)
+        end = min(stop - const.INIT_PERIOD, len(self._values))
+        if end > begin:
+            offset = begin - (start - const.INIT_PERIOD)
+            values = np.frombuffer(self._values, dtype=float)[begin:end]
+            written = np.frombuffer(self._written, dtype=np.uint8)[begin:end].astype(bool)
+            result[offset:offset + end - begin] = np.where(written, values, default)
+
+        return result
+
+
 class NetworthMixin(metaclass=ABCMeta):
     """Tracks underlying value over time"""
 
@@ -140,7 +376,7 @@ class NetworthMixin(metaclass=ABCMeta):
 
         # track underlying value of asset for each period where each key represents the value
         # of the object at the beginning of that period
-        self.values = {const.INIT_PERIOD: value}
+        self.values = PeriodValues(value)
 
     @property
     def value(self):
@@ -151,11 +387,7 @@ class NetworthMixin(metaclass=ABCMeta):
         a value is written then the next read from self.value will return the
         value from the next period (not the current period)
         """
-        return next(
-            self.values[i]
-            for i in reversed(range(const.INIT_PERIOD, self.period + 2))
-            if i in self.values
-        )
+        return self.values.latest(self.period + 1)
 
     @value.setter
     def value(self, value):
@@ -164,7 +396,12 @@ class NetworthMixin(metaclass=ABCMeta):
 
     def get_period_value(self, period):
         """Return value from a specific period"""
-        return self.values.get(period, self.value)
+        value = self.values.get(period)
+        return self.value if value is None else value
+
+    def get_period_values(self, start: int, stop: int) -> np.ndarray:
+        """Return values for range(start, stop) the same as get_period_value for each period"""
+        return self.values.to_array(start, stop, self.value)
 
 
 class AssetMixin(NetworthMixin, metaclass=ABCMeta):
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from dataclasses import replace
+from typing import Dict
+from typing import Sequence
+
+import numpy as np
+
+from homecomp import const
+from homecomp.engine import BATCH_CHUNK_SIZE
+from homecomp.engine import BatchKernel
+from homecomp.engine import ScenarioArrays
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+@dataclass
+class RateModel:
+    """
+    Yearly rates drawn independently from a normal distribution for each year of a path.
+
+    Home appreciation is centered on the purchaser's expected appreciation.
+    """
+    home_appreciation_volatility: float = const.DEFAULT_HOME_APPRECIATION_VOLATILITY
+    investment_return: float = const.DEFAULT_INVESTMENT_RETURN
+    investment_return_volatility: float = const.DEFAULT_INVESTMENT_RETURN_VOLATILITY
+    rent_increase: float = const.DEFAULT_RENT_INCREASE_PCT
+    rent_increase_volatility: float = const.DEFAULT_RENT_INCREASE_VOLATILITY
+
+    def sample(self,
+               purchaser: PurchaserProfile,
+               paths: int,
+               years: int,
+               rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """Return paths x periods arrays of per period rates for each stochastic rate"""
+        periods = np.arange(const.INIT_PERIOD, years * const.PERIODS_PER_YEAR)
+
+        # the purchase period shares rates with the first year while rent increases
+        # apply to the year which starts after the increase
+        rate_years = np.maximum(periods, 0) // const.PERIODS_PER_YEAR
+        rent_years = (periods + 1) // const.PERIODS_PER_YEAR
+
+        appreciation = rng.normal(purchaser.home_appreciation, self.home_appreciation_volatility, (paths, years))
+        investment = rng.normal(self.investment_return, self.investment_return_volatility, (paths, years))
+        rent_increase = rng.normal(self.rent_increase, self.rent_increase_volatility, (paths, years + 1))
+
+        return {
+            'appreciation': const.yearly_to_period_rate(appreciation)[:, rate_years],
+            'investment_rate': const.yearly_to_period_rate(investment)[:, rate_years],
+            'rent_increase_rate': rent_increase[:, rent_years],
+        }
+
+
+@dataclass
+class PathSimulation:
+    """Networth of every sampled path at the start and at the end of each year"""
+    years: np.ndarray
+    networth: np.ndarray
+
+    def percentiles(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> np.ndarray:
+        """Return percentiles x years array of networth percentile bands"""
+        return np.percentile(self.networth, percentiles, axis=0)
+
+
+def simulate_paths(purchaser: PurchaserProfile,
+                   housing: HousingDetail,
+                   years: int,
+                   paths: int,
+                   seed: int = None,
+                   model: RateModel = None,
+                   chunk_size: int = BATCH_CHUNK_SIZE) -> PathSimulation:
+    """
+    Simulate buying/renting the housing under randomly sampled rate paths.
+
+    All paths are evaluated together as a single batch so results are reproducible for
+    a given seed.
+    """
+    if years < 1:
+        raise ValueError('Path simulations require at least one year')
+
+    model = model or RateModel()
+    rng = np.random.default_rng(seed)
+
+    scenarios = ScenarioArrays.from_pairs([(purchaser, housing)]).take(np.zeros(paths, dtype=int))
+    selling_period = years * const.PERIODS_PER_YEAR - 1
+    networth = np.empty((paths, years + 1))
+
+    for start in range(0, paths, chunk_size):
+        index = slice(start, start + chunk_size)
+        chunk = scenarios.take(index)
+        chunk = replace(chunk, **model.sample(purchaser, len(chunk), years, rng))
+
+        kernel = BatchKernel(chunk)
+        state = kernel.initial_state()
+        networth[index, 0] = kernel.networth(state)
+
+        for period in range(const.INIT_PERIOD, selling_period + 1):
+            state, _, _ = kernel.step(state, period, selling_period)
+
+            if period % const.PERIODS_PER_YEAR == const.PERIODS_PER_YEAR - 1 and period >= 0:
+                networth[index, (period + 1) // const.PERIODS_PER_YEAR] = kernel.networth(state)
+
+    return PathSimulation(
+        years=np.arange(years + 1),
+        networth=networth,
+    )
@@ -0,0 +1,159 @@
+"""
+Mortgage strategy optimizer.
+
+Searches down payment, mortgage type and mortgage term for the strategy which gains the
+most by the end of the horizon while the down payment and buying costs fit within the
+purchaser's cash.
+
+Down payments are searched with Lipschitz branch and bound. Each mortgage type and term
+starts from a coarse grid of down payments. The asset delta within an interval between
+two evaluated down payments is bounded by the mean of its endpoints plus the steepest
+slope seen so far times half the width. Intervals whose bound cannot beat the best
+strategy found so far are dominated and skipped, the rest are split at their midpoint
+until the grid step is reached. Every round of candidates is simulated in one vectorised
+batch in the current process, as even rounds of thousands of candidates finish faster
+than a pool of worker processes starts.
+"""
+from dataclasses import dataclass
+from dataclasses import replace
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+from homecomp import const
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_batch
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+DEFAULT_MIN_DOWN_PAYMENT_PCT = 0.03
+DEFAULT_MAX_DOWN_PAYMENT_PCT = 0.50
+DEFAULT_DOWN_PAYMENT_STEP = 0.005
+DEFAULT_MORTGAGE_TERMS = (15, 30)
+MORTGAGE_TYPES = ('min', 'max')
+COARSE_GRID_POINTS = 5
+# the true Lipschitz constant is unknown so the steepest observed slope is widened
+LIPSCHITZ_MARGIN = 3
+
+
+@dataclass
+class Strategy:
+    mortgage_type: str
+    mortgage_years: int
+    down_payment_pct: float
+    average_cost: float
+    asset_delta: float
+
+
+@dataclass
+class Optimization:
+    """Best strategy along with every strategy simulated to find it"""
+    best: Strategy
+    strategies: List[Strategy]
+    candidates: int  # size of the full search grid
+
+
+def max_down_payment_pct(purchaser: PurchaserProfile, housing: HousingDetail) -> float:
+    """Largest down payment percentage the purchaser can pay along with buying costs"""
+    return purchaser.cash / housing.price - const.DEFAULT_HOME_BUYING_COSTS_PCT
+
+
+def down_payment_grid(purchaser: PurchaserProfile,
+                      housing: HousingDetail,
+                      min_pct: float = DEFAULT_MIN_DOWN_PAYMENT_PCT,
+                      max_pct: float = DEFAULT_MAX_DOWN_PAYMENT_PCT,
+                      step: float = DEFAULT_DOWN_PAYMENT_STEP) -> List[float]:
+    """Return down payment percentages from min_pct to max_pct which fit within the purchaser's cash"""
+    limit = min(max_pct, max_down_payment_pct(purchaser, housing))
+    count = int(np.floor((limit - min_pct) / step + 1e-9)) + 1
+
+    return [round(min_pct + idx * step, 10) for idx in range(max(count, 0))]
+
+
+def _evaluate(base: ScenarioArrays,
+              candidates: List[Tuple[str, int, float]],
+              years: int) -> Tuple[np.ndarray, np.ndarray]:
+    scenarios = base.take(np.zeros(len(candidates), dtype=int))
+    scenarios = replace(
+        scenarios,
+        max_mortgage=np.array([mortgage_type == 'max' for mortgage_type, _, _ in candidates], dtype=bool),
+    ).with_mortgage(
+        mortgage_years=np.array([mortgage_years for _, mortgage_years, _ in candidates], dtype=int),
+        down_payment_pct=np.array([down_payment_pct for _, _, down_payment_pct in candidates], dtype=float),
+    )
+
+    batch = simulate_batch(scenarios, years, series=False)
+    return batch.average_cost, batch.asset_delta
+
+
+def _coarse_indexes(size: int) -> List[int]:
+    return sorted(set(np.linspace(0, size - 1, min(COARSE_GRID_POINTS, size)).round().astype(int).tolist()))
+
+
+def _open_intervals(evaluated: Dict[int, float], best: float) -> List[int]:
+    """Return midpoints of the intervals between evaluated indexes which may still beat best"""
+    indexes = sorted(evaluated)
+    pairs = list(zip(indexes, indexes[1:]))
+    slope = max(
+        (abs(evaluated[high] - evaluated[low]) / (high - low) for low, high in pairs),
+        default=0,
+    ) * LIPSCHITZ_MARGIN
+
+    return [
+        (low + high) // 2
+        for low, high in pairs
+        if high - low > 1 and (evaluated[low] + evaluated[high] + slope * (high - low)) / 2 > best
+    ]
+
+
+def optimize(purchaser: PurchaserProfile,
+             housing: HousingDetail,
+             years: int,
+             down_payments: Sequence[float],
+             mortgage_terms: Sequence[int] = DEFAULT_MORTGAGE_TERMS,
+             mortgage_types: Sequence[str] = MORTGAGE_TYPES) -> Optimization:
+    """
+    Return the strategy with the largest asset delta after the given years.
+
+    Down payments must be sorted ascending (see down_payment_grid). Raises ValueError if
+    the housing is not a home or no down payment is affordable.
+    """
+    if housing.type != const.HOUSING_TYPE_HOME:
+        raise ValueError(f'{housing.name} is not a home and cannot be financed')
+    if not down_payments:
+        raise ValueError(f'{purchaser.name} cannot afford a down payment on {housing.name}')
+
+    base = ScenarioArrays.from_pairs([(purchaser, housing)])
+    groups = list(dict.fromkeys((mortgage_type, term) for mortgage_type in mortgage_types for term in mortgage_terms))
+    evaluated = {group: {} for group in groups}
+    strategies = []
+    best = -np.inf
+    pending = [(group, idx) for group in groups for idx in _coarse_indexes(len(down_payments))]
+
+    while pending:
+        candidates = [(group[0], group[1], down_payments[idx]) for group, idx in pending]
+        average_cost, asset_delta = _evaluate(base, candidates, years)
+
+        for (group, idx), candidate, cost, delta in zip(pending, candidates, average_cost.tolist(),
+                                                        asset_delta.tolist()):
+            evaluated[group][idx] = delta
+            strategies.append(Strategy(*candidate, average_cost=cost, asset_delta=delta))
+            best = max(best, delta)
+
+        pending = [
+            (group, idx)
+            for group in groups
+            for idx in _open_intervals(evaluated[group], best)
+        ]
+
+    strategies.sort(key=lambda strategy: strategy.asset_delta, reverse=True)
+
+    return Optimization(
+        best=strategies[0],
+        strategies=strategies,
+        candidates=len(groups) * len(down_payments),
+    )
@@ -1,3 +1,4 @@
+from typing import Iterable
 from typing import List
 import os
 
@@ -5,7 +6,9 @@ from homecomp.models import BudgetItem
 from homecomp.models import HousingDetail
 from homecomp.models import MonthlyExpense
 from homecomp.outputs.common import format_currency
+from homecomp.outputs.csv import stream_csv
 from homecomp.outputs.csv import write_csv
+from homecomp.outputs.html import stream_html
 from homecomp.outputs.html import write_html
 
 
@@ -13,6 +16,10 @@ FORMAT_MAP = {
     'html': write_html,
     'csv': write_csv,
 }
+STREAM_FORMAT_MAP = {
+    'html': stream_html,
+    'csv': stream_csv,
+}
 FORMATS = list(FORMAT_MAP.keys())
 DEFAULT_FORMAT = FORMATS[0]
 
@@ -28,3 +35,17 @@ def write(choice: str,
     os.makedirs(directory, exist_ok=True)
 
     return FORMAT_MAP[choice](details, budget_items, expenses, directory)
+
+
+def stream(choice: str,
+           details: HousingDetail,
+           budget_items: List[BudgetItem],
+           expenses: Iterable[MonthlyExpense],
+           directory: str):
+    """Write output while expenses are lazily computed (see compute.stream)"""
+    if choice not in FORMATS:
+        raise ValueError(f'{choice} is not an acceptable format')
+
+    os.makedirs(directory, exist_ok=True)
+
+    return STREAM_FORMAT_MAP[choice](details, budget_items, expenses, directory)
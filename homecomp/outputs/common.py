@@ -1,14 +1,18 @@
 import itertools
 from datetime import date
 from typing import Dict
+from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import Tuple
 
+import numpy as np
 from dateutil.relativedelta import relativedelta
 
 from homecomp import const
+from homecomp import profiling
 from homecomp.models import BudgetItem
+from homecomp.models import ExpenseSeries
 from homecomp.models import MonthlyExpense
 from homecomp.models import NetworthMixin
 
@@ -37,6 +41,7 @@ def get_networth_items(budget_items: List[BudgetItem]) -> Dict[str, BudgetItem]:
     }
 
 
+@profiling.timed('outputs.get_asset_table')
 def get_asset_table(budget_items: List[BudgetItem], periods: int) -> Tuple:
     networth_items = get_networth_items(budget_items)
     months = iter_months()
@@ -45,34 +50,42 @@ def get_asset_table(budget_items: List[BudgetItem], periods: int) -> Tuple:
     headers += list(networth_items.keys())
     headers += ['Total']
 
-    rows = []
-    for period in range(const.INIT_PERIOD, periods + 1):
-        row = {'Time': next(months)}
-        row.update({
-            key: format_currency(networth_item.get_period_value(period))
-            for key, networth_item in networth_items.items()
-        })
-        row['Total'] = format_currency(sum(
-            networth_item.get_period_value(period)
-            for networth_item in networth_items.values()
-        ))
+    columns = [
+        networth_item.get_period_values(const.INIT_PERIOD, periods + 1)
+        for networth_item in networth_items.values()
+    ]
+    # accumulate in the same order as a sum over each period so totals match exactly
+    total = np.zeros(periods + 1 - const.INIT_PERIOD)
+    for column in columns:
+        total = total + column
+
+    columns = [
+        [format_currency(value) for value in column.tolist()]
+        for column in columns + [total]
+    ]
 
-        rows.append(row)
+    rows = [
+        dict(zip(headers, (next(months), *values)))
+        for values in zip(*columns)
+    ]
 
     return headers, rows
 
 
-def get_asset_delta(budget_items: List[BudgetItem]) -> str:
+def asset_delta(budget_items: List[BudgetItem]) -> float:
     networth_items = get_networth_items(budget_items)
 
     final_value = sum(item.value for item in networth_items.values())
     init_value = sum(item.values[const.INIT_PERIOD] for item in networth_items.values())
 
-    gains = final_value - init_value
-    return format_currency(gains)
+    return final_value - init_value
 
 
-def get_average_cost(expenses: List[MonthlyExpense]) -> str:
+def get_asset_delta(budget_items: List[BudgetItem]) -> str:
+    return format_currency(asset_delta(budget_items))
+
+
+def average_cost(expenses: List[MonthlyExpense]) -> float:
     """
     Return the average montly cost of expenses over lifetime.
 
@@ -81,9 +94,14 @@ def get_average_cost(expenses: List[MonthlyExpense]) -> str:
     use home appreciation to offset costs. The asset delta should be used when
     comparing against other calculators.
     """
-    return format_currency(
-        -sum(expense.costs for expense in expenses) / len(expenses)
-    )
+    if isinstance(expenses, ExpenseSeries):
+        return -sum(expenses.total_costs.tolist()) / len(expenses)
+
+    return -sum(expense.costs for expense in expenses) / len(expenses)
+
+
+def get_average_cost(expenses: List[MonthlyExpense]) -> str:
+    return format_currency(average_cost(expenses))
 
 
 def _traverse_expense(expense: MonthlyExpense, column: str = '') -> Dict:
@@ -105,9 +123,29 @@ def _traverse_expense(expense: MonthlyExpense, column: str = '') -> Dict:
     return row
 
 
+def _get_series_rows(expenses: ExpenseSeries, months: Iterator[str]) -> List[Dict]:
+    """Build expense rows directly from expense columns without building expense trees"""
+    headers = ['Time']
+    columns = []
+
+    for header, total in expenses.columns():
+        headers.append(header)
+        columns.append([format_currency(value) for value in (-total).tolist()])
+
+    return [
+        dict(zip(headers, (next(months), *values)))
+        for values in zip(*columns)
+    ]
+
+
+@profiling.timed('outputs.get_expense_table')
 def get_expense_table(expenses: List[MonthlyExpense]):
     months = iter_months(date.today() + relativedelta(months=1))
 
+    if isinstance(expenses, ExpenseSeries):
+        headers = ['Time', *(header for header, _ in expenses.columns())]
+        return headers, _get_series_rows(expenses, months)
+
     rows = [
         {
             'Time': next(months),
@@ -116,7 +154,8 @@ def get_expense_table(expenses: List[MonthlyExpense]):
         for expense in expenses
     ]
 
-    headers = list(rows[0].keys())
+    # without any expenses only the time column is known
+    headers = list(rows[0].keys()) if rows else ['Time']
 
     if any(set(row.keys()) != set(headers) for row in rows[1:]):
         raise ValueError('Allxpenses are not available across all periods')
@@ -124,6 +163,69 @@ def get_expense_table(expenses: List[MonthlyExpense]):
     return headers, rows
 
 
+class ReportRows:
+    """
+    Asset and expense table rows built one period at a time as expenses are computed.
+
+    Iterating yields (expense row, asset row) pairs where the first pair only has the
+    asset row of initial values. Asset rows are read from the budget items as soon as
+    each expense is computed, so expenses must be a lazy iterator which steps the same
+    budget items (see compute.stream). Averages are tallied along the way so that no
+    period needs to be kept once its rows are written.
+    """
+
+    def __init__(self, budget_items: List[BudgetItem], expenses: Iterable[MonthlyExpense]):
+        self.budget_items = budget_items
+        self.networth_items = get_networth_items(budget_items)
+        self.asset_headers = ['Time', *self.networth_items.keys(), 'Total']
+        self.expense_headers = None
+        self.periods = 0
+        self.total_costs = 0
+        self._expenses = expenses
+
+    def _asset_row(self, month: str, period: int) -> Dict:
+        values = [
+            networth_item.get_period_value(period)
+            for networth_item in self.networth_items.values()
+        ]
+
+        return dict(zip(
+            self.asset_headers,
+            (month, *map(format_currency, values), format_currency(sum(values)))
+        ))
+
+    def __iter__(self) -> Iterator[Tuple[Dict, Dict]]:
+        asset_months = iter_months()
+        expense_months = iter_months(date.today() + relativedelta(months=1))
+
+        yield None, self._asset_row(next(asset_months), const.INIT_PERIOD)
+
+        for expense in self._expenses:
+            expense_row = {
+                'Time': next(expense_months),
+                **_traverse_expense(expense)
+            }
+
+            if self.expense_headers is None:
+                self.expense_headers = list(expense_row.keys())
+            elif set(expense_row.keys()) != set(self.expense_headers):
+                raise ValueError('Allxpenses are not available across all periods')
+
+            self.periods += 1
+            self.total_costs += expense.costs
+
+            yield expense_row, self._asset_row(next(asset_months), expense.period + 1)
+
+    @property
+    def average_cost(self) -> float:
+        """Average monthly cost of the expenses read so far (see average_cost)"""
+        return -self.total_costs / self.periods
+
+    @property
+    def asset_delta(self) -> float:
+        return asset_delta(self.budget_items)
+
+
 def get_header_spans(headers: List[str]):
     """
     Split list of composite headers into simple headers with colspan values.
@@ -1,40 +1,83 @@
 import csv
 import os
+from typing import Iterable
 from typing import List
 
+from homecomp import profiling
 from homecomp.models import BudgetItem
 from homecomp.models import HousingDetail
 from homecomp.models import MonthlyExpense
 from homecomp.outputs import common
 
 
-def write_expenses_csv(filename: str, expenses: List[MonthlyExpense]):  # pylint: disable=unused-argument
-    with open(filename, mode='w') as output_fd:  # pylint: disable=unused-variable
-        pass
+def write_expenses_csv(filename: str, expenses: List[MonthlyExpense]):
+    with open(filename, mode='w') as output_fd:
+        headers, rows = common.get_expense_table(expenses)
+
+        with profiling.record('outputs.csv.write'):
+            writer = csv.DictWriter(output_fd, fieldnames=headers)
+            writer.writeheader()
+
+            for row in rows:
+                writer.writerow(row)
 
 
 def write_assets_csv(filename: str, budget_items: List[BudgetItem], periods: int):
     with open(filename, mode='w') as output_fd:
         headers, rows = common.get_asset_table(budget_items, periods)
 
-        writer = csv.DictWriter(output_fd, fieldnames=headers)
-        writer.writeheader()
+        with profiling.record('outputs.csv.write'):
+            writer = csv.DictWriter(output_fd, fieldnames=headers)
+            writer.writeheader()
 
-        for row in rows:
-            writer.writerow(row)
+            for row in rows:
+                writer.writerow(row)
 
 
+@profiling.timed('outputs.write_csv')
 def write_csv(details: HousingDetail,
               budget_items: List[BudgetItem],
               expenses: List[MonthlyExpense],
               directory: str):
     """Write all computation results to csv output files"""
     write_assets_csv(
-        filename=os.path.join(directory, f'{details.name}.expenses.csv'),
+        filename=os.path.join(directory, f'{details.name}.assets.csv'),
         budget_items=budget_items,
         periods=len(expenses) - 1
     )
     write_expenses_csv(
-        filename=os.path.join(directory, f'{details.name}.assets.csv'),
+        filename=os.path.join(directory, f'{details.name}.expenses.csv'),
         expenses=expenses
     )
+
+
+@profiling.timed('outputs.stream_csv')
+def stream_csv(details: HousingDetail,
+               budget_items: List[BudgetItem],
+               expenses: Iterable[MonthlyExpense],
+               directory: str):
+    """Write computation results to csv output files as each period is computed"""
+    report = common.ReportRows(budget_items, expenses)
+    assets_file = os.path.join(directory, f'{details.name}.assets.csv')
+    expenses_file = os.path.join(directory, f'{details.name}.expenses.csv')
+
+    with open(assets_file, mode='w') as assets_fd, open(expenses_file, mode='w') as expenses_fd:
+        asset_writer = csv.DictWriter(assets_fd, fieldnames=report.asset_headers)
+        asset_writer.writeheader()
+        expense_writer = None
+
+        for expense_row, asset_row in report:
+            asset_writer.writerow(asset_row)
+
+            if expense_row is None:
+                continue
+
+            if expense_writer is None:
+                expense_writer = csv.DictWriter(expenses_fd, fieldnames=report.expense_headers)
+                expense_writer.writeheader()
+
+            expense_writer.writerow(expense_row)
+
+        # match write_csv which writes a header even when there are no expenses
+        if expense_writer is None:
+            csv.DictWriter(expenses_fd, fieldnames=['Time']).writeheader()
@@ -1,8 +1,15 @@
+import csv
 import os
+import tempfile
+from typing import IO
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 
 from jinja2 import Template
 
+from homecomp import profiling
 from homecomp.models import BudgetItem
 from homecomp.models import HousingDetail
 from homecomp.models import MonthlyExpense
@@ -29,7 +36,7 @@ TEMPLATE = Template("""
             <h2>{{ details.name }}</h2>
             <h5>Cost: <span class="text-danger">{{ average_cost }}/mo<span></h5>
             <h5>Gains: <span class="text-success">{{ asset_delta }}<span></h5>
-            <h5>Time: {{ asset_rows[:-1] | length }} months<span></h5>
+            <h5>Time: {{ months }} months<span></h5>
         </div>
         <div class="container">
             <div class="row">
@@ -111,6 +118,16 @@ TEMPLATE = Template("""
 """)
 
 
+def _write_template(output_file: str, template: Template, **context):
+    """Render template into output file one chunk at a time"""
+    with open(output_file, 'w') as output_fd:
+        write = profiling.wrap('outputs.html.write', output_fd.write)
+
+        for chunk in profiling.wrap_iter('outputs.html.render', template.generate(**context)):
+            write(chunk)
+
+
+@profiling.timed('outputs.write_html')
 def write_html(details: HousingDetail,
                budget_items: List[BudgetItem],
                expenses: List[MonthlyExpense],
@@ -120,17 +137,69 @@ def write_html(details: HousingDetail,
     asset_headers, asset_rows = common.get_asset_table(budget_items, len(expenses) - 1)
     expense_headers, expense_rows = common.get_expense_table(expenses)
 
-    with open(output_file, 'w') as output_fd:
-        output_fd.write(TEMPLATE.render(
+    _write_template(
+        output_file,
+        TEMPLATE,
+        details=details,
+        months=len(expenses),
+        asset_headers=asset_headers,
+        asset_rows=asset_rows,
+        expense_header_spans=common.get_header_spans(expense_headers),
+        expense_headers=expense_headers,
+        expense_rows=expense_rows,
+        asset_delta=common.get_asset_delta(budget_items),
+        average_cost=common.get_average_cost(expenses),
+    )
+
+
+def _read_spool(spool_fd: IO, headers: List[str]) -> Iterator[Dict]:
+    spool_fd.seek(0)
+    return csv.DictReader(spool_fd, fieldnames=headers)
+
+
+@profiling.timed('outputs.stream_html')
+def stream_html(details: HousingDetail,
+                budget_items: List[BudgetItem],
+                expenses: Iterable[MonthlyExpense],
+                directory: str):
+    """
+    Write computation results to html output file as each period is computed.
+
+    The summary at the top of the page is only known once every period is computed so
+    rows are spooled to temporary files and then streamed into the template.
+    """
+    output_file = os.path.join(directory, f'{details.name}.html')
+    report = common.ReportRows(budget_items, expenses)
+
+    with tempfile.TemporaryFile(mode='w+', newline='') as assets_fd, \
+            tempfile.TemporaryFile(mode='w+', newline='') as expenses_fd:
+        asset_writer = csv.DictWriter(assets_fd, fieldnames=report.asset_headers)
+        expense_writer = None
+
+        for expense_row, asset_row in report:
+            asset_writer.writerow(asset_row)
+
+            if expense_row is None:
+                continue
+
+            if expense_writer is None:
+                expense_writer = csv.DictWriter(expenses_fd, fieldnames=report.expense_headers)
+
+            expense_writer.writerow(expense_row)
+
+        _write_template(
+            output_file,
+            TEMPLATE,
             details=details,
-            asset_headers=asset_headers,
-            asset_rows=asset_rows,
-            expense_header_spans=common.get_header_spans(expense_headers),
-            expense_headers=expense_headers,
-            expense_rows=expense_rows,
-            asset_delta=common.get_asset_delta(budget_items),
-            average_cost=common.get_average_cost(expenses),
-        ))
+            months=report.periods,
+            asset_headers=report.asset_headers,
+            asset_rows=_read_spool(assets_fd, report.asset_headers),
+            expense_header_spans=common.get_header_spans(report.expense_headers),
+            expense_headers=report.expense_headers,
+            expense_rows=_read_spool(expenses_fd, report.expense_headers),
+            asset_delta=common.format_currency(report.asset_delta),
+            average_cost=common.format_currency(report.average_cost),
+        )
 
 
 MULTI_YEAR_TEMPLATE = Template("""
@@ -205,6 +274,7 @@ MULTI_YEAR_TEMPLATE = Template("""
 """)
 
 
+@profiling.timed('outputs.write_multi_year')
 def write_multi_year(details: List[HousingDetail],
                      rows: List[List[str]],
                      purchaser: PurchaserProfile,
@@ -215,9 +285,10 @@ def write_multi_year(details: List[HousingDetail],
 
     output_file = os.path.join(directory, 'multi_year.html')
 
-    with open(output_file, 'w') as output_fd:
-        output_fd.write(MULTI_YEAR_TEMPLATE.render(
-            details=details,
-            rows=rows,
-            purchaser=purchaser
-        ))
+    _write_template(
+        output_file,
+        MULTI_YEAR_TEMPLATE,
+        details=details,
+        rows=rows,
+        purchaser=purchaser
+    )
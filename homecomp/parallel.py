@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from homecomp import profiling
+
+
+# data shared with every task of a worker process (set once by the pool initializer)
+_WORKER_SHARED = None
+# None when the parent process is not profiling otherwise whether to run cProfile
+_WORKER_PROFILE = None
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def _init_worker(shared: Any, profile: bool = None):
+    global _WORKER_SHARED, _WORKER_PROFILE  # pylint: disable=global-statement
+    profiling.reset()
+    _WORKER_SHARED = shared
+    _WORKER_PROFILE = profile
+
+
+def _call_worker(func: Callable, args: Tuple) -> Any:
+    if _WORKER_PROFILE is None:
+        return func(_WORKER_SHARED, *args)
+
+    with profiling.profile(use_cprofile=_WORKER_PROFILE) as profiler:
+        result = func(_WORKER_SHARED, *args)
+
+    return result, profiler.snapshot()
+
+
+def ordered_map(func: Callable,
+                tasks: Iterable[Tuple],
+                jobs: int = None,
+                shared: Any = None) -> Iterator[Any]:
+    """
+    Yield func(shared, *args) for every task args in the same order as tasks.
+
+    Tasks are spread across a pool of up to jobs processes. The shared value is sent to
+    each worker process once instead of with every task. When jobs is 1 every task runs
+    in the current process. The function must be defined at module level so that it can
+    be sent to worker processes. When profiling, worker profiles are merged into the
+    active profile as each task completes.
+    """
+    tasks = list(tasks)
+    jobs = min(jobs or default_jobs(), len(tasks))
+
+    if jobs <= 1:
+        for args in tasks:
+            yield func(shared, *args)
+        return
+
+    profiler = profiling.active()
+    profile = None if profiler is None else profiler.cprofile is not None
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(shared, profile)) as pool:
+        for result in pool.map(_call_worker, repeat(func), tasks):
+            if profiler is None:
+                yield result
+                continue
+
+            result, snapshot = result
+            profiler.merge(snapshot)
+            yield result
+
+
+def split(size: int, jobs: int = None, tasks_per_job: int = 4) -> List[Tuple[int, int]]:
+    """Split range(size) into contiguous (start, stop) ranges to balance across jobs"""
+    count = max(min(size, (jobs or default_jobs()) * tasks_per_job), 1)
+    bounds = [round(idx * size / count) for idx in range(count + 1)]
+
+    return [
+        (start, stop)
+        for start, stop in zip(bounds, bounds[1:])
+        if stop > start
+    ]
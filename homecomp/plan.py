@@ -0,0 +1,374 @@
+"""
+Compiled step plans for the loop engine.
+
+Stepping budget items through BudgetItem.step builds a MonthlyBudget and MonthlyExpense
+for every item in every period. A StepPlan instead flattens the item graph once into an
+ordered list of step functions specialized for each item type. The functions share a
+state block holding the remaining budget and running totals of each composite, so each
+period is a single pass over the list which writes leaf savings and costs into a row.
+
+The remaining budget is threaded exactly like BudgetLineItem._step. Within a composite
+each child sees the budget left after its earlier siblings. The composite's parent only
+sees the joined totals of the composite.
+"""
+import time
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from homecomp import const
+from homecomp import errors
+from homecomp import profiling
+from homecomp.budget_items.assets import Home
+from homecomp.budget_items.assets import Investment
+from homecomp.budget_items.composite import HomeLifetime
+from homecomp.budget_items.liabilities import MaxMortgage
+from homecomp.budget_items.liabilities import MinMortgage
+from homecomp.budget_items.liabilities import Mortgage
+from homecomp.budget_items.misc import HOA
+from homecomp.budget_items.misc import HomeInsurance
+from homecomp.budget_items.misc import Maintenance
+from homecomp.budget_items.misc import PropertyTax
+from homecomp.budget_items.misc import Rent
+from homecomp.models import BudgetItem
+from homecomp.models import BudgetLineItem
+from homecomp.models import ExpenseSeries
+from homecomp.models import MonthlyBudget
+from homecomp.models import MonthlyExpense
+from homecomp.models import NetworthMixin
+
+
+def _owned(home: Home) -> Callable[[int], bool]:
+    if not home.lifetime:
+        return lambda period: True
+
+    return frozenset(home.lifetime).__contains__
+
+
+class StepPlan:
+    """
+    Flat plan which steps a budget item graph one period at a time.
+
+    Budget items are left in the same state as if they had been stepped directly. Raises
+    UnsupportedBudgetItem for item types without a specialized step function.
+    """
+
+    def __init__(self, budget: MonthlyBudget, budget_items: List[BudgetItem]):
+        self.budget = budget
+        self.period = None
+        self.items = []
+        self.columns = 0
+
+        # current value of each networth item keyed by id, shared between step functions
+        self._cells = {}
+        # state block of remaining budget, savings and costs for each level of composites
+        self._remaining = []
+        self._savings = []
+        self._costs = []
+        self._row_savings = []
+        self._row_costs = []
+        self._ops = []
+
+        self._frame(0)
+        self.tree = ('total', [self._compile(budget_item, 0) for budget_item in budget_items])
+
+        if len(set(item.period for item in self.items)) > 1:
+            raise errors.UnsupportedBudgetItem('Budget items are not all at the same period')
+
+        self.period = self.items[0].period if self.items else const.INIT_PERIOD
+
+    def _frame(self, depth: int):
+        if depth == len(self._remaining):
+            self._remaining.append(0)
+            self._savings.append(0)
+            self._costs.append(0)
+
+    def _cell(self, item: NetworthMixin) -> List[float]:
+        if id(item) not in self._cells:
+            self._cells[id(item)] = [item.value]
+        return self._cells[id(item)]
+
+    def _compile(self, item: BudgetItem, depth: int) -> Tuple:
+        try:
+            handler = self.handlers[type(item)]
+        except KeyError as error:
+            raise errors.UnsupportedBudgetItem(f'No step plan implementation for {type(item)}') from error
+
+        self.items.append(item)
+        if isinstance(item, BudgetLineItem):
+            return handler(self, item, depth)
+
+        self._leaf(profiling.wrap(f'{type(item).__name__}.step', handler(self, item)), depth)
+        return item.name, self.columns - 1
+
+    def _leaf(self, func: Callable, depth: int):
+        column = self.columns
+        self.columns += 1
+        self._row_savings.append(0)
+        self._row_costs.append(0)
+
+        remaining = self._remaining
+        savings = self._savings
+        costs = self._costs
+        row_savings = self._row_savings
+        row_costs = self._row_costs
+
+        def step(period):
+            item_savings, item_costs = func(remaining[depth], period)
+            row_savings[column] = item_savings
+            row_costs[column] = item_costs
+
+            remaining[depth] = remaining[depth] + (item_savings + item_costs)
+            savings[depth] += item_savings
+            costs[depth] += item_costs
+
+        self._ops.append(step)
+
+    def _composite(self, item: BudgetLineItem, depth: int, after: Callable = None) -> Tuple:
+        child = depth + 1
+        self._frame(child)
+
+        remaining = self._remaining
+        savings = self._savings
+        costs = self._costs
+
+        def enter(period):  # pylint: disable=unused-argument
+            remaining[child] = remaining[depth]
+            savings[child] = 0
+            costs[child] = 0
+
+        def leave(period):
+            remaining[depth] = remaining[depth] + (savings[child] + costs[child])
+            savings[depth] += savings[child]
+            costs[depth] += costs[child]
+
+            if after:
+                after(period)
+
+        self._ops.append(enter)
+        first = len(self._ops) - 1
+        children = [self._compile(budget_item, child) for budget_item in item.budget_items]
+        self._ops.append(leave)
+
+        self._profile_composite(f'{type(item).__name__}.step', first, len(self._ops) - 1)
+        return item.name, children
+
+    def _profile_composite(self, name: str, first: int, last: int):
+        """Time composite operations from entering to leaving when profiling"""
+        profiler = profiling.active()
+        if profiler is None:
+            return
+
+        enter = self._ops[first]
+        leave = self._ops[last]
+        started = [0.0]
+
+        def timed_enter(period):
+            started[0] = time.perf_counter()
+            enter(period)
+
+        def timed_leave(period):
+            leave(period)
+            profiler.add(name, time.perf_counter() - started[0])
+
+        self._ops[first] = timed_enter
+        self._ops[last] = timed_leave
+
+    def _home_lifetime(self, item: HomeLifetime, depth: int) -> Tuple:
+        values = item.values
+
+        def after(period):
+            # track composite asset value to the underlying home value
+            values[period + 1] = home_cell[0]
+
+        node = self._composite(item, depth, after)
+
+        last = item.budget_items[-1] if item.budget_items else None
+        if id(last) not in self._cells:
+            raise errors.UnsupportedBudgetItem(f'{item.name} must end with a networth item')
+        home_cell = self._cells[id(last)]
+
+        return node
+
+    def _home(self, home: Home) -> Callable:
+        values = home.values
+        cell = self._cell(home)
+        buying_period = home.buying_period
+        selling_period = home.selling_period
+
+        def step(remaining, period):  # pylint: disable=unused-argument
+            if period == buying_period:
+                cell[0] = values[period + 1] = home.price
+                return -(home.price * home.down_payment_pct), -(home.price * home.buying_costs_rate)
+
+            if period == selling_period:
+                sell_price = cell[0]
+                selling_costs = sell_price * home.selling_costs_rate
+                cell[0] = values[period + 1] = 0
+                return sell_price, -selling_costs
+
+            cell[0] = values[period + 1] = round(cell[0] * (1 + home.rate), 2)
+            return 0, 0
+
+        return step
+
+    def _hoa(self, item: HOA) -> Callable:
+        owned = _owned(item.home)
+        hoa_fee = item.hoa_fee
+
+        def step(remaining, period):  # pylint: disable=unused-argument
+            return 0, (-hoa_fee if owned(period) else 0)
+
+        return step
+
+    def _maintenance(self, item: Maintenance) -> Callable:
+        owned = _owned(item.home)
+        home_cell = self._cell(item.home)
+        rate = item.rate
+
+        def step(remaining, period):  # pylint: disable=unused-argument
+            return 0, (-(home_cell[0] * rate) if owned(period) else 0)
+
+        return step
+
+    def _yearly_home_rate(self, item) -> Callable:
+        owned = _owned(item.home)
+        home_cell = self._cell(item.home)
+        rate = item.rate
+
+        def step(remaining, period):  # pylint: disable=unused-argument
+            if owned(period) and period % 12 == 11:
+                return 0, -(home_cell[0] * rate)
+            return 0, 0
+
+        return step
+
+    def _rent(self, item: Rent) -> Callable:
+        def step(remaining, period):  # pylint: disable=unused-argument
+            if period % 12 == 11:
+                item.rent *= (item.rate + 1)
+            return 0, -item.rent
+
+        return step
+
+    def _investment(self, item: Investment) -> Callable:
+        values = item.values
+        cell = self._cell(item)
+        rate = item.rate
+
+        def step(remaining, period):
+            cell[0] = values[period + 1] = round(cell[0] * (1 + rate), 2) + remaining
+            return -remaining, 0
+
+        return step
+
+    def _mortgage(self, item: Mortgage) -> Callable:
+        values = item.values
+        cell = self._cell(item)
+        start_period = item.start - 1
+        principal = item.principal
+        rate = item.rate
+        min_payment = item.payment
+
+        def step(remaining, period):
+            value = cell[0]
+
+            if period == start_period:  # start of mortgage
+                cell[0] = values[period + 1] = -principal
+                return 0, 0
+
+            if remaining > abs(value):  # assume sell of house/end of mortgage
+                cell[0] = values[period + 1] = value - value
+                return value, 0
+
+            if value >= 0:
+                return 0, 0
+
+            interest = round(abs(value * rate), 2)
+            value -= interest
+
+            payment = min(min_payment, -value)
+            cell[0] = values[period + 1] = value + payment
+
+            return -(payment - interest), -interest
+
+        return step
+
+    def _max_mortgage(self, item: MaxMortgage) -> Callable:
+        values = item.values
+        cell = self._cell(item)
+        start_period = item.start - 1
+        principal = item.principal
+        rate = item.rate
+        min_payment = item.payment
+
+        def step(remaining, period):
+            value = cell[0]
+
+            if period == start_period:  # set value but do not accrue interest
+                cell[0] = values[period + 1] = -principal
+                return 0, 0
+
+            if value >= 0:
+                return 0, 0
+
+            interest = round(abs(value * rate), 2)
+            value -= interest
+
+            payment = max(remaining, min_payment)
+            payment = min(payment, -value)
+            cell[0] = values[period + 1] = value + payment
+
+            return -(payment - interest), -interest
+
+        return step
+
+    handlers = {
+        BudgetLineItem: _composite,
+        HomeLifetime: _home_lifetime,
+        Home: _home,
+        HOA: _hoa,
+        Maintenance: _maintenance,
+        PropertyTax: _yearly_home_rate,
+        HomeInsurance: _yearly_home_rate,
+        Rent: _rent,
+        Investment: _investment,
+        Mortgage: _mortgage,
+        MinMortgage: _mortgage,
+        MaxMortgage: _max_mortgage,
+    }
+
+    def step(self) -> Tuple[int, List[float], List[float]]:
+        """Step every budget item through one period and return (period, savings, costs) of each leaf"""
+        period = self.period
+
+        self._remaining[0] = self.budget.budget
+        self._savings[0] = 0
+        self._costs[0] = 0
+
+        for operation in self._ops:
+            operation(period)
+
+        self.period = period + 1
+        for item in self.items:
+            item.period = self.period
+
+        return period, list(self._row_savings), list(self._row_costs)
+
+    def expense(self) -> MonthlyExpense:
+        """Step a single period and return the MonthlyExpense tree the items would have returned"""
+        period, savings, costs = self.step()
+        return ExpenseSeries.build_expense(self.tree, period, savings, costs)
+
+    def run(self, periods: int) -> ExpenseSeries:
+        """Step through the given number of periods"""
+        rows = [self.step() for _ in range(periods)]
+
+        return ExpenseSeries(
+            periods=np.array([row[0] for row in rows], dtype=int),
+            tree=self.tree,
+            savings=np.array([row[1] for row in rows], dtype=float).reshape(periods, self.columns),
+            costs=np.array([row[2] for row in rows], dtype=float).reshape(periods, self.columns),
+        )
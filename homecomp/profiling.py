@@ -0,0 +1,253 @@
+"""
+Opt-in timing instrumentation.
+
+Cumulative time and call counts are recorded per stage (compute calls, output tables,
+template rendering, file writes, storage open/close) and per BudgetItem subclass step.
+Instrumentation only does any work while a profile is active: timed functions check a
+single global and wrap/wrap_iter return their argument untouched, while BudgetItem.step
+is only replaced for the duration of a profile.
+
+Times are inclusive, so a composite budget item or a whole output writer includes the
+time of the stages nested within it.
+"""
+import cProfile
+import functools
+import json
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from homecomp.models import BudgetItem
+
+
+_PROFILER = None  # active Profiler or None when profiling is disabled
+_ORIGINAL_STEP = None  # BudgetItem.step replaced while profiling
+
+
+@dataclass
+class Stage:
+    calls: int = 0
+    total: float = 0.0
+
+    @property
+    def per_call(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class _PstatsSnapshot:
+    """Minimal profile object which pstats.Stats can load collected stats from"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class Profiler:
+
+    def __init__(self, use_cprofile: bool = False):
+        self.stages = defaultdict(Stage)
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self._pstats = []  # cProfile stats collected from other processes
+
+    def add(self, name: str, elapsed: float, calls: int = 1):
+        stage = self.stages[name]
+        stage.calls += calls
+        stage.total += elapsed
+
+    def snapshot(self) -> Tuple[Dict, Optional[Dict]]:
+        """Return picklable stats which can be merged into another profiler"""
+        stages = {name: (stage.calls, stage.total) for name, stage in self.stages.items()}
+
+        if self.cprofile is None:
+            return stages, None
+
+        self.cprofile.create_stats()
+        return stages, self.cprofile.stats
+
+    def merge(self, snapshot: Tuple[Dict, Optional[Dict]]):
+        """Add stats collected by a profiler in another process"""
+        stages, cprofile_stats = snapshot
+
+        for name, (calls, total) in stages.items():
+            self.add(name, total, calls)
+
+        if cprofile_stats is not None:
+            self._pstats.append(_PstatsSnapshot(cprofile_stats))
+
+    def sorted_stages(self) -> List[Tuple[str, Stage]]:
+        return sorted(self.stages.items(), key=lambda item: item[1].total, reverse=True)
+
+    def report(self) -> List[str]:
+        """Return lines of a breakdown of every stage sorted by total time"""
+        width = max([len(name) for name in self.stages] + [len('Stage')])
+        lines = [f'{"Stage":<{width}}  {"Calls":>10}  {"Total (s)":>10}  {"Per call (ms)":>14}']
+
+        for name, stage in self.sorted_stages():
+            lines.append(f'{name:<{width}}  {stage.calls:>10}  {stage.total:>10.4f}  {stage.per_call * 1e3:>14.4f}')
+
+        return lines
+
+    def to_dict(self) -> Dict:
+        return {
+            name: {'calls': stage.calls, 'total': stage.total, 'per_call': stage.per_call}
+            for name, stage in self.sorted_stages()
+        }
+
+    def write_json(self, filename: str):
+        with open(filename, 'w', encoding='utf-8') as json_fd:
+            json_fd.write(json.dumps({'stages': self.to_dict()}, indent=2))
+
+    def write_pstats(self, filename: str):
+        """Write cProfile stats of this and any merged processes to a pstats file"""
+        if self.cprofile is None:
+            raise ValueError('Profiler was created without cProfile enabled')
+
+        stats = pstats.Stats(self.cprofile)
+        for snapshot in self._pstats:
+            stats.add(snapshot)
+        stats.dump_stats(filename)
+
+
+def active() -> Optional[Profiler]:
+    return _PROFILER
+
+
+def _profiled_step(step: Callable) -> Callable:
+    @functools.wraps(step)
+    def wrapper(self, budget):
+        start = time.perf_counter()
+        try:
+            return step(self, budget)
+        finally:
+            _PROFILER.add(f'{type(self).__name__}.step', time.perf_counter() - start)
+
+    return wrapper
+
+
+def _stop():
+    global _PROFILER, _ORIGINAL_STEP  # pylint: disable=global-statement
+
+    if _PROFILER.cprofile:
+        _PROFILER.cprofile.disable()
+    BudgetItem.step = _ORIGINAL_STEP
+    _PROFILER = None
+    _ORIGINAL_STEP = None
+
+
+def reset():
+    """Stop any profile inherited from a parent process (e.g. in forked workers)"""
+    if _PROFILER is not None:
+        _stop()
+
+
+@contextmanager
+def profile(use_cprofile: bool = False) -> Iterator[Profiler]:
+    """Enable instrumentation for the duration of the context"""
+    global _PROFILER, _ORIGINAL_STEP  # pylint: disable=global-statement
+
+    if _PROFILER is not None:
+        raise RuntimeError('A profile is already active')
+
+    profiler = Profiler(use_cprofile)
+
+    _PROFILER = profiler
+    _ORIGINAL_STEP = BudgetItem.step
+    BudgetItem.step = _profiled_step(_ORIGINAL_STEP)
+    if profiler.cprofile:
+        profiler.cprofile.enable()
+
+    try:
+        yield profiler
+    finally:
+        _stop()
+
+
+@contextmanager
+def record(name: str):
+    """Time the enclosed block when profiling"""
+    profiler = _PROFILER
+    if profiler is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of the function when profiling"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _PROFILER
+            if profiler is None:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def wrap(name: str, func: Callable) -> Callable:
+    """Return func timed under name when profiling otherwise func itself"""
+    profiler = _PROFILER
+    if profiler is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.add(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def wrap_iter(name: str, iterable: Iterable) -> Iterable:
+    """
+    Return iterable with the time spent producing its items recorded under name when profiling.
+
+    The total is recorded as a single call once the iterable is exhausted.
+    """
+    profiler = _PROFILER
+    if profiler is None:
+        return iterable
+
+    def _timed():
+        iterator = iter(iterable)
+        elapsed = 0.0
+
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                profiler.add(name, elapsed + time.perf_counter() - start)
+                return
+
+            elapsed += time.perf_counter() - start
+            yield item
+
+    return _timed()
@@ -0,0 +1,283 @@
+"""
+Columnar on-disk store of numeric simulation results.
+
+Each result set is a directory with a manifest and one file per column. A column is a C
+ordered (scenarios x periods) matrix of fixed width little endian values with one row
+per scenario, so slicing one column out of a large sweep through a memory map only reads
+the pages of that slice. Columns are named after budget item classes rather than budget
+item names (e.x. expenses.HomeLifetime.Maintenance, networth.Investment) so they line up
+across every housing option, and scenarios without a column have NaN rows. Expenses are
+flipped to positive costs the same as rendered reports.
+
+The manifest records the profiles and housing options of the set while the profile and
+housing of each scenario are stored as index columns, so the manifest stays small no
+matter how many scenarios there are.
+"""
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from homecomp import const
+from homecomp.models import BudgetItem
+from homecomp.models import ExpenseSeries
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.common import get_networth_items
+
+
+DEFAULT_RESULTS_DIR = os.getenv('HOMECOMP_RESULTS_DIR', '.homecomp-results')
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+VALUE_DTYPE = '<f8'
+INDEX_DTYPE = '<i4'
+PURCHASER_COLUMN = 'scenario.purchaser'
+HOUSING_COLUMN = 'scenario.housing'
+
+
+def series(expenses, budget_items: List[BudgetItem]) -> Dict[str, np.ndarray]:
+    """Return per period expense leaves, expense totals and networth of one simulation by column name"""
+    if not isinstance(expenses, ExpenseSeries):
+        expenses = ExpenseSeries.from_expenses(expenses)
+
+    item_types = {budget_item.name: type(budget_item).__name__ for budget_item in budget_items}
+    # longest first as budget item names can contain dots (e.x. 12 Main St. NW)
+    item_names = sorted(item_types, key=len, reverse=True)
+    columns = {}
+
+    for header, total in expenses.columns():
+        for item in item_names:
+            if header == item or header.startswith(f'{item}.'):
+                header = item_types[item] + header[len(item):]
+                break
+
+        columns[f'expenses.{header}'] = -total
+
+    # accumulate in the same order as the asset table so totals match exactly
+    periods = len(expenses) - 1
+    total = np.zeros(periods + 1 - const.INIT_PERIOD)
+
+    for name, networth_item in get_networth_items(budget_items).items():
+        values = networth_item.get_period_values(const.INIT_PERIOD, periods + 1)
+        columns[f'networth.{item_types[name]}'] = values
+        total = total + values
+
+    columns['networth.Total'] = total
+    return columns
+
+
+@dataclass
+class Column:
+    file: str
+    dtype: str
+    width: int = None  # None for columns with one value per scenario
+
+
+class ResultSet:
+    """Read only view of a result set where columns are memory mapped on access"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, MANIFEST_FILE), 'r') as manifest_fd:
+            manifest = json.loads(manifest_fd.read())
+
+        self.scenarios = manifest['scenarios']
+        self.metadata = manifest['metadata']
+        self.profiles = [PurchaserProfile(**profile) for profile in manifest['profiles']]
+        self.housing = [HousingDetail(**details) for details in manifest['housing']]
+        self._columns = {name: Column(**column) for name, column in manifest['columns'].items()}
+
+    def __len__(self):
+        return self.scenarios
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of every result column (excluding scenario index columns)"""
+        return [name for name in self._columns if name not in (PURCHASER_COLUMN, HOUSING_COLUMN)]
+
+    def column(self, name: str) -> np.ndarray:
+        """Return memory mapped (scenarios x periods) values of column"""
+        try:
+            column = self._columns[name]
+        except KeyError as error:
+            raise KeyError(f'No result column {name}') from error
+
+        shape = (self.scenarios,) if column.width is None else (self.scenarios, column.width)
+
+        # empty files cannot be memory mapped
+        if not self.scenarios:
+            return np.empty(shape, dtype=column.dtype)
+
+        return np.memmap(os.path.join(self.path, column.file), dtype=column.dtype, mode='r', shape=shape)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def scenario(self, idx: int) -> Tuple[PurchaserProfile, HousingDetail]:
+        return (
+            self.profiles[self.column(PURCHASER_COLUMN)[idx]],
+            self.housing[self.column(HOUSING_COLUMN)[idx]],
+        )
+
+    def select(self, purchaser: str = None, housing: str = None) -> np.ndarray:
+        """Return indexes of scenarios of the named profile and/or housing"""
+        selected = np.ones(self.scenarios, dtype=bool)
+
+        for column, name, entries in [(PURCHASER_COLUMN, purchaser, self.profiles),
+                                      (HOUSING_COLUMN, housing, self.housing)]:
+            if name is not None:
+                indexes = [idx for idx, entry in enumerate(entries) if entry.name == name]
+                selected &= np.isin(self.column(column), indexes)
+
+        return np.flatnonzero(selected)
+
+
+class ResultWriter:
+    """
+    Appends scenarios to a new result set which is only visible once closed.
+
+    Rows are appended to each column file as scenarios are added so sweeps never need to
+    hold more than one scenario in memory. Every scenario of a column must have the same
+    number of periods.
+    """
+
+    def __init__(self, directory: str, name: str, metadata: Dict = None):
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = os.path.join(directory, name)
+        self.temp_path = tempfile.mkdtemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+        self.metadata = metadata or {}
+        self.scenarios = 0
+        self.columns = {}
+        self.profiles = {}  # name -> (index, profile)
+        self.housing = {}
+        self._files = {}
+
+    def _write(self, name: str, values: np.ndarray, dtype: str):
+        values = np.asarray(values, dtype=dtype)
+        width = values.shape[0] if values.ndim else None
+
+        if name not in self.columns:
+            # file names are independent of column names which contain any characters
+            extension = np.dtype(dtype).str[1:]
+            self.columns[name] = Column(file=f'{len(self.columns):04d}.{extension}', dtype=dtype, width=width)
+            self._files[name] = open(os.path.join(self.temp_path, self.columns[name].file), 'wb')
+
+            # scenarios added before the column first appeared do not have it
+            self._files[name].write(np.full((self.scenarios, width or 1), np.nan, dtype=dtype).tobytes())
+        elif self.columns[name].width != width:
+            raise ValueError(f'Column {name} has {self.columns[name].width} periods in other scenarios, not {width}')
+
+        self._files[name].write(values.tobytes())
+
+    @staticmethod
+    def _entry_index(entries: Dict, entry) -> int:
+        if entry.name not in entries:
+            entries[entry.name] = (len(entries), entry)
+
+        return entries[entry.name][0]
+
+    def add(self, purchaser: PurchaserProfile, housing: HousingDetail, columns: Dict[str, np.ndarray]):
+        """Append one scenario of columns (see series)"""
+        self._write(PURCHASER_COLUMN, self._entry_index(self.profiles, purchaser), INDEX_DTYPE)
+        self._write(HOUSING_COLUMN, self._entry_index(self.housing, housing), INDEX_DTYPE)
+
+        for name, values in columns.items():
+            self._write(name, values, VALUE_DTYPE)
+
+        for name, column in self.columns.items():
+            if name not in columns and name not in (PURCHASER_COLUMN, HOUSING_COLUMN):
+                self._files[name].write(np.full(column.width or 1, np.nan, dtype=column.dtype).tobytes())
+
+        self.scenarios += 1
+
+    def _close_files(self):
+        for column_fd in self._files.values():
+            column_fd.close()
+        self._files = {}
+
+    def close(self):
+        """Write manifest and replace any previous result set of the same name"""
+        self._close_files()
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'scenarios': self.scenarios,
+            'metadata': self.metadata,
+            'profiles': [asdict(profile) for _, profile in self.profiles.values()],
+            'housing': [asdict(details) for _, details in self.housing.values()],
+            'columns': {name: asdict(column) for name, column in self.columns.items()},
+        }
+
+        with open(os.path.join(self.temp_path, MANIFEST_FILE), 'w') as manifest_fd:
+            manifest_fd.write(json.dumps(manifest))
+
+        # move the previous set aside first as directories cannot replace non-empty ones
+        previous_path = None
+        if os.path.exists(self.path):
+            previous_path = tempfile.mkdtemp(dir=os.path.dirname(self.path), suffix='.old')
+            os.replace(self.path, os.path.join(previous_path, 'results'))
+
+        os.replace(self.temp_path, self.path)
+
+        if previous_path:
+            shutil.rmtree(previous_path, ignore_errors=True)
+
+    def abort(self):
+        self._close_files()
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args, **kwargs):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class ResultStore:
+
+    def __init__(self, directory: str = DEFAULT_RESULTS_DIR):
+        self.directory = directory
+
+    def _path(self, name: str) -> str:
+        if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError(f'Invalid result set name {name}')
+
+        return os.path.join(self.directory, name)
+
+    def writer(self, name: str, metadata: Dict = None) -> ResultWriter:
+        self._path(name)
+        return ResultWriter(self.directory, name, metadata)
+
+    def open(self, name: str) -> ResultSet:
+        path = self._path(name)
+
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise FileNotFoundError(f'No result set named {name}')
+
+        return ResultSet(path)
+
+    def names(self) -> List[str]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return sorted(
+                    entry.name
+                    for entry in entries
+                    if not entry.name.startswith('.') and os.path.exists(os.path.join(entry.path, MANIFEST_FILE))
+                )
+        except FileNotFoundError:
+            return []
+
+    def remove(self, name: str):
+        shutil.rmtree(self._path(name))
@@ -1,24 +1,42 @@
 import json
 import operator
 import os
-import shutil
+import sqlite3
+import tempfile
+from abc import ABC
+from abc import abstractmethod
+from contextlib import contextmanager
 from dataclasses import asdict
 from dataclasses import dataclass
 from dataclasses import field
+from functools import partial
 from typing import Any
+from typing import Callable
 from typing import Iterator
 from typing import Dict
+from typing import List
 
 from homecomp import errors
+from homecomp import profiling
+from homecomp.index import SubstringIndex
 from homecomp.models import HousingDetail
 from homecomp.models import PurchaserProfile
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # storage is not locked on platforms without flock (e.g. Windows)
+    fcntl = None
+
 
 @dataclass
 class DataclassStorageTable:
     table_cls: type
     id_field: str
     entries: Dict = field(default_factory=dict)
+    # called with (operation, entry id, entry) on every save/delete
+    on_change: Callable = None
+    index: SubstringIndex = field(default_factory=SubstringIndex)
 
     def __iter__(self):
         return (self.table_cls(**row) for row in self.entries.values())
@@ -36,21 +54,39 @@ class DataclassStorageTable:
         except StopIteration as error:
             raise errors.NoEntryFound(f'No entries found which match {entry_id}') from error
 
+    def _scan(self, entry_id: str, match: callable) -> Iterator[str]:
+        exact = entry_id in self.entries and match(entry_id, entry_id)
+        if exact:
+            yield entry_id
+
+        for key, entry in self.entries.items():
+            if key != entry_id and match(entry[self.id_field], entry_id):
+                yield key
+
     def find_all(self, entry_id: str, match: callable = operator.contains) -> Iterator[Any]:
-        """Find all entries which either matches or contained provided id string"""
-        return (
-            self.table_cls(**entry)
-            for entry in self.entries.values()
-            if match(entry[self.id_field], entry_id)
-        )
+        """Find all entries which either matches or contained provided id string, exact match first"""
+        if match is operator.eq:
+            keys = [entry_id] if entry_id in self.entries else []
+        else:
+            keys = self.index.search(self.entries, entry_id, match)
+            if keys is None:
+                keys = self._scan(entry_id, match)
+
+        return (self.table_cls(**self.entries[key]) for key in keys)
 
     def delete(self, entry_id: str):
         """Remove entry which has the exact match fo the provided entry id"""
         try:
-            return self.entries.pop(entry_id)
+            entry = self.entries.pop(entry_id)
         except KeyError as error:
             raise errors.NoEntryFound(f'No entries found which match {entry_id}') from error
 
+        self.index.remove(entry_id)
+        if self.on_change:
+            self.on_change('delete', entry_id, None)
+
+        return entry
+
     def save(self, entry: Any, overwrite: bool = True):
         entry_id = self._entry_id(entry)
 
@@ -59,51 +95,468 @@ class DataclassStorageTable:
 
         self.entries[entry_id] = asdict(entry)
 
+        self.index.add(entry_id)
+        if self.on_change:
+            self.on_change('save', entry_id, self.entries[entry_id])
+
+
+DEFAULT_STORAGE_FILE = '.storage'
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
 
-class DataclassFileStorage:
+
+class DataclassStorage(ABC):
+    """
+    Storage of dataclass entries grouped into tables keyed by an id field.
+
+    Storage is used as a context manager and tables are accessed as attributes
+    (e.g. storage.housing) while it is open.
+    """
 
     table_map = {
         'housing': (HousingDetail, 'name'),
         'profiles': (PurchaserProfile, 'name')
     }
 
-    def __init__(self, filename='.storage'):
-        self.filename = filename
-        self.data = {}
-
     def __getattr__(self, item):
         if item in self.table_map:
-            if item not in self.data:
-                self.data[item] = {}
-
-            # pass mutable list so that storage table modifications are
-            # reflected in self.data
-            return DataclassStorageTable(
-                *self.table_map[item],
-                self.data[item]
-            )
+            return self.table(item)
 
         raise AttributeError(f'{type(self)} object has no attribute {item}')
 
+    @abstractmethod
+    def table(self, name: str):
+        """Return storage table providing find, find_all, delete and save of entries"""
+
+    @abstractmethod
     def __enter__(self):
+        pass
+
+    @abstractmethod
+    def __exit__(self, *args, **kwargs):
+        pass
+
+
+class DataclassFileStorage(DataclassStorage):
+    """
+    Storage backed by a JSON snapshot file plus an append-only journal of changes.
+
+    Opening storage reads the snapshot and replays the journal. Saves and deletes are
+    tracked while open and appended to the journal on close, so sessions which change
+    nothing write nothing and write cost scales with the size of the change. Once the
+    journal grows past journal_max_bytes it is compacted into a new snapshot which
+    atomically replaces the old one.
+
+    Multiple processes can use the same storage at once. Opening storage reads under a
+    shared lock and the session works from that in-memory copy without holding any lock.
+    Changes are committed under an exclusive lock, after first applying anything other
+    processes committed in the meantime, so concurrent sessions changing different
+    entries never lose each other's changes (the last commit wins for the same entry).
+
+    Id indexes built by lookups are kept when storage is reopened as long as nothing has
+    been committed to it since, so repeated sessions do not rebuild them.
+    """
+
+    journal_max_bytes = 1024 * 1024
+
+    def __init__(self, filename=DEFAULT_STORAGE_FILE, journal_max_bytes: int = None):
+        self.filename = filename
+        self.journal_filename = f'{filename}.journal'
+        self.lock_filename = f'{filename}.lock'
+        self.data = {}
+        self.changes = []
+        self.indexes = {}
+        self.indexed_state = None  # (snapshot, journal size) the indexes were built from
+        self.snapshot_id = None
+        self.journal_size = 0
+
+        if journal_max_bytes is not None:
+            self.journal_max_bytes = journal_max_bytes
+
+    def table(self, name: str) -> DataclassStorageTable:
+        if name not in self.data:
+            self.data[name] = {}
+
+        # pass mutable list so that storage table modifications are
+        # reflected in self.data
+        return DataclassStorageTable(
+            *self.table_map[name],
+            self.data[name],
+            on_change=partial(self._record, name),
+            # share index between table accesses while storage is open
+            index=self.indexes.setdefault(name, SubstringIndex())
+        )
+
+    def _record(self, table: str, operation: str, entry_id: str, entry: Dict):
+        self.changes.append({'table': table, 'op': operation, 'id': entry_id, 'entry': entry})
+
+    def _apply(self, change: Dict):
+        """Apply journaled change (applying a change more than once has no further effect)"""
+        entries = self.data.setdefault(change['table'], {})
+
+        if change['op'] == 'save':
+            entries[change['id']] = change['entry']
+        else:
+            entries.pop(change['id'], None)
+
+    def _read_journal(self, offset: int = 0) -> List[Dict]:
+        """Return changes journaled after offset and record the size of the journal read"""
+        self.journal_size = offset
+
+        try:
+            with open(self.journal_filename, 'rb') as journal_fd:
+                journal_fd.seek(offset)
+                lines = journal_fd.read().split(b'\n')
+        except FileNotFoundError:
+            return []
+
+        changes = []
+        for idx, line in enumerate(lines):
+            if not line:
+                continue
+
+            try:
+                changes.append(json.loads(line))
+            except ValueError as error:
+                # a partially written final line is left by a crash while appending and
+                # its change was never committed
+                if idx == len(lines) - 1:
+                    break
+                raise errors.StorageError(f'Corrupt storage journal {self.journal_filename}') from error
+
+            self.journal_size += len(line) + 1
+
+        return changes
+
+    @contextmanager
+    def _lock(self, exclusive: bool):
+        """Hold a shared or exclusive lock on storage for the duration of the context"""
+        if fcntl is None:
+            yield
+            return
+
+        # the snapshot is replaced on compaction so a separate file is locked
+        lock_fd = os.open(self.lock_filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(lock_fd)
+
+    def _snapshot_stat(self):
+        """Return what identifies the current snapshot file (changed by each compaction)"""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        self.snapshot_id = self._snapshot_stat()
+
         try:
             with open(self.filename, 'r') as storage_fd:
                 self.data = json.loads(storage_fd.read())
         except FileNotFoundError:
-            with open(self.filename, 'w') as storage_fd:
-                storage_fd.write(json.dumps(self.data))
+            self.data = {}
+
+        for change in self._read_journal():
+            self._apply(change)
+
+    def _exists(self) -> bool:
+        return any(os.path.exists(filename) for filename in [self.lock_filename, self.filename, self.journal_filename])
+
+    @profiling.timed('storage.open')
+    def __enter__(self):
+        if self._exists():
+            with self._lock(exclusive=False):
+                self._load()
+        else:
+            # nothing has been committed so there is nothing to lock
+            self.snapshot_id = None
+            self.journal_size = 0
+            self.data = {}
+
+        self.changes = []
+
+        # the snapshot and journal only change by commits so unchanged files mean unchanged entries
+        state = (self.snapshot_id, self.journal_size)
+        if state != self.indexed_state:
+            self.indexes = {}
+            self.indexed_state = state
 
         return self
 
-    def __exit__(self, *args, **kwargs):
-        backup_filename = f'{self.filename}.backup'
-        shutil.copy(self.filename, backup_filename)
+    def _catch_up(self):
+        """Apply changes committed by other processes since storage was opened, then ours"""
+        if self._snapshot_stat() != self.snapshot_id:
+            # compacted since storage was opened
+            self._load()
+        else:
+            for change in self._read_journal(self.journal_size):
+                self._apply(change)
+
+        for change in self.changes:
+            self._apply(change)
+
+    def _append_journal(self) -> int:
+        """Append tracked changes to the journal and return its new size"""
+        with open(self.journal_filename, 'a') as journal_fd:
+            # drop any partially written line left by an earlier crash
+            journal_fd.truncate(self.journal_size)
+            journal_fd.write(''.join(json.dumps(change) + '\n' for change in self.changes))
+            journal_fd.flush()
+            os.fsync(journal_fd.fileno())
+            return journal_fd.tell()
+
+    def compact(self):
+        """Write all entries to a new snapshot and clear the journal"""
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
 
         try:
-            with open(self.filename, 'w') as storage_fd:
+            with os.fdopen(fd, 'w') as storage_fd:
                 storage_fd.write(json.dumps(self.data))
-        except:
-            shutil.move(backup_filename, self.filename)
+                storage_fd.flush()
+                os.fsync(storage_fd.fileno())
+
+            # replaying the journal onto the new snapshot is harmless if removing it fails
+            os.replace(temp_filename, self.filename)
+        except BaseException:
+            os.remove(temp_filename)
             raise
+
+        try:
+            os.remove(self.journal_filename)
+        except FileNotFoundError:
+            pass
+
+    @profiling.timed('storage.close')
+    def __exit__(self, *args, **kwargs):
+        if not self.changes:
+            return
+
+        # indexes may be missing changes committed by other processes since opening
+        self.indexes = {}
+        self.indexed_state = None
+
+        with self._lock(exclusive=True):
+            self._catch_up()
+
+            with profiling.record('storage.journal'):
+                journal_size = self._append_journal()
+            self.changes = []
+
+            if journal_size > self.journal_max_bytes:
+                with profiling.record('storage.compact'):
+                    self.compact()
+
+
+class SqliteStorageTable:
+    """
+    Storage table stored as rows of (id, JSON entry) in a SQLite table.
+
+    The id column is the primary key so exact lookups use its index while substring
+    matches scan the id column only. Entries keep their insertion order when updated.
+    """
+
+    def __init__(self,
+                 connection: sqlite3.Connection,
+                 name: str,
+                 table_cls: type,
+                 id_field: str,
+                 before_write: Callable = None):
+        self.connection = connection
+        self.name = name
+        self.table_cls = table_cls
+        self.id_field = id_field
+        self.before_write = before_write  # called before every save or delete
+
+    def __iter__(self):
+        cursor = self.connection.execute(f'SELECT data FROM {self.name} ORDER BY rowid')
+        return (self.table_cls(**json.loads(data)) for data, in cursor)
+
+    def _entry_id(self, entry):
+        try:
+            return getattr(entry, self.id_field)
+        except AttributeError as error:
+            raise errors.IllegalEntry(f'Cannot find id field {self.id_field} on entry') from error
+
+    def find(self, entry_id: str, match: callable = operator.contains) -> Any:
+        """Find first entry which either matches or contained provided id string"""
+        try:
+            return next(self.find_all(entry_id, match))
+        except StopIteration as error:
+            raise errors.NoEntryFound(f'No entries found which match {entry_id}') from error
+
+    def find_all(self, entry_id: str, match: callable = operator.contains) -> Iterator[Any]:
+        """Find all entries which either matches or contained provided id string, exact match first"""
+        if match is operator.eq:
+            cursor = self.connection.execute(
+                f'SELECT data FROM {self.name} WHERE {self.id_field} = ?',
+                (entry_id,)
+            )
+        elif match is operator.contains:
+            cursor = self.connection.execute(
+                f'SELECT data FROM {self.name} WHERE instr({self.id_field}, ?) > 0 '
+                f'ORDER BY {self.id_field} = ? DESC, rowid',
+                (entry_id, entry_id)
+            )
         else:
-            os.remove(backup_filename)
+            cursor = (
+                (data,)
+                for row_id, data in self.connection.execute(
+                    f'SELECT {self.id_field}, data FROM {self.name} ORDER BY {self.id_field} = ? DESC, rowid',
+                    (entry_id,)
+                )
+                if match(row_id, entry_id)
+            )
+
+        return (self.table_cls(**json.loads(data)) for data, in cursor)
+
+    def delete(self, entry_id: str):
+        """Remove entry which has the exact match fo the provided entry id"""
+        if self.before_write:
+            self.before_write()
+
+        row = self.connection.execute(
+            f'SELECT data FROM {self.name} WHERE {self.id_field} = ?',
+            (entry_id,)
+        ).fetchone()
+
+        if row is None:
+            raise errors.NoEntryFound(f'No entries found which match {entry_id}')
+
+        self.connection.execute(f'DELETE FROM {self.name} WHERE {self.id_field} = ?', (entry_id,))
+        return json.loads(row[0])
+
+    def save(self, entry: Any, overwrite: bool = True):
+        entry_id = self._entry_id(entry)
+        data = json.dumps(asdict(entry))
+
+        if self.before_write:
+            self.before_write()
+
+        if overwrite:
+            # update in place to keep the original insertion order
+            cursor = self.connection.execute(
+                f'UPDATE {self.name} SET data = ? WHERE {self.id_field} = ?',
+                (data, entry_id)
+            )
+            if cursor.rowcount:
+                return
+
+        try:
+            self.connection.execute(
+                f'INSERT INTO {self.name} ({self.id_field}, data) VALUES (?, ?)',
+                (entry_id, data)
+            )
+        except sqlite3.IntegrityError as error:
+            raise errors.EntryExists(f'Item {entry} already exists in storage table') from error
+
+
+class DataclassSqliteStorage(DataclassStorage):
+    """
+    Storage backed by a SQLite database file.
+
+    Opening storage starts a transaction which is committed on close, or rolled back if
+    the context exits with an exception. Only rows which are saved or deleted are written.
+
+    The database uses write-ahead logging so readers are never blocked by a concurrent
+    writer. Sessions start as read transactions and switch to a write transaction on
+    their first save or delete, waiting up to lock_timeout seconds for any other writer
+    to finish. Writes are applied to the latest state of the database (the same as the
+    file backend), as a read snapshot older than another session's commit could never
+    be written to.
+    """
+
+    lock_timeout = 30.0
+
+    def __init__(self, filename='.storage.db'):
+        self.filename = filename
+        self.connection = None
+        self.writing = False
+
+    def table(self, name: str) -> SqliteStorageTable:
+        if self.connection is None:
+            raise errors.StorageError('Storage must be opened before accessing tables')
+
+        return SqliteStorageTable(self.connection, name, *self.table_map[name], before_write=self._begin_write)
+
+    def _begin_write(self):
+        if self.writing:
+            return
+
+        # nothing has been written yet so the read transaction can simply end, unlike
+        # upgrading it in place which fails at once when another session has committed
+        self.connection.execute('COMMIT')
+        self.connection.execute('BEGIN IMMEDIATE')
+        self.writing = True
+
+    @profiling.timed('storage.open')
+    def __enter__(self):
+        # transactions are managed explicitly instead of by the sqlite3 module
+        self.connection = sqlite3.connect(self.filename, timeout=self.lock_timeout, isolation_level=None)
+
+        self.writing = False
+
+        try:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            for name, (_, id_field) in self.table_map.items():
+                self.connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {name} ({id_field} TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                )
+            self.connection.execute('BEGIN')
+        except BaseException:
+            self.connection.close()
+            self.connection = None
+            raise
+
+        return self
+
+    @profiling.timed('storage.close')
+    def __exit__(self, exc_type, *args, **kwargs):
+        try:
+            self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.connection.close()
+            self.connection = None
+
+
+BACKENDS = {
+    'json': DataclassFileStorage,
+    'sqlite': DataclassSqliteStorage,
+}
+
+
+def backend_name(filename: str) -> str:
+    """Return storage backend used for filename based on its extension"""
+    return 'sqlite' if filename.endswith(SQLITE_SUFFIXES) else 'json'
+
+
+def get_storage(filename: str = None) -> DataclassStorage:
+    """
+    Return storage for the given file (defaults to $HOMECOMP_STORAGE or .storage).
+
+    Files ending in .db, .sqlite or .sqlite3 use the SQLite backend, anything else the
+    JSON file backend.
+    """
+    filename = filename or os.getenv('HOMECOMP_STORAGE', DEFAULT_STORAGE_FILE)
+    return BACKENDS[backend_name(filename)](filename)
+
+
+def migrate_storage(source: DataclassStorage, destination: DataclassStorage) -> Dict[str, int]:
+    """Copy every entry of the opened source storage into the opened destination"""
+    counts = {}
+
+    for name in source.table_map:
+        source_table = source.table(name)
+        destination_table = destination.table(name)
+        counts[name] = 0
+
+        for entry in source_table:
+            destination_table.save(entry)
+            counts[name] += 1
+
+    return counts
@@ -34,7 +34,7 @@ setup(
     author_email=get_init_variable(PKG_NAME, '__email__'),
     license=get_init_variable(PKG_NAME, '__license__'),
     description='A home investment comparison library.',
-    packages=find_packages(exclude=['tests*']),
+    packages=find_packages(exclude=['tests*', 'benchmarks*']),
     install_requires=get_install_requirements('requirements.txt'),
     entry_points = {
         'console_scripts': [
@@ -0,0 +1,86 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from homecomp.clients import transport
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local HTTP server standing in for listing sites.
+
+    Each path is given a list of (status, headers, body, delay) responses which are served
+    in order with the last one repeated. Every request is recorded as (path, client port)
+    so tests can check which connections were used, and its headers in headers.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.routes = {}
+        self.requests = []
+        self.headers = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+    def route(self, path: str, *responses):
+        self.routes[path] = list(responses)
+
+    def next_response(self, path: str):
+        with self.lock:
+            responses = self.routes.get(path, [(404, {}, '', 0)])
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections alive
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        with self.server.lock:
+            self.server.requests.append((self.path, self.client_address[1]))
+            self.server.headers.append(dict(self.headers))
+
+        status, headers, body, delay = self.server.next_response(self.path)
+        if delay:
+            time.sleep(delay)
+
+        body = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def server():
+    stand_in = StandInServer()
+    thread = threading.Thread(target=stand_in.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+
+    yield stand_in
+
+    stand_in.shutdown()
+    stand_in.server_close()
+
+
+@pytest.fixture
+def client():
+    """Shared client without rate limits or retry delays"""
+    http_client = transport.HttpClient(rate=0, sleep=lambda seconds: None)
+    transport.set_client(http_client)
+
+    yield http_client
+
+    transport.set_client(None)
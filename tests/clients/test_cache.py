@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from homecomp import errors
+from homecomp.clients import transport
+from homecomp.clients import zillow
+from homecomp.clients.cache import ResponseCache
+from homecomp.clients.cache import normalize_url
+
+
+CAPTCHA = "<html><body><h5>Please verify you're a human to continue.</h5></body></html>"
+
+
+@pytest.fixture
+def cached_client(tmp_path, client):
+    client.cache = ResponseCache(str(tmp_path), ttl=60)
+    return client
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://WWW.Zillow.com:443/homedetails/1_zpid/?b=2&a=1#photos') == \
+        'https://www.zillow.com/homedetails/1_zpid/?a=1&b=2'
+    assert normalize_url('http://127.0.0.1:8080') == 'http://127.0.0.1:8080/'
+    assert ResponseCache.key('https://www.zillow.com/a?x=1&y=2') == \
+        ResponseCache.key('https://www.zillow.com/a?y=2&x=1')
+
+
+def test_serves_fresh_entries(server, cached_client):
+    server.route('/listing', (200, {'ETag': '"v1"'}, 'listing', 0), (200, {}, 'changed', 0))
+    url = f'{server.url}/listing'
+
+    assert cached_client.get(url).text == 'listing'
+    assert cached_client.get(url + '#photos').text == 'listing'
+    assert len(server.requests) == 1
+
+
+def test_revalidates_stale_entries(server, cached_client):
+    cached_client.cache.ttl = 0
+    last_modified = 'Wed, 21 Oct 2026 07:28:00 GMT'
+    server.route(
+        '/listing',
+        (200, {'ETag': '"v1"', 'Last-Modified': last_modified}, 'listing', 0),
+        (304, {}, '', 0),
+        (200, {'ETag': '"v2"'}, 'changed', 0),
+    )
+    url = f'{server.url}/listing'
+
+    assert cached_client.get(url).text == 'listing'
+    assert 'If-None-Match' not in server.headers[0]
+
+    # unchanged
+    assert cached_client.get(url).text == 'listing'
+    assert server.headers[1]['If-None-Match'] == '"v1"'
+    assert server.headers[1]['If-Modified-Since'] == last_modified
+
+    # changed
+    assert cached_client.get(url).text == 'changed'
+    assert cached_client.cache.get(url).etag == '"v2"'
+
+
+def test_does_not_store(server, cached_client):
+    server.route('/private', (200, {'Cache-Control': 'no-store'}, 'private', 0))
+    server.route('/captcha', (200, {}, CAPTCHA, 0))
+
+    cached_client.get(f'{server.url}/private')
+    assert cached_client.cache.get(f'{server.url}/private') is None
+
+    # pages which cannot be parsed are dropped so the next fetch tries again
+    with pytest.raises(errors.CaptchaError):
+        zillow.get_home_details(f'{server.url}/captcha')
+    assert transport.get_client() is cached_client
+    assert cached_client.cache.get(f'{server.url}/captcha') is None
+
+
+def test_evicts_least_recently_used(server, cached_client):
+    server.route('/a', (200, {}, 'a' * 1000, 0))
+    server.route('/b', (200, {}, 'b' * 1000, 0))
+
+    cached_client.get(f'{server.url}/a')
+    # entries written within the same clock tick would otherwise tie
+    cache = cached_client.cache
+    os.utime(cache._path(cache.key(f'{server.url}/a')), (0, 0))  # pylint: disable=protected-access
+    # room for one entry but not two (entry sizes vary by a few bytes)
+    cached_client.cache.max_bytes = cached_client.cache.stats().size * 3 // 2
+    cached_client.get(f'{server.url}/b')
+
+    assert cached_client.cache.stats().entries == 1
+    assert cached_client.cache.get(f'{server.url}/b') is not None
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from homecomp import clients
+from homecomp import errors
+from homecomp.clients import zillow
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks', 'fixtures', 'zillow.html')
+CAPTCHA = "<html><body><h5>Please verify you're a human to continue.</h5></body></html>"
+
+
+def test_read_links():
+    lines = [
+        'link,notes\n',
+        'https://www.zillow.com/homedetails/1_zpid/,"nice, big"\n',
+        '# https://www.zillow.com/homedetails/2_zpid/\n',
+        '\n',
+        '  https://www.estately.com/listings/info/3  \n',
+        'https://www.zillow.com/homedetails/1_zpid/\n',
+    ]
+
+    assert clients.read_links(lines) == [
+        'https://www.zillow.com/homedetails/1_zpid/',
+        'https://www.estately.com/listings/info/3',
+    ]
+
+
+def test_fetch_home_details(server, client, monkeypatch):
+    """Ensure failures of some links are reported without affecting the others"""
+    host = server.url[len('http://'):]
+    monkeypatch.setitem(clients._URL_MAPPING, host, zillow.get_home_details)  # pylint: disable=protected-access
+
+    with open(FIXTURE, 'r') as fixture_fd:
+        server.route('/home', (200, {}, fixture_fd.read(), 0))
+    server.route('/captcha', (200, {}, CAPTCHA, 0))
+
+    links = [f'{server.url}/captcha', f'{server.url}/home', 'https://www.example.com/home']
+    results = clients.fetch_home_details(links)
+
+    assert [result.link for result in results] == links
+    assert isinstance(results[0].error, errors.CaptchaError)
+    assert results[1].error is None
+    assert results[1].housing.name == '1234 Fixture St NW, Washington, DC 20001'
+    assert isinstance(results[2].error, errors.ClientNotSupported)
+
+
+def test_fetch_host_concurrency(monkeypatch):
+    """Ensure no more than host_concurrency links of one host are fetched at once"""
+    lock = threading.Lock()
+    active = defaultdict(int)
+    peak = defaultdict(int)
+
+    def _get_home_details(link):
+        host = link.split('/')[2]
+        with lock:
+            active[host] += 1
+            active['all'] += 1
+            peak[host] = max(peak[host], active[host])
+            peak['all'] = max(peak['all'], active['all'])
+
+        time.sleep(0.02)
+
+        with lock:
+            active[host] -= 1
+            active['all'] -= 1
+
+        return link
+
+    monkeypatch.setattr(clients, 'get_home_details', _get_home_details)
+    links = [f'https://{host}/{idx}' for idx in range(10) for host in ['a.test', 'b.test', 'c.test']]
+
+    results = clients.fetch_home_details(links, jobs=5, host_concurrency=2)
+
+    assert [result.housing for result in results] == links
+    assert peak['a.test'] == peak['b.test'] == peak['c.test'] == 2
+    assert peak['all'] == 5
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from homecomp import const
+from homecomp.clients import estately
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks', 'fixtures', 'estately.html')
+
+
+def test_parse_home_details():
+    with open(FIXTURE, 'r') as fixture_fd:
+        details = estately.parse_home_details(fixture_fd.read(), 'https://www.estately.com/listings/info/5678')
+
+    assert details.name == '5678 Fixture Ave NE, Washington, DC 20002'
+    assert details.type == const.HOUSING_TYPE_HOME
+    assert details.price == 549900
+    assert details.hoa == 310
+    assert details.property_tax_rate == pytest.approx(4120 / 549900)
+    assert (details.bedrooms, details.bathrooms, details.home_size, details.lot_size) == (2, 2, 1150, 870)
+    assert details.image == 'https://photos.example.com/estately/fixture-main.jpg'
+
+
+def test_parse_full_home_details():
+    """Ensure parsing only the elements holding details matches a full parse"""
+    link = 'https://www.estately.com/listings/info/5678'
+    with open(FIXTURE, 'r') as fixture_fd:
+        html = fixture_fd.read()
+
+    assert estately.parse_home_details(html, link) == estately.parse_full_home_details(html, link)
+
+
+def test_parse_fallback():
+    """Ensure details outside of the expected elements are still found by a full parse"""
+    link = 'https://www.estately.com/listings/info/5678'
+    hoa = '<div class="price-block-hoa"><small>HOA</small><div>$310/mo.</div></div>'
+    with open(FIXTURE, 'r') as fixture_fd:
+        html = fixture_fd.read().replace(hoa, '').replace('</body>', f'{hoa}</body>')
+
+    details = estately.parse_home_details(html, link)
+    assert details.hoa == 310
+    assert details == estately.parse_full_home_details(html, link)
+
+
+def test_get_home_details(server, client):
+    """Ensure listings are fetched through the shared client"""
+    with open(FIXTURE, 'r') as fixture_fd:
+        server.route('/listings/info/1234', (503, {}, '', 0), (200, {}, fixture_fd.read(), 0))
+
+    link = f'{server.url}/listings/info/1234'
+    with open(FIXTURE, 'r') as fixture_fd:
+        assert estately.get_home_details(link) == estately.parse_home_details(fixture_fd.read(), link)
+    assert len(server.requests) == 2
@@ -0,0 +1,34 @@
+import pytest
+
+from homecomp.clients import extract
+
+
+@pytest.mark.parametrize('page, expected', [
+    ('<html><head><title> 1 Main St &amp; Co | Listing </title></head></html>', '1 Main St & Co | Listing'),
+    ('<TITLE lang="en">\n1 Main St\n</TITLE >', '1 Main St'),
+    ('<title><b>1 Main St</b></title>', None),
+    ('<html><head></head></html>', None),
+])
+def test_title(page, expected):
+    assert extract.title(page) == expected
+
+
+@pytest.mark.parametrize('page, expected', [
+    ('<script id="data" type="application/json">{"a": "&amp;"}</script>', '{"a": "&amp;"}'),
+    ("<script type='application/json' id='data'>{}</SCRIPT>", '{}'),
+    ('<script id=data>{}</script>', '{}'),
+    ('<script id="data-more">{}</script><script data-id="data">{}</script>', None),
+    ('<script id="data">{}', None),
+])
+def test_script(page, expected):
+    assert extract.script(page, 'data') == expected
+
+
+@pytest.mark.parametrize('page, expected', [
+    ('<p></p><div class="a b"><div>x</div></div><div></div>', (7, 42)),
+    ('<div class="other"></div><DIV class=\'b c\'></DIV>', (25, 48)),
+    ('<div class="bb"></div><span class="b"></span>', None),
+    ('<div class="b"><div></div>', None),
+])
+def test_element_span(page, expected):
+    assert extract.element_span(page, 'div', 'b') == expected
@@ -0,0 +1,90 @@
+import pytest
+import requests
+
+from homecomp.clients import transport
+from homecomp.clients.transport import HttpClient
+from homecomp.clients.transport import RateLimiter
+
+
+def _client(**kwargs):
+    delays = []
+    kwargs = {'rate': 0, 'backoff': 0.5, 'sleep': delays.append, **kwargs}
+    return HttpClient(**kwargs), delays
+
+
+def test_reuses_connections(server):
+    server.route('/listing', (200, {}, 'ok', 0))
+    client, _ = _client()
+
+    for _ in range(3):
+        assert client.get(f'{server.url}/listing').text == 'ok'
+
+    assert len({port for _, port in server.requests}) == 1
+    assert client.session(server.url[len('http://'):]).headers['user-agent'] == transport.HEADERS['user-agent']
+
+
+def test_retries_with_backoff(server, monkeypatch):
+    monkeypatch.setattr('random.uniform', lambda low, high: high)
+    server.route('/flaky', (503, {}, '', 0), (500, {}, '', 0), (429, {'Retry-After': '7'}, '', 0), (200, {}, 'ok', 0))
+    client, delays = _client()
+
+    assert client.get(f'{server.url}/flaky').text == 'ok'
+    # doubled each retry unless the server asks to wait longer
+    assert delays == [0.5, 1.0, 7.0]
+    assert len(server.requests) == 4
+
+
+def test_gives_up_after_retries(server):
+    server.route('/down', (503, {}, '', 0))
+    server.route('/missing', (404, {}, '', 0))
+    client, delays = _client(retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(f'{server.url}/down')
+    assert len(delays) == 2
+
+    # client errors are not retried
+    with pytest.raises(requests.HTTPError):
+        client.get(f'{server.url}/missing')
+    assert len(delays) == 2
+
+
+def test_retries_timeouts(server):
+    server.route('/slow', (200, {}, 'slow', 0.5), (200, {}, 'ok', 0))
+    client, delays = _client(timeout=(1, 0.1))
+
+    assert client.get(f'{server.url}/slow').text == 'ok'
+    assert len(delays) == 1
+
+    server.route('/slow', (200, {}, 'slow', 0.5))
+    client, _ = _client(timeout=(1, 0.1), retries=0)
+
+    with pytest.raises(requests.Timeout):
+        client.get(f'{server.url}/slow')
+
+
+def test_rate_limiter():
+    now = [0.0]
+    waits = []
+
+    def _sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(4, clock=lambda: now[0], sleep=_sleep)
+    for _ in range(3):
+        limiter.acquire()
+
+    assert waits == [0.25, 0.25]
+
+    now[0] += 10
+    limiter.acquire()
+    assert waits == [0.25, 0.25]
+
+
+def test_rate_limits_per_host():
+    client, _ = _client(rate=2, rate_limits={'www.zillow.com': 0.5})
+
+    assert client.limiter('www.zillow.com').interval == 2
+    assert client.limiter('www.estately.com').interval == 0.5
+    assert client.limiter('www.zillow.com') is client.limiter('www.zillow.com')
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from homecomp import const
+from homecomp import errors
+from homecomp.clients import zillow
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks', 'fixtures', 'zillow.html')
+
+
+def test_parse_home_details():
+    with open(FIXTURE, 'r') as fixture_fd:
+        details = zillow.parse_home_details(fixture_fd.read(), 'https://www.zillow.com/homedetails/5550001_zpid/')
+
+    assert details.name == '1234 Fixture St NW, Washington, DC 20001'
+    assert details.type == const.HOUSING_TYPE_HOME
+    assert details.price == 725000
+    assert details.hoa == 125
+    assert details.property_tax_rate == pytest.approx(5612.4 / 725000)
+    assert (details.bedrooms, details.bathrooms, details.home_size, details.lot_size) == (3, 2.5, 1840, 1620)
+    assert details.image == 'https://photos.example.com/p_d/fixture-main.jpg'
+
+
+def test_parse_full_home_details():
+    """Ensure the preloaded data pulled straight from the page matches a full parse"""
+    link = 'https://www.zillow.com/homedetails/5550001_zpid/'
+    with open(FIXTURE, 'r') as fixture_fd:
+        html = fixture_fd.read()
+
+    assert zillow.parse_home_details(html, link) == zillow.parse_full_home_details(html, link)
+
+
+@pytest.mark.parametrize('old, new, full', [
+    ('', '', False),
+    ('<title>', '<title><span>', True),
+    ('id="hdpApolloPreloadedData"', 'id="otherPreloadedData"', True),
+    ('FullRenderQuery', 'PartialRenderQuery', True),
+])
+def test_parse_fallback(monkeypatch, old, new, full):
+    """Ensure pages where the title or preloaded data cannot be pulled out are fully parsed"""
+    monkeypatch.setattr(zillow, 'parse_full_home_details', lambda html, link: 'full')
+    with open(FIXTURE, 'r') as fixture_fd:
+        html = fixture_fd.read().replace(old, new)
+
+    assert (zillow.parse_home_details(html, 'https://www.zillow.com/homedetails/5550001_zpid/') == 'full') is full
+
+
+def test_parse_captcha():
+    html = "<html><body><h5>Please verify you're a human to continue.</h5></body></html>"
+
+    with pytest.raises(errors.CaptchaError):
+        zillow.parse_home_details(html, 'https://www.zillow.com/homedetails/5550001_zpid/')
+
+
+def test_get_home_details(server, client):
+    """Ensure listings are fetched through the shared client"""
+    with open(FIXTURE, 'r') as fixture_fd:
+        server.route('/homedetails/5550001_zpid/', (503, {}, '', 0), (200, {}, fixture_fd.read(), 0))
+
+    link = f'{server.url}/homedetails/5550001_zpid/'
+    with open(FIXTURE, 'r') as fixture_fd:
+        assert zillow.get_home_details(link) == zillow.parse_home_details(fixture_fd.read(), link)
+    assert len(server.requests) == 2
@@ -0,0 +1,60 @@
+import pytest
+
+from homecomp import analytic
+from homecomp import compute
+from homecomp import const
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_batch
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+PROFILES = [
+    PurchaserProfile(name='min', cash=150000, budget=5000),
+    PurchaserProfile(name='tight', cash=20000, budget=1500),
+    PurchaserProfile(name='payoff', cash=150000, budget=40000, home_appreciation=0.05),
+]
+
+HOUSING = [
+    HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME),
+    HousingDetail(name='Condo', price=425000, type=const.HOUSING_TYPE_HOME, hoa=650, property_tax_rate=0.0085),
+    HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL),
+]
+
+
+def _scenarios(profiles, housing):
+    return ScenarioArrays.from_pairs([
+        (purchaser, details)
+        for purchaser in profiles
+        for details in housing
+    ])
+
+
+@pytest.mark.parametrize("years", [1, 2, 5, 30, 40])
+def test_closed_form_matches_simulation(years):
+    """Ensure closed forms stay within cents of the month by month simulation"""
+    check = analytic.cross_check(_scenarios(PROFILES, HOUSING), years)
+
+    assert check.average_cost_error.max() < 0.01
+    assert check.asset_delta_error.max() < 1
+
+
+def test_max_mortgage_falls_back_to_simulation():
+    """Ensure scenarios without a closed form are simulated instead"""
+    profiles = [PurchaserProfile(name='max', cash=150000, budget=5000, mortgage_type='max')]
+    scenarios = _scenarios(profiles + PROFILES[:1], HOUSING)
+    batch = simulate_batch(scenarios, 10, series=False)
+
+    average_cost, asset_delta = analytic.summarize_many(scenarios, 10)
+
+    # only the homes need a MaxMortgage, the rental still has a closed form
+    assert average_cost[:2].tolist() == batch.average_cost[:2].tolist()
+    assert asset_delta[:2].tolist() == batch.asset_delta[:2].tolist()
+
+
+@pytest.mark.parametrize("housing", HOUSING)
+def test_summarize_analytic_engine(housing):
+    purchaser = PROFILES[0]
+
+    assert compute.summarize(purchaser, housing, 15, engine=const.ENGINE_ANALYTIC) == \
+        pytest.approx(compute.summarize(purchaser, housing, 15), abs=1)
@@ -0,0 +1,34 @@
+from benchmarks import harness
+
+
+def _results(**timings):
+    return {
+        'benchmarks': {
+            name: {'best': best, 'median': best, 'number': 1, 'rounds': [best]}
+            for name, best in timings.items()
+        }
+    }
+
+
+def test_compare():
+    comparisons = harness.compare(
+        _results(same=1.0, slower=1.5, faster=0.5, new=1.0),
+        _results(same=1.1, slower=1.0, faster=1.0, removed=1.0),
+        tolerance=0.25,
+    )
+
+    assert {comparison.name: comparison.status for comparison in comparisons} == {
+        'same': 'ok',
+        'slower': 'regression',
+        'faster': 'improvement',
+        'new': 'new',
+        'removed': 'missing',
+    }
+
+
+def test_measure():
+    timing = harness.measure(lambda: sum(range(100)), repeat=3)
+
+    assert timing.number >= 1
+    assert len(timing.rounds) == 3
+    assert 0 < timing.best <= timing.median
@@ -0,0 +1,86 @@
+import random
+
+from homecomp import compute
+from homecomp import const
+from homecomp.breakeven import breakeven_month
+from homecomp.breakeven import breakeven_price
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_months
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=550000, type=const.HOUSING_TYPE_HOME)
+RENTAL = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+
+def _brute_force_months(cases, max_years):
+    """Return the earliest break even month of each (purchaser, home, rental) by simulating every month"""
+    scenarios = ScenarioArrays.from_pairs([
+        pair
+        for purchaser, home, rental in cases
+        for pair in [(purchaser, home), (purchaser, rental)]
+    ])
+    months = [None] * len(cases)
+
+    for month in range(1, max_years * const.PERIODS_PER_YEAR + 1):
+        deltas = simulate_months(scenarios, month, series=False).asset_delta.tolist()
+        for idx in range(len(cases)):
+            if months[idx] is None and deltas[2 * idx] > deltas[2 * idx + 1]:
+                months[idx] = month
+
+    return months
+
+
+def _random_case(rng):
+    price = rng.randrange(200000, 900000, 5000)
+    return (
+        PurchaserProfile(
+            name='random',
+            cash=rng.randrange(int(price * 0.08), int(price * 0.4), 1000),
+            budget=rng.randrange(3000, 12000, 100),
+            mortgage_type=rng.choice(['min', 'max']),
+            home_appreciation=rng.uniform(0, 0.06),
+        ),
+        HousingDetail(
+            name='home',
+            price=price,
+            type=const.HOUSING_TYPE_HOME,
+            hoa=rng.randrange(0, 600, 10),
+            property_tax_rate=rng.uniform(0.004, 0.02),
+        ),
+        HousingDetail(name='rental', price=rng.randrange(1200, 4500, 50), type=const.HOUSING_TYPE_RENTAL),
+    )
+
+
+def test_breakeven_month():
+    """Ensure bisection finds the same month as checking every month"""
+    month = breakeven_month(PURCHASER, HOME, RENTAL, 15)
+
+    assert month is not None
+    assert [month] == _brute_force_months([(PURCHASER, HOME, RENTAL)], 15)
+    assert breakeven_month(PURCHASER, HOME, RENTAL, month // const.PERIODS_PER_YEAR - 1) is None
+
+
+def test_breakeven_month_random():
+    """Ensure the earliest month is found even where buying falls back behind renting after catching up"""
+    rng = random.Random(7)
+    cases = [_random_case(rng) for _ in range(40)]
+    max_years = 10
+
+    expected = _brute_force_months(cases, max_years)
+
+    assert [breakeven_month(*case, max_years) for case in cases] == expected
+    assert any(month is not None for month in expected)
+
+
+def test_breakeven_price():
+    """Ensure price breaks even while anything above tolerance does not"""
+    price = breakeven_price(PURCHASER, HOME, RENTAL, 5, tolerance=100)
+    _, rent_delta = compute.summarize(PURCHASER, RENTAL, 5)
+
+    _, at_price = compute.summarize(PURCHASER, HousingDetail('home', price, const.HOUSING_TYPE_HOME), 5)
+    _, above_price = compute.summarize(PURCHASER, HousingDetail('home', price + 100, const.HOUSING_TYPE_HOME), 5)
+
+    assert at_price >= rent_delta > above_price
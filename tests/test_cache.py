@@ -0,0 +1,101 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp.cache import ResultCache
+from homecomp.clients.cache import CachedResponse
+from homecomp.clients.cache import ResponseCache
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.common import asset_delta
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME, hoa=150)
+
+
+def test_key_changes_with_inputs():
+    """Ensure edited listings do not reuse stale results"""
+    key = ResultCache.key('simulation', PURCHASER, HOME, 5)
+
+    assert key == ResultCache.key('simulation', PURCHASER, HOME, 5)
+    assert key != ResultCache.key('simulation', PURCHASER, HOME, 6)
+    assert key != ResultCache.key('simulation', PURCHASER, HousingDetail(**{**HOME.__dict__, 'hoa': 200}), 5)
+
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    assert cache.get('missing') is None
+
+    cache.put('entry', {'values': [1.5, 2.5]})
+
+    assert np.array_equal(cache.get('entry')['values'], [1.5, 2.5])
+    assert cache.stats().entries == 1
+
+    cache.clear()
+
+    assert cache.get('entry') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for idx in range(3):
+        cache.put(f'entry-{idx}', {'values': np.zeros(1000)})
+        os.utime(os.path.join(tmp_path, f'entry-{idx}.npz'), (idx, idx))
+
+    cache.get('entry-0')  # most recently used
+    cache.max_bytes = cache.stats().size * 2 // 3
+    cache.evict()
+
+    assert cache.get('entry-0') is not None
+    assert cache.get('entry-1') is None
+    assert cache.get('entry-2') is not None
+
+
+def test_nested_caches(tmp_path):
+    """Ensure clearing or sizing the result cache leaves the HTTP cache within it alone"""
+    result_cache = ResultCache(str(tmp_path))
+    response_cache = ResponseCache(str(tmp_path / 'http'))
+    url = 'https://example.com/'
+
+    result_cache.put('entry', {'values': np.zeros(10)})
+    response_cache.put(url, CachedResponse(url=url, body='listing', fetched=0))
+
+    assert result_cache.stats().entries == 1
+    assert response_cache.stats().entries == 1
+
+    result_cache.clear()
+
+    assert result_cache.stats().entries == 0
+    assert response_cache.get(url).body == 'listing'
+
+
+@pytest.mark.parametrize('cache_class, key, entry', [
+    (ResultCache, 'entry', {'values': np.zeros(10)}),
+    (ResponseCache, 'https://example.com/', CachedResponse(url='https://example.com/', body='', fetched=0)),
+])
+def test_pickle(tmp_path, cache_class, key, entry):
+    """Ensure caches can be shared with worker processes"""
+    cache = pickle.loads(pickle.dumps(cache_class(str(tmp_path))))
+    cache.put(key, entry)
+
+    assert cache.directory == str(tmp_path)
+    assert cache.stats().entries == 1
+
+
+def test_cached_buy_matches_uncached(tmp_path):
+    """Ensure results restored from the cache match a fresh computation"""
+    cache = ResultCache(str(tmp_path))
+    expected_expenses, expected_items = compute.buy(PURCHASER, HOME, 5)
+
+    compute.buy(PURCHASER, HOME, 5, cache=cache)
+    expenses, budget_items = compute.buy(PURCHASER, HOME, 5, cache=cache)
+
+    assert cache.stats().entries == 1
+    assert list(expenses) == list(expected_expenses)
+    assert asset_delta(budget_items) == asset_delta(expected_items)
@@ -0,0 +1,91 @@
+from itertools import islice
+
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp.budget_items.assets import Investment
+from homecomp.budget_items.composite import HomeLifetime
+from homecomp.budget_items.liabilities import MinMortgage
+from homecomp.models import HousingDetail
+from homecomp.models import MonthlyBudget
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.common import asset_delta
+from homecomp.outputs.common import average_cost
+from homecomp.outputs.common import get_expense_table
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME, hoa=150)
+RENTAL = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+
+@pytest.mark.parametrize("years, appreciation, apr, down_payment_pct", [
+    (5, 0.03, 0.03, 0.20),
+    (7, 0.01, 0.055, 0.10),
+    (3, 0.05, 0.04, 0.35),
+])
+def test_sweep_matches_loop(years, appreciation, apr, down_payment_pct):
+    """Ensure sweep cells match the reference loop run with the same parameters"""
+    cells = compute.sweep(
+        PURCHASER,
+        HOME,
+        years=[1, years],
+        appreciation=[0.02, appreciation],
+        mortgage_apr=[apr],
+        down_payment_pct=[down_payment_pct, 0.5],
+    )
+    cell = next(
+        cell for cell in cells
+        if (cell.years, cell.appreciation, cell.down_payment_pct) == (years, appreciation, down_payment_pct)
+    )
+
+    periods = years * const.PERIODS_PER_YEAR
+    budget_items = [
+        HomeLifetime(
+            name=HOME.name,
+            lifetime=list(range(periods)),
+            price=HOME.price,
+            property_tax_rate=HOME.property_tax_rate,
+            hoa_fee=HOME.hoa,
+            appreciation=const.yearly_to_period_rate(appreciation),
+            down_payment_pct=down_payment_pct,
+        ),
+        MinMortgage(
+            price=HOME.price,
+            rate=const.yearly_to_period_rate(apr),
+            down_payment_pct=down_payment_pct,
+            start=0,
+        ),
+        Investment(PURCHASER.cash),
+    ]
+    expenses = compute.compute(MonthlyBudget(PURCHASER.budget), budget_items, periods + 1)
+
+    assert len(cells) == 8
+    assert (cell.average_cost, cell.asset_delta) == (average_cost(expenses), asset_delta(budget_items))
+
+
+def test_sweep_reuses_rental_scenarios():
+    """Ensure home only parameters do not change rental results"""
+    cells = compute.sweep(PURCHASER, RENTAL, years=[4], mortgage_apr=[0.03, 0.06], down_payment_pct=[0.1, 0.2])
+
+    assert len(cells) == 4
+    assert len({(cell.average_cost, cell.asset_delta) for cell in cells}) == 1
+    assert (cells[0].average_cost, cells[0].asset_delta) == compute.summarize(PURCHASER, RENTAL, 4)
+
+
+def test_compute_series_matches_expense_trees():
+    """Ensure compact expenses match the expense trees built by compute_iter"""
+    periods = 3 * const.PERIODS_PER_YEAR + 1
+    budget_items = compute.buy_items(PURCHASER, HOME, 3)
+    computation = compute.compute_iter(MonthlyBudget(PURCHASER.budget), compute.buy_items(PURCHASER, HOME, 3))
+    expected = list(islice(computation, periods))
+
+    expenses = compute.compute(MonthlyBudget(PURCHASER.budget), budget_items, periods)
+
+    assert len(expenses) == periods
+    assert list(expenses) == expected
+    assert expenses[-1] == expected[-1]
+    assert list(expenses[12:24]) == expected[12:24]
+    assert average_cost(expenses) == average_cost(expected)
+    assert get_expense_table(expenses) == get_expense_table(expected)
@@ -0,0 +1,88 @@
+from itertools import product
+
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_month_horizons
+from homecomp.engine import simulate_months
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.common import get_asset_table
+from homecomp.outputs.common import get_expense_table
+
+
+PROFILES = [
+    PurchaserProfile(name='min', cash=150000, budget=5000),
+    PurchaserProfile(name='max', cash=150000, budget=5000, mortgage_type='max', home_appreciation=0.05),
+    PurchaserProfile(name='tight', cash=20000, budget=1500),
+]
+
+HOUSING = [
+    HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME),
+    HousingDetail(name='Condo', price=425000, type=const.HOUSING_TYPE_HOME, hoa=650, property_tax_rate=0.0085),
+    HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL),
+]
+
+
+@pytest.mark.parametrize("purchaser", PROFILES)
+@pytest.mark.parametrize("housing", HOUSING)
+@pytest.mark.parametrize("years", [1, 5, 30])
+def test_numpy_engine_matches_loop(purchaser, housing, years):
+    """Ensure array engine produces the same expenses and asset values as the reference loop"""
+    method = compute.buy if housing.type == const.HOUSING_TYPE_HOME else compute.rent
+    loop_expenses, loop_items = method(purchaser, housing, years, engine=const.ENGINE_LOOP)
+    numpy_expenses, numpy_items = method(purchaser, housing, years, engine=const.ENGINE_NUMPY)
+
+    assert get_expense_table(loop_expenses) == get_expense_table(numpy_expenses)
+    assert get_asset_table(loop_items, len(loop_expenses) - 1) == \
+        get_asset_table(numpy_items, len(numpy_expenses) - 1)
+
+    loop_summary = compute.summarize(purchaser, housing, years, engine=const.ENGINE_LOOP)
+    numpy_summary = compute.summarize(purchaser, housing, years, engine=const.ENGINE_NUMPY)
+    assert loop_summary == pytest.approx(numpy_summary, abs=0.005)
+
+
+@pytest.mark.parametrize("years", [1, 5, 30])
+def test_simulate_many_matches_loop(years):
+    """Ensure batched scenarios match running every pair through the reference loop"""
+    batch = compute.simulate_many(PROFILES, HOUSING, years)
+
+    for idx, (purchaser, housing) in enumerate(batch.pairs):
+        method = compute.buy if housing.type == const.HOUSING_TYPE_HOME else compute.rent
+        expenses, _ = method(purchaser, housing, years)
+
+        assert batch.costs[idx].tolist() == [expense.costs for expense in expenses]
+        assert batch.savings[idx].tolist() == [expense.savings for expense in expenses]
+        assert (batch.average_cost[idx], batch.asset_delta[idx]) == \
+            compute.summarize(purchaser, housing, years)
+
+
+def test_simulate_multi_year_matches_each_horizon():
+    """Ensure horizons derived from a single simulation match simulating each horizon separately"""
+    limit = 6
+    horizons = compute.simulate_multi_year(PROFILES, HOUSING, limit)
+
+    for years in range(1, limit + 1):
+        batch = compute.simulate_many(PROFILES, HOUSING, years, series=False)
+
+        assert horizons.average_cost[:, years - 1].tolist() == batch.average_cost.tolist()
+        assert horizons.asset_delta[:, years - 1].tolist() == batch.asset_delta.tolist()
+
+        for idx, (purchaser, housing) in enumerate(horizons.pairs):
+            assert (horizons.average_cost[idx, years - 1], horizons.asset_delta[idx, years - 1]) == \
+                compute.summarize(purchaser, housing, years, engine=const.ENGINE_LOOP)
+
+
+def test_simulate_month_horizons_matches_each_month():
+    """Ensure monthly horizons derived from a single simulation match simulating each month separately"""
+    scenarios = ScenarioArrays.from_pairs(list(product(PROFILES, HOUSING)))
+    months = 15
+    horizons = simulate_month_horizons(scenarios, months)
+
+    for month in range(1, months + 1):
+        batch = simulate_months(scenarios, month, series=False)
+
+        assert horizons.average_cost[:, month - 1].tolist() == batch.average_cost.tolist()
+        assert horizons.asset_delta[:, month - 1].tolist() == batch.asset_delta.tolist()
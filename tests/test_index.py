@@ -0,0 +1,45 @@
+import operator
+
+from homecomp.index import SubstringIndex
+
+
+IDS = ['12 Main St. NW', 'Main St. Apartments', '1 Elm St.', 'Main']
+
+
+def test_search_builds_lazily():
+    index = SubstringIndex()
+
+    # short queries and other matches always scan
+    assert index.search(IDS, 'St', operator.contains) is None
+    assert index.search(IDS, 'main', lambda name, value: value in name.lower()) is None
+    assert not index.built
+
+    assert index.search(IDS, 'Main', operator.contains) == ['Main', '12 Main St. NW', 'Main St. Apartments']
+    assert index.built
+
+
+def test_search_matches_scan():
+    index = SubstringIndex()
+    index.build(IDS)
+
+    for query in ['Main', 'St. ', 'Elm St.', ' NW', 'Apartments', 'Oak', '1 E', 'Mainx']:
+        for match in [operator.contains, str.startswith]:
+            expected = [entry_id for entry_id in IDS if match(entry_id, query)]
+            if query in expected:
+                expected.remove(query)
+                expected.insert(0, query)
+
+            assert index.search(IDS, query, match) == expected
+
+
+def test_add_remove():
+    index = SubstringIndex()
+    index.build(IDS)
+
+    index.remove('12 Main St. NW')
+    index.add('9 Main St.')
+    index.add('Main St. Apartments')
+
+    assert index.search(None, 'Main St', operator.contains) == ['Main St. Apartments', '9 Main St.']
+    assert index.search(None, 'Ma', str.startswith) == ['Main St. Apartments', 'Main']
+    assert index.search(None, '12 Main', operator.contains) == []
@@ -0,0 +1,30 @@
+from homecomp import const
+from homecomp.budget_items.liabilities import MinMortgage
+from homecomp.models import MonthlyBudget
+from homecomp.models import PeriodValues
+
+
+def test_period_values_with_unwritten_periods():
+    """Ensure unwritten periods are distinguished from written ones"""
+    values = PeriodValues(5)
+    values[1] = 7
+    values[4] = 9
+
+    assert values[const.INIT_PERIOD] == 5
+    assert 0 not in values
+    assert values.get(0) is None
+    assert values.latest(2) == 7
+    assert values.latest(10) == 9
+    assert values.to_array(-3, 7, default=1).tolist() == [1, 1, 5, 1, 7, 1, 1, 9, 1, 1]
+
+
+def test_period_values_match_period_value():
+    """Ensure the vector accessor returns the same values as reading each period"""
+    mortgage = MinMortgage(price=300000, rate=0.04 / 12, down_payment_pct=0.2, mortgage_years=1, start=3)
+    for _ in range(20):
+        mortgage.step(MonthlyBudget(1000))
+
+    assert mortgage.get_period_values(const.INIT_PERIOD - 2, 25).tolist() == [
+        mortgage.get_period_value(period)
+        for period in range(const.INIT_PERIOD - 2, 25)
+    ]
@@ -0,0 +1,39 @@
+from homecomp import compute
+from homecomp import const
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.montecarlo import RateModel
+from homecomp.montecarlo import simulate_paths
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOUSING = [
+    HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME, hoa=200),
+    HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL),
+]
+
+
+def test_simulate_paths_without_volatility():
+    """Ensure paths without any rate volatility match the deterministic simulation"""
+    model = RateModel(
+        home_appreciation_volatility=0,
+        investment_return_volatility=0,
+        rent_increase_volatility=0,
+    )
+
+    for housing in HOUSING:
+        simulation = simulate_paths(PURCHASER, housing, 5, paths=3, model=model)
+        batch = compute.simulate_many([PURCHASER], [housing], 5)
+
+        columns = [0] + [year * const.PERIODS_PER_YEAR + 1 for year in range(1, 6)]
+        yearly = batch.networth[0, columns].tolist()
+        assert simulation.networth.tolist() == [yearly] * 3
+
+
+def test_simulate_paths_is_seeded():
+    """Ensure the same seed produces the same paths"""
+    first = simulate_paths(PURCHASER, HOUSING[0], 3, paths=50, seed=7)
+    second = simulate_paths(PURCHASER, HOUSING[0], 3, paths=50, seed=7)
+
+    assert first.networth.tolist() == second.networth.tolist()
+    assert first.percentiles().shape == (3, 4)
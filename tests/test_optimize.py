@@ -0,0 +1,59 @@
+import pytest
+
+from homecomp import const
+from homecomp import optimize
+from homecomp.engine import ScenarioArrays
+from homecomp.engine import simulate_batch
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME)
+CONDO = HousingDetail(name='Condo', price=425000, type=const.HOUSING_TYPE_HOME, hoa=650)
+
+
+def _exhaustive_best(purchaser, housing, years, down_payments):
+    best = None
+
+    for mortgage_type in optimize.MORTGAGE_TYPES:
+        for term in optimize.DEFAULT_MORTGAGE_TERMS:
+            profile = PurchaserProfile(**{**vars(purchaser), 'mortgage_type': mortgage_type})
+            scenarios = ScenarioArrays.from_pairs([(profile, housing)] * len(down_payments)).with_mortgage(
+                down_payment_pct=down_payments,
+                mortgage_years=term,
+            )
+            deltas = simulate_batch(scenarios, years, series=False).asset_delta
+            best = max(best or -float('inf'), deltas.max())
+
+    return best
+
+
+@pytest.mark.parametrize("purchaser", [
+    PurchaserProfile(name='rich', cash=400000, budget=9000),
+    PurchaserProfile(name='tight', cash=60000, budget=4000, home_appreciation=0.01),
+])
+@pytest.mark.parametrize("housing", [HOME, CONDO])
+@pytest.mark.parametrize("years", [1, 10])
+def test_optimize_matches_exhaustive_search(purchaser, housing, years):
+    """Ensure pruning never skips the best strategy on the grid"""
+    down_payments = optimize.down_payment_grid(purchaser, housing)
+    result = optimize.optimize(purchaser, housing, years, down_payments)
+
+    assert result.best.asset_delta == pytest.approx(_exhaustive_best(purchaser, housing, years, down_payments))
+    assert len(result.strategies) <= result.candidates
+
+
+def test_down_payment_grid_fits_cash():
+    purchaser = PurchaserProfile(name='tight', cash=60000, budget=4000)
+    down_payments = optimize.down_payment_grid(purchaser, HOME)
+
+    assert down_payments[0] == optimize.DEFAULT_MIN_DOWN_PAYMENT_PCT
+    assert HOME.price * (down_payments[-1] + const.DEFAULT_HOME_BUYING_COSTS_PCT) <= purchaser.cash
+    assert not optimize.down_payment_grid(PurchaserProfile(name='broke', cash=1000, budget=4000), HOME)
+
+
+def test_optimize_rental():
+    rental = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+    with pytest.raises(ValueError):
+        optimize.optimize(PurchaserProfile(name='rich', cash=400000, budget=9000), rental, 5, [0.2])
@@ -0,0 +1,42 @@
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp import outputs
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME, hoa=150)
+RENTAL = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+
+@pytest.mark.parametrize("choice", outputs.FORMATS)
+@pytest.mark.parametrize("housing", [HOME, RENTAL])
+def test_stream_matches_write(tmp_path, choice, housing):
+    """Ensure streamed output files are identical to output written from a full computation"""
+    method = compute.buy if housing.type == const.HOUSING_TYPE_HOME else compute.rent
+    expenses, budget_items = method(PURCHASER, housing, 3)
+    outputs.write(choice, housing, budget_items, expenses, str(tmp_path / 'write'))
+
+    expenses, budget_items = compute.stream(PURCHASER, housing, 3)
+    outputs.stream(choice, housing, budget_items, expenses, str(tmp_path / 'stream'))
+
+    written = sorted((tmp_path / 'write').iterdir())
+    streamed = sorted((tmp_path / 'stream').iterdir())
+
+    assert [path.name for path in written] == [path.name for path in streamed]
+    for written_path, streamed_path in zip(written, streamed):
+        assert written_path.read_text() == streamed_path.read_text()
+
+
+def test_stream_csv_matches_write_without_expenses(tmp_path):
+    """Ensure streamed csv files match written ones when there are no expense periods"""
+    _, budget_items = compute.stream(PURCHASER, HOME, 1)
+    outputs.write('csv', HOME, budget_items, [], str(tmp_path / 'write'))
+    outputs.stream('csv', HOME, budget_items, iter([]), str(tmp_path / 'stream'))
+
+    for name in [f'{HOME.name}.assets.csv', f'{HOME.name}.expenses.csv']:
+        assert (tmp_path / 'write' / name).read_text() == (tmp_path / 'stream' / name).read_text()
+    assert (tmp_path / 'stream' / f'{HOME.name}.expenses.csv').read_text().strip() == 'Time'
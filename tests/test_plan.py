@@ -0,0 +1,67 @@
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp.budget_items.assets import Investment
+from homecomp.budget_items.misc import Rent
+from homecomp.models import BudgetLineItem
+from homecomp.models import HousingDetail
+from homecomp.models import MonthlyBudget
+from homecomp.models import NetworthMixin
+from homecomp.models import PurchaserProfile
+from homecomp.plan import StepPlan
+
+
+PROFILES = [
+    PurchaserProfile(name='min', cash=150000, budget=5000),
+    PurchaserProfile(name='max', cash=150000, budget=5000, mortgage_type='max', home_appreciation=0.05),
+    PurchaserProfile(name='tight', cash=20000, budget=1500),
+    PurchaserProfile(name='payoff', cash=900000, budget=20000),
+]
+
+HOUSING = [
+    HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME),
+    HousingDetail(name='Condo', price=425000, type=const.HOUSING_TYPE_HOME, hoa=650, property_tax_rate=0.0085),
+    HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL),
+]
+
+
+def _items(purchaser, housing, years):
+    items_func = compute.buy_items if housing.type == const.HOUSING_TYPE_HOME else compute.rent_items
+    return items_func(purchaser, housing, years)
+
+
+def _values(budget_items, periods):
+    return [
+        (item.period, item.get_period_values(const.INIT_PERIOD, periods + 1).tolist())
+        for item in budget_items
+        if isinstance(item, NetworthMixin)
+    ]
+
+
+@pytest.mark.parametrize("purchaser", PROFILES)
+@pytest.mark.parametrize("housing", HOUSING)
+@pytest.mark.parametrize("years", [1, 5, 30])
+def test_plan_matches_stepping_items(purchaser, housing, years):
+    """Ensure a compiled plan produces the same expenses and item state as stepping each item"""
+    periods = years * const.PERIODS_PER_YEAR + 1
+    root = BudgetLineItem(name='total', budget_items=_items(purchaser, housing, years))
+    expected = [root.step(MonthlyBudget(purchaser.budget)) for _ in range(periods)]
+
+    budget_items = _items(purchaser, housing, years)
+    plan = StepPlan(MonthlyBudget(purchaser.budget), budget_items)
+
+    assert [plan.expense() for _ in range(periods)] == expected
+    assert _values(budget_items, periods) == _values(root.budget_items, periods)
+
+
+def test_unsupported_items_are_stepped_directly():
+    """Ensure computation falls back to stepping items which have no compiled step function"""
+    class FlatRent(Rent):
+        def _step(self, budget):
+            return super()._step(budget)
+
+    expected = compute.compute(MonthlyBudget(3000), [Rent(2000), Investment(1000)], 25)
+    expenses = compute.compute(MonthlyBudget(3000), [FlatRent(2000, name='Rent'), Investment(1000)], 25)
+
+    assert list(expenses) == list(expected)
@@ -0,0 +1,83 @@
+import json
+import pstats
+
+from homecomp import compute
+from homecomp import const
+from homecomp import parallel
+from homecomp import profiling
+from homecomp.models import BudgetItem
+from homecomp.models import HousingDetail
+from homecomp.models import MonthlyBudget
+from homecomp.models import MonthlyExpense
+from homecomp.models import PurchaserProfile
+from homecomp.outputs import write
+
+
+PURCHASER = PurchaserProfile(name='min', cash=150000, budget=5000)
+HOME = HousingDetail(name='Row Home', price=650000, type=const.HOUSING_TYPE_HOME)
+
+
+def _buy_task(shared, years):
+    return compute.summarize(shared, HOME, years)
+
+
+def test_profile_budget_items_and_outputs(tmpdir):
+    """Ensure compute, budget item and output stages are recorded while profiling"""
+    step = BudgetItem.step
+
+    with profiling.profile() as profiler:
+        expenses, budget_items = compute.buy(PURCHASER, HOME, 2)
+        write('html', HOME, budget_items, expenses, str(tmpdir))
+
+    assert BudgetItem.step is step
+    assert profiling.active() is None
+
+    periods = 2 * const.PERIODS_PER_YEAR + 1
+    assert profiler.stages['compute.buy'].calls == 1
+    assert profiler.stages['HomeLifetime.step'].calls == periods
+    assert profiler.stages['MinMortgage.step'].calls == periods
+    for stage in ['outputs.write_html', 'outputs.get_asset_table', 'outputs.get_expense_table',
+                  'outputs.html.render', 'outputs.html.write']:
+        assert profiler.stages[stage].calls >= 1
+
+
+def test_profile_stepped_items():
+    """Ensure budget items stepped without a compiled plan are recorded"""
+    class Custom(BudgetItem):
+        def _step(self, budget):
+            return MonthlyExpense(costs=-1)
+
+    with profiling.profile() as profiler:
+        compute.compute(MonthlyBudget(100), [Custom()], 5)
+
+    assert profiler.stages['Custom.step'].calls == 5
+
+
+def test_profile_restores_step():
+    """Ensure the original step is restored even if it was wrapped again while profiling"""
+    step = BudgetItem.step
+
+    with profiling.profile():
+        BudgetItem.step = lambda self, budget: None
+
+    assert BudgetItem.step is step
+    assert profiling.active() is None
+
+
+def test_profile_merges_workers(tmpdir):
+    """Ensure worker process profiles are merged into the active profile"""
+    pstats_file = str(tmpdir.join('profile.pstats'))
+    json_file = str(tmpdir.join('profile.json'))
+
+    with profiling.profile(use_cprofile=True) as profiler:
+        results = list(parallel.ordered_map(_buy_task, [(1,), (2,)], jobs=2, shared=PURCHASER))
+
+    assert results == [compute.summarize(PURCHASER, HOME, years) for years in [1, 2]]
+    assert profiler.stages['compute.summarize'].calls == 2
+
+    profiler.write_json(json_file)
+    profiler.write_pstats(pstats_file)
+
+    with open(json_file) as json_fd:
+        assert json.load(json_fd)['stages']['compute.summarize']['calls'] == 2
+    assert any(func[2] == 'summarize' for func in pstats.Stats(pstats_file).stats)
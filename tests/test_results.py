@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from homecomp import compute
+from homecomp import const
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.outputs.common import format_currency
+from homecomp.outputs.common import get_asset_table
+from homecomp.outputs.common import get_expense_table
+from homecomp.results import ResultStore
+from homecomp.results import series
+
+
+PURCHASER = PurchaserProfile(name='test', cash=150000, budget=5000)
+HOME = HousingDetail(name='12 Main St. NW', price=650000, type=const.HOUSING_TYPE_HOME, hoa=150)
+RENTAL = HousingDetail(name='Apartment', price=2450, type=const.HOUSING_TYPE_RENTAL)
+
+
+def _compute(housing, years=2):
+    method = compute.buy if housing.type == const.HOUSING_TYPE_HOME else compute.rent
+    return method(PURCHASER, housing, years)
+
+
+def test_series_matches_tables():
+    """Ensure result columns hold the same values as rendered reports"""
+    expenses, budget_items = _compute(HOME)
+    columns = series(expenses, budget_items)
+
+    _, expense_rows = get_expense_table(expenses)
+    assert [format_currency(value) for value in columns['expenses.HomeLifetime.Maintenance']] == \
+        [row[f'{HOME.name}.Maintenance'] for row in expense_rows]
+    assert [format_currency(value) for value in columns['expenses.Total']] == [row['Total'] for row in expense_rows]
+
+    _, asset_rows = get_asset_table(budget_items, len(expenses) - 1)
+    assert [format_currency(value) for value in columns['networth.HomeLifetime']] == \
+        [row[HOME.name] for row in asset_rows]
+    assert [format_currency(value) for value in columns['networth.Total']] == [row['Total'] for row in asset_rows]
+
+
+def test_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    home_columns = series(*_compute(HOME))
+    rental_columns = series(*_compute(RENTAL))
+
+    with store.writer('sweep', {'time': 2}) as writer:
+        writer.add(PURCHASER, HOME, home_columns)
+        writer.add(PURCHASER, RENTAL, rental_columns)
+        writer.add(PurchaserProfile(name='other', cash=1, budget=1), HOME, home_columns)
+
+    assert store.names() == ['sweep']
+    result_set = store.open('sweep')
+
+    assert len(result_set) == 3
+    assert result_set.metadata == {'time': 2}
+    assert set(result_set.columns) == set(home_columns) | set(rental_columns)
+    assert result_set.scenario(1) == (PURCHASER, RENTAL)
+    assert result_set.select(purchaser=PURCHASER.name).tolist() == [0, 1]
+    assert result_set.select(purchaser=PURCHASER.name, housing=HOME.name).tolist() == [0]
+
+    networth = result_set['networth.Total']
+    assert isinstance(networth, np.memmap)
+    assert networth.shape == (3, len(home_columns['networth.Total']))
+    np.testing.assert_array_equal(networth[1], rental_columns['networth.Total'])
+
+    # columns missing from a scenario are NaN including those first seen after it
+    rent = result_set['expenses.Rent']
+    assert np.isnan(rent[[0, 2]]).all()
+    np.testing.assert_array_equal(rent[1], rental_columns['expenses.Rent'])
+    assert np.isnan(result_set['expenses.MinMortgage'][1]).all()
+
+
+def test_replace_and_remove(tmp_path):
+    store = ResultStore(str(tmp_path))
+    columns = series(*_compute(RENTAL))
+
+    with store.writer('sweep') as writer:
+        writer.add(PURCHASER, RENTAL, columns)
+
+    with pytest.raises(RuntimeError):
+        with store.writer('sweep') as writer:
+            raise RuntimeError()
+
+    assert len(store.open('sweep')) == 1
+
+    with store.writer('sweep') as writer:
+        pass
+
+    assert len(store.open('sweep')) == 0
+    assert store.open('sweep').columns == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['sweep']
+
+    with pytest.raises(ValueError):
+        with store.writer('sweep') as writer:
+            writer.add(PURCHASER, RENTAL, columns)
+            writer.add(PURCHASER, RENTAL, series(*_compute(RENTAL, years=3)))
+
+    store.remove('sweep')
+    assert store.names() == []
+
+    with pytest.raises(FileNotFoundError):
+        store.open('sweep')
+    with pytest.raises(ValueError):
+        store.open('../sweep')
@@ -0,0 +1,339 @@
+import json
+import multiprocessing
+import operator
+import os
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from homecomp import cli
+from homecomp import const
+from homecomp import errors
+from homecomp.models import HousingDetail
+from homecomp.models import PurchaserProfile
+from homecomp.storage import DataclassFileStorage
+from homecomp.storage import DataclassSqliteStorage
+from homecomp.storage import DataclassStorageTable
+from homecomp.storage import get_storage
+from homecomp.storage import migrate_storage
+
+
+HOUSING = [
+    HousingDetail(name='12 Main St. NW', price=600000, type=const.HOUSING_TYPE_HOME),
+    HousingDetail(name='Main St. Apartments', price=2500, type=const.HOUSING_TYPE_RENTAL),
+    HousingDetail(name='1 Elm St.', price=450000, type=const.HOUSING_TYPE_HOME, hoa=300),
+]
+
+
+@pytest.fixture(params=['.storage', '.storage.db'])
+def filename(request, tmpdir):
+    return str(tmpdir.join(request.param))
+
+
+def test_get_storage_backend(filename):
+    expected = DataclassSqliteStorage if filename.endswith('.db') else DataclassFileStorage
+    assert isinstance(get_storage(filename), expected)
+
+
+def test_save_find_delete(filename):
+    with get_storage(filename) as storage:
+        for details in HOUSING:
+            storage.housing.save(details)
+
+    with get_storage(filename) as storage:
+        assert list(storage.housing) == HOUSING
+        assert storage.housing.find('Main') == HOUSING[0]
+        assert list(storage.housing.find_all('Main')) == HOUSING[:2]
+        assert list(storage.housing.find_all('1 Elm St.', match=operator.eq)) == HOUSING[2:]
+        assert list(storage.housing.find_all('st.', match=lambda name, value: value in name.lower())) == HOUSING
+
+        with pytest.raises(errors.NoEntryFound):
+            storage.housing.find('Oak')
+
+        storage.housing.delete('1 Elm St.')
+
+        with pytest.raises(errors.NoEntryFound):
+            storage.housing.delete('1 Elm St.')
+
+    with get_storage(filename) as storage:
+        assert list(storage.housing) == HOUSING[:2]
+
+
+def test_save_overwrite(filename):
+    updated = HousingDetail(name='12 Main St. NW', price=625000, type=const.HOUSING_TYPE_HOME)
+
+    with get_storage(filename) as storage:
+        for details in HOUSING:
+            storage.housing.save(details)
+
+        with pytest.raises(errors.EntryExists):
+            storage.housing.save(updated, overwrite=False)
+
+        storage.housing.save(updated)
+
+    with get_storage(filename) as storage:
+        # updated entries keep their original position
+        assert list(storage.housing) == [updated] + HOUSING[1:]
+
+
+def test_sqlite_rollback(tmpdir):
+    """Ensure changes are discarded when the storage context exits with an error"""
+    filename = str(tmpdir.join('.storage.db'))
+
+    with get_storage(filename) as storage:
+        storage.housing.save(HOUSING[0])
+
+    with pytest.raises(RuntimeError):
+        with get_storage(filename) as storage:
+            storage.housing.delete(HOUSING[0].name)
+            storage.housing.save(HOUSING[1])
+            raise RuntimeError()
+
+    with get_storage(filename) as storage:
+        assert list(storage.housing) == HOUSING[:1]
+
+
+def test_migrate_storage(tmpdir):
+    profile = PurchaserProfile(name='alice', cash=150000, budget=5000)
+    source = str(tmpdir.join('.storage'))
+    destination = str(tmpdir.join('.storage.db'))
+
+    with get_storage(source) as storage:
+        storage.profiles.save(profile)
+        for details in HOUSING:
+            storage.housing.save(details)
+
+    with get_storage(source) as source_storage, get_storage(destination) as destination_storage:
+        counts = migrate_storage(source_storage, destination_storage)
+
+    assert counts == {'housing': len(HOUSING), 'profiles': 1}
+
+    with get_storage(destination) as storage:
+        assert list(storage.housing) == HOUSING
+        assert list(storage.profiles) == [profile]
+
+
+def test_file_storage_read_only(tmpdir):
+    """Ensure sessions which change nothing do not write to storage"""
+    filename = str(tmpdir.join('.storage'))
+
+    with DataclassFileStorage(filename) as storage:
+        list(storage.housing)
+    assert not tmpdir.listdir()
+
+    with DataclassFileStorage(filename, journal_max_bytes=0) as storage:
+        storage.housing.save(HOUSING[0])
+    mtime = os.stat(filename).st_mtime_ns
+
+    with DataclassFileStorage(filename) as storage:
+        storage.housing.find('Main')
+    assert os.stat(filename).st_mtime_ns == mtime
+    assert sorted(path.basename for path in tmpdir.listdir()) == ['.storage', '.storage.lock']
+
+
+def test_file_storage_journal(tmpdir):
+    """Ensure changes are journaled and compacted once the journal passes its threshold"""
+    filename = str(tmpdir.join('.storage'))
+    journal = filename + '.journal'
+
+    with DataclassFileStorage(filename) as storage:
+        for details in HOUSING:
+            storage.housing.save(details)
+        storage.housing.delete(HOUSING[1].name)
+
+    assert not os.path.exists(filename)
+    with open(journal) as journal_fd:
+        assert [json.loads(line)['op'] for line in journal_fd] == ['save'] * 3 + ['delete']
+
+    with DataclassFileStorage(filename) as storage:
+        assert list(storage.housing) == [HOUSING[0], HOUSING[2]]
+
+    with DataclassFileStorage(filename, journal_max_bytes=os.path.getsize(journal)) as storage:
+        storage.housing.save(HOUSING[1])
+
+    assert not os.path.exists(journal)
+    with DataclassFileStorage(filename) as storage:
+        assert list(storage.housing) == [HOUSING[0], HOUSING[2], HOUSING[1]]
+
+
+def test_file_storage_journal_recovery(tmpdir):
+    """Ensure a partially written final journal line is ignored and corrupt lines are not"""
+    filename = str(tmpdir.join('.storage'))
+    journal = filename + '.journal'
+
+    with DataclassFileStorage(filename) as storage:
+        storage.housing.save(HOUSING[0])
+
+    with open(journal, 'a') as journal_fd:
+        journal_fd.write('{"table": "housing", "op": "sa')
+
+    with DataclassFileStorage(filename) as storage:
+        assert list(storage.housing) == HOUSING[:1]
+        storage.housing.save(HOUSING[1])
+
+    with DataclassFileStorage(filename) as storage:
+        assert list(storage.housing) == HOUSING[:2]
+
+    with open(journal, 'a') as journal_fd:
+        journal_fd.write('not json\n' + json.dumps({'table': 'housing', 'op': 'delete', 'id': HOUSING[0].name}) + '\n')
+
+    with pytest.raises(errors.StorageError):
+        with DataclassFileStorage(filename):
+            pass
+
+
+def test_find_exact_first(filename):
+    """Ensure exact matches are found first and indexed lookups follow saves and deletes"""
+    exact = HousingDetail(name='Main St.', price=500000, type=const.HOUSING_TYPE_HOME)
+
+    with get_storage(filename) as storage:
+        for details in HOUSING + [exact]:
+            storage.housing.save(details)
+
+        assert storage.housing.find('Main St.') == exact
+        assert list(storage.housing.find_all('Main St.')) == [exact] + HOUSING[:2]
+        assert list(storage.housing.find_all('Main', match=str.startswith)) == [HOUSING[1], exact]
+
+        storage.housing.delete(exact.name)
+        storage.housing.save(replace(exact, name='2 Main St.'))
+
+        assert list(storage.housing.find_all('Main St.')) == HOUSING[:2] + [replace(exact, name='2 Main St.')]
+
+
+def test_cli_lookups_use_index(tmpdir, monkeypatch):
+    """Ensure housing and profile lookups of commands are indexed rather than scanned"""
+    filename = str(tmpdir.join('.storage'))
+    monkeypatch.setenv('HOMECOMP_STORAGE', filename)
+
+    with get_storage(filename) as storage:
+        storage.profiles.save(PurchaserProfile(name='alice', cash=150000, budget=5000))
+        for details in HOUSING:
+            storage.housing.save(details)
+
+    def _scan(*args, **kwargs):
+        raise AssertionError('Lookup scanned every entry')
+
+    monkeypatch.setattr(DataclassStorageTable, '_scan', _scan)
+
+    assert cli.get_housing_detail('Main St.') == HOUSING[0]
+    assert cli.get_housing_detail('Elm') == HOUSING[2]
+    assert cli.get_purchaser_profile('ali').name == 'alice'
+
+
+def test_file_storage_keeps_indexes(tmpdir):
+    """Ensure indexes are reused by later sessions until storage changes"""
+    filename = str(tmpdir.join('.storage'))
+
+    with DataclassFileStorage(filename) as storage:
+        for details in HOUSING:
+            storage.housing.save(details)
+
+    reader = DataclassFileStorage(filename)
+    with reader:
+        reader.housing.find('Main')
+        index = reader.indexes['housing']
+    with reader:
+        assert reader.indexes['housing'] is index
+
+    with DataclassFileStorage(filename) as storage:
+        storage.housing.delete(HOUSING[0].name)
+
+    with reader:
+        assert not reader.indexes
+        assert reader.housing.find('Main') == HOUSING[1]
+
+
+@pytest.mark.parametrize('journal_max_bytes', [None, 0])
+def test_file_storage_concurrent_sessions(tmpdir, journal_max_bytes):
+    """Ensure overlapping sessions keep each other's changes whether or not storage is compacted"""
+    filename = str(tmpdir.join('.storage'))
+
+    with DataclassFileStorage(filename) as storage:
+        storage.housing.save(HOUSING[0])
+
+    with DataclassFileStorage(filename, journal_max_bytes) as first, \
+            DataclassFileStorage(filename, journal_max_bytes) as second:
+        first.housing.save(HOUSING[1])
+        second.housing.save(HOUSING[2])
+        second.housing.delete(HOUSING[0].name)
+
+    # the second session is committed first as it is closed first
+    with DataclassFileStorage(filename) as storage:
+        assert list(storage.housing) == [HOUSING[2], HOUSING[1]]
+
+
+def test_read_then_write_sessions(filename):
+    """Ensure a session can write after reading even when another session committed in between"""
+    with get_storage(filename) as storage:
+        storage.housing.save(HOUSING[0])
+
+    with get_storage(filename) as first:
+        assert list(first.housing) == HOUSING[:1]
+
+        with get_storage(filename) as second:
+            second.housing.save(HOUSING[1])
+
+        first.housing.save(HOUSING[2])
+
+    with get_storage(filename) as storage:
+        assert list(storage.housing) == HOUSING
+
+
+def test_sqlite_writers_wait(tmpdir):
+    """Ensure a writer waits for a concurrent writer to commit instead of failing"""
+    filename = str(tmpdir.join('.storage.db'))
+    written = threading.Event()
+    errors_raised = []
+
+    def _write():
+        try:
+            with get_storage(filename) as storage:
+                storage.housing.save(HOUSING[1])
+                written.set()
+                time.sleep(0.2)
+        except Exception as error:  # pylint: disable=broad-except
+            errors_raised.append(error)
+            written.set()
+
+    with get_storage(filename) as storage:
+        list(storage.housing)
+
+        thread = threading.Thread(target=_write)
+        thread.start()
+        written.wait()
+        storage.housing.save(HOUSING[0])
+
+    thread.join()
+    assert not errors_raised
+
+    with get_storage(filename) as storage:
+        assert list(storage.housing) == HOUSING[1::-1]
+
+
+def _save_profiles(filename, worker, count):
+    for idx in range(count):
+        with DataclassFileStorage(filename, journal_max_bytes=512) as storage:
+            storage.profiles.save(PurchaserProfile(name=f'{worker}-{idx}', cash=idx, budget=idx))
+
+
+def test_file_storage_concurrent_processes(tmpdir):
+    """Ensure no changes are lost when processes commit to the same storage at once"""
+    filename = str(tmpdir.join('.storage'))
+    workers, count = 4, 25
+
+    processes = [
+        multiprocessing.Process(target=_save_profiles, args=(filename, worker, count))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    with DataclassFileStorage(filename) as storage:
+        names = {profile.name for profile in storage.profiles}
+
+    assert names == {f'{worker}-{idx}' for worker in range(workers) for idx in range(count)}